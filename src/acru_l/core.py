@@ -1,9 +1,12 @@
+import json
 from typing import Type, Optional, Mapping, Dict, List, Any
 
 import pydantic
 import toml
 from aws_cdk import core
 
+from acru_l.resources.functions import PROFILES_CONTEXT_KEY, FunctionProfile
+from acru_l.resources.lookups import LOOKUPS_CONTEXT_KEY, LookupCache
 from acru_l.utils import traverse
 
 
@@ -60,6 +63,8 @@ class AppConfig(pydantic.BaseModel):
 
 class AcrulConfig(pydantic.BaseModel):
     app: AppConfig = AppConfig()
+    profiles: Dict[str, FunctionProfile] = {}
+    lookups: LookupCache = LookupCache()
     stacks: List[StackConfig]
 
 
@@ -85,10 +90,22 @@ def app_factory(
     settings = Settings(**default_settings)
     env = settings.env
     config = settings.config
+    context = dict(config.app.context or {})
+    if config.profiles:
+        # function constructs look profiles up by name in the app context
+        context[PROFILES_CONTEXT_KEY] = {
+            name: json.loads(profile.json(exclude_none=True))
+            for name, profile in config.profiles.items()
+        }
+    if config.lookups.vpcs or config.lookups.hosted_zones:
+        # resolved by acru_l.resources.lookups instead of AWS lookups
+        context[LOOKUPS_CONTEXT_KEY] = json.loads(
+            config.lookups.json(exclude_none=True)
+        )
     app = App(
         analytics_reporting=config.app.analytics_reporting,
         auto_synth=config.app.auto_synth,
-        context=config.app.context,
+        context=context or None,
         outdir=config.app.outdir,
         runtime_info=config.app.runtime_info,
         stack_traces=config.app.stack_traces,
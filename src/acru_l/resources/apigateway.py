@@ -1,11 +1,198 @@
+from typing import List, Literal, Optional
+
 from aws_cdk import (
     core,
     aws_apigatewayv2 as apigateway,
     aws_apigatewayv2_integrations as apigateway_integrations,
+    aws_cloudfront as cloudfront,
     aws_lambda as _lambda,
     aws_certificatemanager as acm,
     aws_route53 as rout53,
 )
+from pydantic import BaseModel, Field, validator
+
+# Managed-AllViewerExceptHostHeader, API Gateway rejects requests that
+# carry the viewer's Host header.
+ALL_VIEWER_EXCEPT_HOST_POLICY_ID = "b689b0a8-53d0-40ab-baf2-68738e2966ac"
+
+
+class APIGatewayOrigin(cloudfront.OriginBase):
+    """
+    CloudFront origin for the execute-api endpoint of an HttpApi.
+    """
+
+    def __init__(self, api: apigateway.HttpApi, **kwargs):
+        domain_name = core.Fn.select(2, core.Fn.split("/", api.api_endpoint))
+        super().__init__(domain_name, **kwargs)
+
+    def _render_custom_origin_config(self):
+        return cloudfront.CfnDistribution.CustomOriginConfigProperty(
+            origin_protocol_policy="https-only",
+            origin_ssl_protocols=["TLSv1.2"],
+        )
+
+
+class CachePolicyOptions(BaseModel):
+    # name of a managed policy on cloudfront.CachePolicy,
+    # e.g. "CACHING_OPTIMIZED" or "CACHING_DISABLED"
+    managed: Optional[str] = None
+    name: Optional[str] = None
+    comment: Optional[str] = None
+    # by default only responses with an explicit Cache-Control are cached
+    default_ttl: int = 0
+    min_ttl: int = 0
+    max_ttl: int = 86400
+    header_allow_list: List[str] = Field(
+        default_factory=lambda: ["Authorization"]
+    )
+    cookie_behavior: Literal["none", "all"] = "all"
+    cookie_allow_list: List[str] = Field(default_factory=list)
+    query_string_behavior: Literal["none", "all"] = "all"
+    query_string_allow_list: List[str] = Field(default_factory=list)
+    enable_accept_encoding_gzip: bool = True
+    enable_accept_encoding_brotli: bool = True
+
+    def build(self, scope: core.Construct, id: str):
+        if self.managed:
+            return getattr(cloudfront.CachePolicy, self.managed)
+
+        if self.cookie_allow_list:
+            cookies = cloudfront.CacheCookieBehavior.allow_list(
+                *self.cookie_allow_list
+            )
+        else:
+            cookies = getattr(
+                cloudfront.CacheCookieBehavior, self.cookie_behavior
+            )()
+
+        if self.query_string_allow_list:
+            query_strings = cloudfront.CacheQueryStringBehavior.allow_list(
+                *self.query_string_allow_list
+            )
+        else:
+            query_strings = getattr(
+                cloudfront.CacheQueryStringBehavior, self.query_string_behavior
+            )()
+
+        if self.header_allow_list:
+            headers = cloudfront.CacheHeaderBehavior.allow_list(
+                *self.header_allow_list
+            )
+        else:
+            headers = cloudfront.CacheHeaderBehavior.none()
+
+        return cloudfront.CachePolicy(
+            scope,
+            id,
+            cache_policy_name=self.name,
+            comment=self.comment,
+            default_ttl=core.Duration.seconds(self.default_ttl),
+            min_ttl=core.Duration.seconds(self.min_ttl),
+            max_ttl=core.Duration.seconds(self.max_ttl),
+            cookie_behavior=cookies,
+            header_behavior=headers,
+            query_string_behavior=query_strings,
+            enable_accept_encoding_gzip=self.enable_accept_encoding_gzip,
+            enable_accept_encoding_brotli=self.enable_accept_encoding_brotli,
+        )
+
+
+class OriginRequestPolicyOptions(BaseModel):
+    # name of a managed policy on cloudfront.OriginRequestPolicy or
+    # "ALL_VIEWER_EXCEPT_HOST_HEADER"
+    managed: Optional[str] = "ALL_VIEWER_EXCEPT_HOST_HEADER"
+    name: Optional[str] = None
+    comment: Optional[str] = None
+    header_allow_list: List[str] = Field(default_factory=list)
+    cookie_behavior: Literal["none", "all"] = "all"
+    query_string_behavior: Literal["none", "all"] = "all"
+
+    def build(self, scope: core.Construct, id: str):
+        policy_class = cloudfront.OriginRequestPolicy
+        if self.managed == "ALL_VIEWER_EXCEPT_HOST_HEADER":
+            return policy_class.from_origin_request_policy_id(
+                scope, id, ALL_VIEWER_EXCEPT_HOST_POLICY_ID
+            )
+        if self.managed:
+            return getattr(policy_class, self.managed)
+
+        if self.header_allow_list:
+            headers = cloudfront.OriginRequestHeaderBehavior.allow_list(
+                *self.header_allow_list
+            )
+        else:
+            headers = cloudfront.OriginRequestHeaderBehavior.none()
+
+        return policy_class(
+            scope,
+            id,
+            origin_request_policy_name=self.name,
+            comment=self.comment,
+            header_behavior=headers,
+            cookie_behavior=getattr(
+                cloudfront.OriginRequestCookieBehavior, self.cookie_behavior
+            )(),
+            query_string_behavior=getattr(
+                cloudfront.OriginRequestQueryStringBehavior,
+                self.query_string_behavior,
+            )(),
+        )
+
+
+class CacheBehaviorOptions(BaseModel):
+    path_pattern: Optional[str] = None
+    cache_policy: CachePolicyOptions = Field(
+        default_factory=CachePolicyOptions
+    )
+    origin_request_policy: OriginRequestPolicyOptions = Field(
+        default_factory=OriginRequestPolicyOptions
+    )
+    allowed_methods: Literal[
+        "ALLOW_ALL", "ALLOW_GET_HEAD", "ALLOW_GET_HEAD_OPTIONS"
+    ] = "ALLOW_ALL"
+    cached_methods: Literal[
+        "CACHE_GET_HEAD", "CACHE_GET_HEAD_OPTIONS"
+    ] = "CACHE_GET_HEAD"
+    compress: bool = True
+
+    def build(
+        self, scope: core.Construct, id: str, origin: cloudfront.IOrigin
+    ) -> cloudfront.BehaviorOptions:
+        return cloudfront.BehaviorOptions(
+            origin=origin,
+            cache_policy=self.cache_policy.build(scope, f"{id}CachePolicy"),
+            origin_request_policy=self.origin_request_policy.build(
+                scope, f"{id}OriginRequestPolicy"
+            ),
+            allowed_methods=getattr(
+                cloudfront.AllowedMethods, self.allowed_methods
+            ),
+            cached_methods=getattr(
+                cloudfront.CachedMethods, self.cached_methods
+            ),
+            compress=self.compress,
+            viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,  # noqa: E501
+        )
+
+
+class DistributionOptions(BaseModel):
+    """
+    CloudFront in front of the HttpApi. The certificate must live in
+    us-east-1.
+    """
+
+    default_behavior: CacheBehaviorOptions = Field(
+        default_factory=CacheBehaviorOptions
+    )
+    behaviors: List[CacheBehaviorOptions] = Field(default_factory=list)
+    price_class: cloudfront.PriceClass = cloudfront.PriceClass.PRICE_CLASS_100
+    comment: Optional[str] = None
+
+    @validator("behaviors", each_item=True)
+    def check_path_pattern(cls, behavior):
+        if not behavior.path_pattern:
+            raise ValueError("behaviors require a path_pattern")
+        return behavior
 
 
 class LambdaAPIGateway(core.Construct):
@@ -19,17 +206,25 @@ class LambdaAPIGateway(core.Construct):
         handler: _lambda.Function,
         hosted_zone: rout53.HostedZone,
         payload_format_version: apigateway.PayloadFormatVersion = apigateway.PayloadFormatVersion.VERSION_1_0,  # noqa: E501
+        distribution_options: Optional[DistributionOptions] = None,
     ):
         super().__init__(scope, id)
+        self.payload_format_version = payload_format_version
         integration = apigateway_integrations.LambdaProxyIntegration(
             handler=handler, payload_format_version=payload_format_version
         )
-        dn = apigateway.DomainName(
-            self,
-            "DomainName",
-            domain_name=domain_name,
-            certificate=certificate,
-        )
+        default_domain_mapping = None
+        if distribution_options is None:
+            dn = apigateway.DomainName(
+                self,
+                "DomainName",
+                domain_name=domain_name,
+                certificate=certificate,
+            )
+            default_domain_mapping = apigateway.DefaultDomainMappingOptions(
+                domain_name=dn,
+            )
+            record_target = dn.regional_domain_name
         self.api = apigateway.HttpApi(
             self,
             "Gateway",
@@ -59,15 +254,69 @@ class LambdaAPIGateway(core.Construct):
                 allow_origins=["*"],
                 max_age=core.Duration.minutes(60),
             ),
-            default_domain_mapping=apigateway.DefaultDomainMappingOptions(
-                domain_name=dn,
-            ),
+            default_domain_mapping=default_domain_mapping,
         )
 
+        self.distribution = None
+        if distribution_options is not None:
+            self.distribution = self.add_distribution(
+                domain_name=domain_name,
+                certificate=certificate,
+                options=distribution_options,
+            )
+            record_target = self.distribution.distribution_domain_name
+
         rout53.CnameRecord(
             self,
             "Record",
-            domain_name=dn.regional_domain_name,
+            domain_name=record_target,
             zone=hosted_zone,
             record_name=f"{domain_name}.",
         )
+
+    def add_route(
+        self,
+        *,
+        path: str,
+        methods: List[apigateway.HttpMethod],
+        handler: _lambda.IFunction,
+    ) -> List[apigateway.HttpRoute]:
+        """
+        Sends `methods` on `path` to `handler` instead of the default
+        integration.
+        """
+        return self.api.add_routes(
+            path=path,
+            methods=methods,
+            integration=apigateway_integrations.LambdaProxyIntegration(
+                handler=handler,
+                payload_format_version=self.payload_format_version,
+            ),
+        )
+
+    def add_distribution(
+        self,
+        *,
+        domain_name: str,
+        certificate: acm.Certificate,
+        options: DistributionOptions,
+    ) -> cloudfront.Distribution:
+        origin = APIGatewayOrigin(self.api)
+        additional_behaviors = {
+            behavior.path_pattern: behavior.build(
+                self, f"Behavior{index}", origin
+            )
+            for index, behavior in enumerate(options.behaviors)
+        }
+        return cloudfront.Distribution(
+            self,
+            "Distribution",
+            default_behavior=options.default_behavior.build(
+                self, "DefaultBehavior", origin
+            ),
+            additional_behaviors=additional_behaviors,
+            domain_names=[domain_name],
+            certificate=certificate,
+            price_class=options.price_class,
+            comment=options.comment,
+        )
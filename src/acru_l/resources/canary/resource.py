@@ -1,4 +1,6 @@
 import os
+from typing import Optional
+
 from aws_cdk import (
     core,
 )
@@ -16,7 +18,8 @@ class Canary(core.Construct):
         *,
         deploy_id: str,
         version: str,
-        health_check_url: str
+        health_check_url: str,
+        profile: Optional[str] = None
     ):
         super().__init__(scope, id)
         self.custom_resource = PythonCustomResource(
@@ -25,6 +28,7 @@ class Canary(core.Construct):
             source_dir=os.path.join(canary_dirname, "src"),
             index="handler.py",
             handler="main",
+            profile=profile,
             resource_properties={
                 "deploy_id": deploy_id,
                 "version": version,
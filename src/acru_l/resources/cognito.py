@@ -20,6 +20,8 @@ from pydantic import (
     DirectoryPath,
 )
 
+from acru_l.resources.functions import apply_profile, set_ephemeral_storage
+
 
 class Factory(BaseModel):
     def build(self, *args, **kwargs):
@@ -154,12 +156,24 @@ class PythonFunctionFactory(Factory):
     log_retention: logs.RetentionDays = logs.RetentionDays.ONE_DAY
     pool_actions: List[str] = Field(default_factory=list)
     retry_attempts: int = 2
+    profile: Optional[str] = None
 
     def build(self, scope: core.Construct, pool: cognito.UserPool):
         runtime = self.runtime or _lambda.Runtime.PYTHON_3_8
         layers = [opts.build(scope, runtime) for opts in self.layers]
         for name in self.local_environment_names:
             self.environment[name] = os.environ[name]
+        fields = {"log_retention", "profiling", "memory_size", "tracing"}
+        settings = {
+            # the defaults of these options rank below the profile
+            **self.dict(include=fields),
+            **apply_profile(
+                scope,
+                self.profile,
+                self.dict(include=fields, exclude_unset=True),
+            ),
+        }
+        ephemeral_storage_size = settings.pop("ephemeral_storage_size", None)
         fn = PythonFunction(
             scope,
             self.name,
@@ -170,11 +184,9 @@ class PythonFunctionFactory(Factory):
             layers=layers,
             description=self.description,
             environment=self.environment,
-            log_retention=self.log_retention,
-            profiling=self.profiling,
-            memory_size=self.memory_size,
-            tracing=self.tracing,
+            **settings,
         )
+        set_ephemeral_storage(fn, ephemeral_storage_size)
         if self.pool_actions:
             policy = iam.Policy(
                 scope,
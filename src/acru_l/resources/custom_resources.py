@@ -1,4 +1,4 @@
-from typing import Mapping, Any, List, Optional
+from typing import Mapping, Any, List, Optional, Union
 
 from aws_cdk import (
     core,
@@ -10,6 +10,12 @@ from aws_cdk import (
     aws_logs as logs,
 )
 
+from acru_l.resources.functions import (
+    FunctionProfile,
+    apply_profile,
+    set_ephemeral_storage,
+)
+
 
 class CustomResource(core.Construct):
 
@@ -63,15 +69,33 @@ class PythonCustomResource(CustomResource):
         runtime: _lambda.Runtime = _lambda.Runtime.PYTHON_3_8,
         layers: Optional[List[_lambda.LayerVersion]] = None,
         environment: Optional[Mapping[str, Any]] = None,
-        timeout: core.Duration = core.Duration.seconds(300),
-        memory_size: int = 1024,
-        log_retention: logs.RetentionDays = logs.RetentionDays.ONE_DAY,
+        timeout: Optional[core.Duration] = None,
+        memory_size: Optional[int] = None,
+        log_retention: Optional[logs.RetentionDays] = None,
         vpc: Optional[ec2.Vpc] = None,
+        profile: Optional[Union[str, FunctionProfile]] = None,
         **kwargs,
     ):
         kwargs["on_event_handler"] = None
         super().__init__(scope, id, **kwargs)
         environment = environment or {}
+        explicit = {
+            "memory_size": memory_size,
+            "timeout": timeout,
+            "log_retention": log_retention,
+        }
+        settings = {
+            # below both the profile and the explicit settings
+            "memory_size": 1024,
+            "timeout": core.Duration.seconds(300),
+            "log_retention": logs.RetentionDays.ONE_DAY,
+            **apply_profile(
+                self,
+                profile,
+                {k: v for k, v in explicit.items() if v is not None},
+            ),
+        }
+        ephemeral_storage_size = settings.pop("ephemeral_storage_size", None)
         self.on_event_handler = lambda_python.PythonFunction(
             self,
             "OnEventHandler",
@@ -80,10 +104,9 @@ class PythonCustomResource(CustomResource):
             handler=handler,
             runtime=runtime,
             layers=layers,
-            memory_size=memory_size,
             environment=environment,
-            timeout=timeout,
             vpc=vpc,
-            log_retention=log_retention,
+            **settings,
         )
+        set_ephemeral_storage(self.on_event_handler, ephemeral_storage_size)
         self.setup_resource()
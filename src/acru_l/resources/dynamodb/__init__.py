@@ -0,0 +1,12 @@
+from .resource import (  # noqa: F401
+    CapacityScalingOptions,
+    DaxOptions,
+    DynamoDB,
+    DynamoDBOptions,
+    GlobalIndexOptions,
+    KeyOptions,
+    LocalIndexOptions,
+    ScheduledScalingOptions,
+)
+from .layers import DynamoDBLayer  # noqa: F401
+from .streams import StreamConsumer, StreamConsumerOptions  # noqa: F401
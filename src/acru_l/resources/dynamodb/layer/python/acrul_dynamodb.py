@@ -0,0 +1,357 @@
+"""
+Batch-oriented access to tables created by `acru_l.resources.dynamodb`,
+keyed on `partition_key`/`sort_key`.
+
+The table name defaults to DYNAMODB_TABLE_NAME, which `DynamoDB.environment`
+sets. DYNAMODB_ENDPOINT_URL points the client at a local stand-in such as
+DynamoDB Local.
+
+Usage:
+    from acrul_dynamodb import Table
+
+    table = Table(cache_ttl=30, cache_max_entries=1000)
+    table.batch_write(puts=[{"partition_key": "user#1", "sort_key": "a"}])
+    items = table.batch_get([("user#1", "a"), ("user#2", "a")])
+    for item in table.query("user#1", sort_key_prefix="order#"):
+        ...
+    for item in table.scan(segments=8):
+        ...
+"""
+import copy
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+PARTITION_KEY = "partition_key"
+SORT_KEY = "sort_key"
+# per request limits of BatchGetItem and BatchWriteItem
+MAX_BATCH_GET = 100
+MAX_BATCH_WRITE = 25
+
+Key = Tuple[str, str]
+# expiry and item, None for keys that were not found
+CacheEntry = Tuple[float, Optional[Dict[str, Any]]]
+
+serializer = TypeSerializer()
+deserializer = TypeDeserializer()
+
+
+def serialize(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {name: serializer.serialize(value) for name, value in item.items()}
+
+
+def deserialize(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        name: deserializer.deserialize(value) for name, value in item.items()
+    }
+
+
+def item_key(item: Dict[str, Any]) -> Key:
+    return item[PARTITION_KEY], item[SORT_KEY]
+
+
+def chunks(values: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(values), size):
+        end = start + size
+        yield values[start:end]
+
+
+class UnprocessedItemsError(Exception):
+    """
+    DynamoDB kept throttling a batch after every retry.
+    """
+
+
+class ReadCache:
+    """
+    Per process read-through cache of items by key, shared by warm
+    invocations of a function. Holds at most `max_entries` keys, least
+    recently used first out. Items are copied in and out, so callers
+    may mutate what they get.
+    """
+
+    def __init__(
+        self, ttl: float, max_entries: int = 1024, clock=time.monotonic
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.items: "OrderedDict[Key, CacheEntry]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Key) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        with self.lock:
+            entry = self.items.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] < self.clock():
+                del self.items[key]
+                return False, None
+            self.items.move_to_end(key)
+        return True, copy.deepcopy(entry[1])
+
+    def set(self, key: Key, item: Optional[Dict[str, Any]]):
+        entry = (self.clock() + self.ttl, copy.deepcopy(item))
+        with self.lock:
+            self.items[key] = entry
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_entries:
+                self.items.popitem(last=False)
+
+    def invalidate(self, key: Key):
+        with self.lock:
+            self.items.pop(key, None)
+
+
+class Table:
+    def __init__(
+        self,
+        table_name: Optional[str] = None,
+        *,
+        client=None,
+        endpoint_url: Optional[str] = None,
+        cache_ttl: Optional[float] = None,
+        cache_max_entries: int = 1024,
+        max_attempts: int = 8,
+        base_delay: float = 0.05,
+        max_delay: float = 5,
+        sleep=time.sleep,
+    ):
+        self.table_name = table_name or os.environ["DYNAMODB_TABLE_NAME"]
+        self.endpoint_url = endpoint_url or os.environ.get(
+            "DYNAMODB_ENDPOINT_URL"
+        )
+        self._client = client
+        self.cache = (
+            ReadCache(cache_ttl, max_entries=cache_max_entries)
+            if cache_ttl
+            else None
+        )
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client(
+                "dynamodb", endpoint_url=self.endpoint_url
+            )
+        return self._client
+
+    def backoff(self, attempt: int):
+        """
+        Full jitter exponential backoff between unprocessed item retries.
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        self.sleep(random.uniform(0, delay))
+
+    def key(self, partition_key: str, sort_key: str) -> Dict[str, Any]:
+        return serialize({PARTITION_KEY: partition_key, SORT_KEY: sort_key})
+
+    def get(
+        self, partition_key: str, sort_key: str
+    ) -> Optional[Dict[str, Any]]:
+        return self.batch_get([(partition_key, sort_key)]).get(
+            (partition_key, sort_key)
+        )
+
+    def batch_get(
+        self, keys: Iterable[Key], *, consistent_read: bool = False
+    ) -> Dict[Key, Dict[str, Any]]:
+        """
+        Fetches `keys` in chunks of 100 and returns the items found by key.
+        Unprocessed keys are retried with backoff.
+        """
+        keys = list(dict.fromkeys(keys))
+        found: Dict[Key, Dict[str, Any]] = {}
+        if self.cache and not consistent_read:
+            missing = []
+            for key in keys:
+                hit, item = self.cache.get(key)
+                if not hit:
+                    missing.append(key)
+                elif item is not None:
+                    found[key] = item
+            keys = missing
+
+        for chunk in chunks(keys, MAX_BATCH_GET):
+            request = {
+                self.table_name: {
+                    "Keys": [self.key(*key) for key in chunk],
+                    "ConsistentRead": consistent_read,
+                }
+            }
+            for item in self._batch_get(request):
+                found[item_key(item)] = item
+            if self.cache:
+                for key in chunk:
+                    self.cache.set(key, found.get(key))
+        return found
+
+    def _batch_get(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        items = []
+        for attempt in range(self.max_attempts):
+            response = self.client.batch_get_item(RequestItems=request)
+            items += [
+                deserialize(item)
+                for item in response["Responses"].get(self.table_name, [])
+            ]
+            request = response.get("UnprocessedKeys")
+            if not request:
+                return items
+            self.backoff(attempt)
+        raise UnprocessedItemsError(
+            f"{len(request[self.table_name]['Keys'])} keys unprocessed"
+        )
+
+    def batch_write(
+        self,
+        *,
+        puts: Iterable[Dict[str, Any]] = (),
+        deletes: Iterable[Key] = (),
+    ) -> int:
+        """
+        Writes in chunks of 25 and retries unprocessed items with backoff.
+        Returns the number of requests written.
+        """
+        requests = {}
+        # a batch cannot touch the same key twice, the last write wins
+        for item in puts:
+            requests[item_key(item)] = {
+                "PutRequest": {"Item": serialize(item)}
+            }
+        for key in deletes:
+            requests[key] = {"DeleteRequest": {"Key": self.key(*key)}}
+        try:
+            for chunk in chunks(list(requests.values()), MAX_BATCH_WRITE):
+                self._batch_write({self.table_name: list(chunk)})
+        finally:
+            if self.cache:
+                for key in requests:
+                    self.cache.invalidate(key)
+        return len(requests)
+
+    def _batch_write(self, request: Dict[str, Any]):
+        for attempt in range(self.max_attempts):
+            response = self.client.batch_write_item(RequestItems=request)
+            request = response.get("UnprocessedItems")
+            if not request:
+                return
+            self.backoff(attempt)
+        raise UnprocessedItemsError(
+            f"{len(request[self.table_name])} writes unprocessed"
+        )
+
+    def query(
+        self,
+        partition_value: Any,
+        *,
+        sort_key_prefix: Optional[str] = None,
+        index_name: Optional[str] = None,
+        partition_key: str = PARTITION_KEY,
+        sort_key: str = SORT_KEY,
+        ascending: bool = True,
+        limit: Optional[int] = None,
+        page_size: Optional[int] = None,
+        consistent_read: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the items of one partition, following LastEvaluatedKey
+        page by page. Pass the index's key names with `index_name`.
+        """
+        request = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "#pk = :pk",
+            "ExpressionAttributeNames": {"#pk": partition_key},
+            "ExpressionAttributeValues": {
+                ":pk": serializer.serialize(partition_value)
+            },
+            "ScanIndexForward": ascending,
+            "ConsistentRead": consistent_read,
+        }
+        if sort_key_prefix is not None:
+            request["KeyConditionExpression"] += " AND begins_with(#sk, :sk)"
+            request["ExpressionAttributeNames"]["#sk"] = sort_key
+            request["ExpressionAttributeValues"][":sk"] = serializer.serialize(
+                sort_key_prefix
+            )
+        if index_name:
+            request["IndexName"] = index_name
+        if page_size:
+            request["Limit"] = page_size
+        yield from self._paginate("query", request, limit)
+
+    def scan(
+        self,
+        *,
+        segments: int = 1,
+        index_name: Optional[str] = None,
+        page_size: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yields every item, scanning `segments` segments in parallel
+        threads. Each segment is read in full before its items are
+        yielded.
+        """
+        request: Dict[str, Any] = {"TableName": self.table_name}
+        if index_name:
+            request["IndexName"] = index_name
+        if page_size:
+            request["Limit"] = page_size
+        if segments == 1:
+            yield from self._paginate("scan", request)
+            return
+
+        def scan_segment(segment: int) -> List[Dict[str, Any]]:
+            return list(
+                self._paginate(
+                    "scan",
+                    {
+                        **request,
+                        "Segment": segment,
+                        "TotalSegments": segments,
+                    },
+                )
+            )
+
+        with ThreadPoolExecutor(max_workers=segments) as executor:
+            for items in executor.map(scan_segment, range(segments)):
+                yield from items
+
+    def _paginate(
+        self,
+        method: str,
+        request: Dict[str, Any],
+        limit: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        count = 0
+        while True:
+            response = getattr(self.client, method)(**request)
+            for item in response.get("Items", []):
+                yield deserialize(item)
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+            last_key = response.get("LastEvaluatedKey")
+            if not last_key:
+                return
+            request = {**request, "ExclusiveStartKey": last_key}
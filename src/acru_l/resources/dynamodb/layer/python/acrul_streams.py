@@ -0,0 +1,103 @@
+"""
+DynamoDB stream helpers for functions attached with `StreamConsumer`.
+
+Usage:
+    from acrul_streams import process
+
+    def update_search_index(records):
+        for record in records:
+            if record.event_name == "REMOVE":
+                delete(record.keys)
+            else:
+                index(record.new_image)
+
+    def main(event, context):
+        return process(event, update_search_index, batch_size=25)
+
+`process` reports the first failed batch back to Lambda, so records that
+were already handled are not retried (ReportBatchItemFailures).
+"""
+import datetime
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple
+
+from boto3.dynamodb.types import TypeDeserializer
+
+logger = logging.getLogger(__name__)
+deserializer = TypeDeserializer()
+
+
+class StreamRecord(NamedTuple):
+    event_id: str
+    event_name: str  # INSERT, MODIFY or REMOVE
+    sequence_number: str
+    keys: Dict[str, Any]
+    new_image: Dict[str, Any]
+    old_image: Dict[str, Any]
+    created_at: datetime.datetime
+
+
+def deserialize(image: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        name: deserializer.deserialize(value)
+        for name, value in (image or {}).items()
+    }
+
+
+def decode(record: Dict[str, Any]) -> StreamRecord:
+    dynamodb = record["dynamodb"]
+    return StreamRecord(
+        event_id=record["eventID"],
+        event_name=record["eventName"],
+        sequence_number=dynamodb["SequenceNumber"],
+        keys=deserialize(dynamodb.get("Keys")),
+        new_image=deserialize(dynamodb.get("NewImage")),
+        old_image=deserialize(dynamodb.get("OldImage")),
+        created_at=datetime.datetime.fromtimestamp(
+            dynamodb["ApproximateCreationDateTime"], datetime.timezone.utc
+        ),
+    )
+
+
+def records(event: Dict[str, Any]) -> Iterator[StreamRecord]:
+    for record in event.get("Records", []):
+        yield decode(record)
+
+
+def batches(
+    records: Iterable[StreamRecord], batch_size: int
+) -> Iterator[List[StreamRecord]]:
+    batch: List[StreamRecord] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def process(
+    event: Dict[str, Any],
+    handler: Callable[[List[StreamRecord]], Any],
+    *,
+    batch_size: int = 100,
+) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Calls `handler` with decoded records in batches of `batch_size`.
+    Stops at the first failing batch and returns a partial batch
+    response, so Lambda retries from that batch onwards.
+    """
+    for batch in batches(records(event), batch_size):
+        try:
+            handler(batch)
+        except Exception:
+            logger.exception(
+                "Stream batch failed at %s", batch[0].sequence_number
+            )
+            return {
+                "batchItemFailures": [
+                    {"itemIdentifier": batch[0].sequence_number}
+                ]
+            }
+    return {"batchItemFailures": []}
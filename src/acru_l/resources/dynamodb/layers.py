@@ -0,0 +1,16 @@
+import os
+
+from acru_l.resources.layers import SharedLayer
+
+dynamodb_dirname = os.path.dirname(__file__)
+
+
+class DynamoDBLayer(SharedLayer):
+    """
+    Lambda layer with the acru-l DynamoDB runtime modules, e.g.
+    `acrul_streams` and `acrul_dynamodb`.
+    """
+
+    layer_id = "AcrulDynamoDBLayer"
+    asset_path = os.path.join(dynamodb_dirname, "layer")
+    description = "acru-l DynamoDB runtime helpers"
@@ -0,0 +1,499 @@
+from typing import Dict, Optional, List
+
+from aws_cdk import (
+    core,
+    aws_applicationautoscaling as appscaling,
+    aws_dax as dax,
+    aws_dynamodb as ddb,
+    aws_ec2 as ec2,
+    aws_iam as iam,
+)
+from pydantic import BaseModel, Field, root_validator, validator
+
+# DynamoDB limits per table
+MAX_GLOBAL_INDEXES = 20
+MAX_LOCAL_INDEXES = 5
+MAX_PROJECTED_ATTRIBUTES = 100
+
+# item and query actions, shared by the dynamodb and dax IAM prefixes
+DATA_ACTIONS = (
+    "BatchGetItem",
+    "BatchWriteItem",
+    "ConditionCheckItem",
+    "DeleteItem",
+    "GetItem",
+    "PutItem",
+    "Query",
+    "Scan",
+    "UpdateItem",
+)
+
+
+class ScheduledScalingOptions(BaseModel):
+    name: str
+    # UTC, e.g. "cron(0 7 ? * MON-FRI *)" or "rate(1 day)"
+    schedule: str
+    min_capacity: Optional[int] = Field(None, ge=1)
+    max_capacity: Optional[int] = Field(None, ge=1)
+
+    @validator("schedule")
+    def check_schedule(cls, value):
+        if not value.startswith(("cron(", "rate(", "at(")):
+            raise ValueError("expected a cron(), rate() or at() expression")
+        return value
+
+    @root_validator(skip_on_failure=True)
+    def check_capacity(cls, values):
+        if values["min_capacity"] is None and values["max_capacity"] is None:
+            raise ValueError("set min_capacity and/or max_capacity")
+        return values
+
+
+class CapacityScalingOptions(BaseModel):
+    """
+    Target tracking on consumed capacity units, plus optional scheduled
+    changes to the capacity bounds ahead of known traffic.
+    """
+
+    min_capacity: int = Field(1, ge=1)
+    max_capacity: int = Field(..., ge=1)
+    target_utilization: float = Field(70, ge=20, le=90)
+    scale_in_cooldown: int = 60
+    scale_out_cooldown: int = 60
+    schedules: List[ScheduledScalingOptions] = Field(default_factory=list)
+
+    @root_validator(skip_on_failure=True)
+    def check_capacity(cls, values):
+        if values["min_capacity"] > values["max_capacity"]:
+            raise ValueError("min_capacity cannot exceed max_capacity")
+        return values
+
+    @property
+    def capacity_kwargs(self) -> dict:
+        return {
+            "min_capacity": self.min_capacity,
+            "max_capacity": self.max_capacity,
+        }
+
+    def apply(self, attribute: ddb.IScalableTableAttribute):
+        attribute.scale_on_utilization(
+            target_utilization_percent=self.target_utilization,
+            scale_in_cooldown=core.Duration.seconds(self.scale_in_cooldown),
+            scale_out_cooldown=core.Duration.seconds(self.scale_out_cooldown),
+        )
+        for schedule in self.schedules:
+            attribute.scale_on_schedule(
+                schedule.name,
+                schedule=appscaling.Schedule.expression(schedule.schedule),
+                min_capacity=schedule.min_capacity,
+                max_capacity=schedule.max_capacity,
+            )
+
+
+def initial_capacity(
+    capacity: Optional[int], scaling: Optional[CapacityScalingOptions]
+) -> Optional[int]:
+    if capacity is None and scaling is not None:
+        return scaling.min_capacity
+    return capacity
+
+
+class KeyOptions(BaseModel):
+    name: str
+    type: ddb.AttributeType = ddb.AttributeType.STRING
+
+    @property
+    def attribute(self) -> ddb.Attribute:
+        return ddb.Attribute(name=self.name, type=self.type)
+
+
+class IndexOptions(BaseModel):
+    """
+    KEYS_ONLY keeps index writes and reads cheapest, INCLUDE projects only
+    `non_key_attributes`, ALL duplicates every item into the index.
+    """
+
+    index_name: str
+    sort_key: Optional[KeyOptions] = None
+    projection_type: ddb.ProjectionType = ddb.ProjectionType.KEYS_ONLY
+    non_key_attributes: Optional[List[str]] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_projection(cls, values):
+        attributes = values["non_key_attributes"]
+        if values["projection_type"] == ddb.ProjectionType.INCLUDE:
+            if not attributes:
+                raise ValueError("INCLUDE requires non_key_attributes")
+        elif attributes:
+            raise ValueError("non_key_attributes requires INCLUDE")
+        return values
+
+    @property
+    def index_kwargs(self) -> dict:
+        kwargs = {
+            "index_name": self.index_name,
+            "projection_type": self.projection_type,
+            "non_key_attributes": self.non_key_attributes,
+        }
+        if self.sort_key:
+            kwargs["sort_key"] = self.sort_key.attribute
+        return kwargs
+
+
+class GlobalIndexOptions(IndexOptions):
+    partition_key: KeyOptions
+    # PROVISIONED tables only, global indexes have their own capacity
+    read_capacity: Optional[int] = Field(None, ge=1)
+    write_capacity: Optional[int] = Field(None, ge=1)
+    read_scaling: Optional[CapacityScalingOptions] = None
+    write_scaling: Optional[CapacityScalingOptions] = None
+
+    @property
+    def provisioned(self) -> bool:
+        return any(
+            value is not None
+            for value in (
+                self.read_capacity,
+                self.write_capacity,
+                self.read_scaling,
+                self.write_scaling,
+            )
+        )
+
+    @property
+    def index_kwargs(self) -> dict:
+        return {
+            **super().index_kwargs,
+            "partition_key": self.partition_key.attribute,
+            "read_capacity": initial_capacity(
+                self.read_capacity, self.read_scaling
+            ),
+            "write_capacity": initial_capacity(
+                self.write_capacity, self.write_scaling
+            ),
+        }
+
+
+class LocalIndexOptions(IndexOptions):
+    # local indexes share the table's partition key
+    sort_key: KeyOptions
+
+
+class DaxOptions(BaseModel):
+    node_type: str = "dax.t3.small"
+    # nodes in the cluster, use 3 or more across AZs for production
+    replication_factor: int = Field(3, ge=1, le=10)
+    encryption: bool = True
+    # TLS between clients and the cluster, served on port 9111
+    transit_encryption: bool = False
+    # cache TTLs in milliseconds, DAX defaults to 5 minutes for both
+    item_ttl: Optional[int] = Field(None, ge=0)
+    query_ttl: Optional[int] = Field(None, ge=0)
+    preferred_maintenance_window: Optional[str] = None
+    # ISOLATED places the cluster in the VPC's database subnets
+    subnet_type: ec2.SubnetType = ec2.SubnetType.PRIVATE
+
+    @property
+    def port(self) -> int:
+        return 9111 if self.transit_encryption else 8111
+
+    @property
+    def parameters(self) -> Dict[str, str]:
+        parameters = {}
+        if self.item_ttl is not None:
+            parameters["record-ttl-millis"] = str(self.item_ttl)
+        if self.query_ttl is not None:
+            parameters["query-ttl-millis"] = str(self.query_ttl)
+        return parameters
+
+
+class DynamoDBOptions(BaseModel):
+    table_name: str
+    billing_mode: ddb.BillingMode = ddb.BillingMode.PAY_PER_REQUEST
+    # PROVISIONED only
+    read_capacity: Optional[int] = Field(None, ge=1)
+    write_capacity: Optional[int] = Field(None, ge=1)
+    read_scaling: Optional[CapacityScalingOptions] = None
+    write_scaling: Optional[CapacityScalingOptions] = None
+    stream: Optional[
+        ddb.StreamViewType
+    ] = ddb.StreamViewType.NEW_AND_OLD_IMAGES
+    replication_regions: Optional[List[str]] = None
+    time_to_live_attribute: Optional[str] = None
+    point_in_time_recovery: bool = False
+    removal_policy: core.RemovalPolicy = core.RemovalPolicy.RETAIN
+    global_indexes: List[GlobalIndexOptions] = Field(default_factory=list)
+    local_indexes: List[LocalIndexOptions] = Field(default_factory=list)
+    # requires a VPC, see `DynamoDB.add_dax`
+    dax: Optional[DaxOptions] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_indexes(cls, values):
+        indexes = values["global_indexes"] + values["local_indexes"]
+        if len(values["global_indexes"]) > MAX_GLOBAL_INDEXES:
+            raise ValueError(f"at most {MAX_GLOBAL_INDEXES} global indexes")
+        if len(values["local_indexes"]) > MAX_LOCAL_INDEXES:
+            raise ValueError(f"at most {MAX_LOCAL_INDEXES} local indexes")
+        names = [index.index_name for index in indexes]
+        if len(names) != len(set(names)):
+            raise ValueError("index names must be unique")
+        if values["billing_mode"] == ddb.BillingMode.PAY_PER_REQUEST:
+            capacity = [
+                values[name]
+                for name in (
+                    "read_capacity",
+                    "write_capacity",
+                    "read_scaling",
+                    "write_scaling",
+                )
+            ]
+            if any(value is not None for value in capacity) or any(
+                index.provisioned for index in values["global_indexes"]
+            ):
+                raise ValueError("capacity settings require PROVISIONED")
+        projected = {
+            attribute
+            for index in indexes
+            for attribute in index.non_key_attributes or []
+        }
+        if len(projected) > MAX_PROJECTED_ATTRIBUTES:
+            raise ValueError(
+                f"at most {MAX_PROJECTED_ATTRIBUTES} projected attributes "
+                "across all indexes"
+            )
+        return values
+
+    @property
+    def table_kwargs(self) -> dict:
+        return {
+            "table_name": self.table_name,
+            "billing_mode": self.billing_mode,
+            "read_capacity": initial_capacity(
+                self.read_capacity, self.read_scaling
+            ),
+            "write_capacity": initial_capacity(
+                self.write_capacity, self.write_scaling
+            ),
+            "read_scaling": self.read_scaling,
+            "write_scaling": self.write_scaling,
+            "stream": self.stream,
+            "replication_regions": self.replication_regions,
+            "time_to_live_attribute": self.time_to_live_attribute,
+            "point_in_time_recovery": self.point_in_time_recovery,
+            "removal_policy": self.removal_policy,
+            "global_indexes": self.global_indexes,
+            "local_indexes": self.local_indexes,
+            "dax": self.dax,
+        }
+
+
+class DynamoDB(core.Construct):
+    """
+    Table keyed on `partition_key`/`sort_key`. Other access patterns are
+    served by `global_indexes` and `local_indexes` rather than scans.
+
+    With `dax`, reads can go through a DAX cluster in the private subnets
+    of `vpc`. Open it up to clients through `connections`, e.g.
+    `service.allow_connection_to(table, ec2.Port.tcp(table.dax_port))`.
+    """
+
+    dax_cluster: Optional[dax.CfnCluster] = None
+    connections: Optional[ec2.Connections] = None
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        *,
+        table_name: str,
+        billing_mode: ddb.BillingMode = ddb.BillingMode.PAY_PER_REQUEST,
+        stream: ddb.StreamViewType = ddb.StreamViewType.NEW_AND_OLD_IMAGES,
+        replication_regions: Optional[List[str]] = None,
+        global_indexes: Optional[List[GlobalIndexOptions]] = None,
+        local_indexes: Optional[List[LocalIndexOptions]] = None,
+        read_scaling: Optional[CapacityScalingOptions] = None,
+        write_scaling: Optional[CapacityScalingOptions] = None,
+        dax: Optional[DaxOptions] = None,
+        vpc: Optional[ec2.IVpc] = None,
+        **kwargs,
+    ):
+        super().__init__(scope, id)
+        self.table = ddb.Table(
+            self,
+            "Table",
+            table_name=table_name,
+            partition_key=ddb.Attribute(
+                name="partition_key", type=ddb.AttributeType.STRING
+            ),
+            sort_key=ddb.Attribute(
+                name="sort_key", type=ddb.AttributeType.STRING
+            ),
+            billing_mode=billing_mode,
+            stream=stream,
+            replication_regions=replication_regions,
+            **kwargs,
+        )
+        for index in global_indexes or []:
+            self.table.add_global_secondary_index(**index.index_kwargs)
+        for index in local_indexes or []:
+            self.table.add_local_secondary_index(**index.index_kwargs)
+        self.setup_autoscaling(
+            read_scaling=read_scaling,
+            write_scaling=write_scaling,
+            global_indexes=global_indexes or [],
+        )
+        if dax:
+            if vpc is None:
+                raise ValueError("dax requires a vpc")
+            self.add_dax(vpc=vpc, options=dax)
+
+    @classmethod
+    def from_options(
+        cls,
+        scope: core.Construct,
+        id: str,
+        *,
+        options: DynamoDBOptions,
+        vpc: Optional[ec2.IVpc] = None,
+    ) -> "DynamoDB":
+        return cls(scope, id, vpc=vpc, **options.table_kwargs)
+
+    def setup_autoscaling(
+        self,
+        *,
+        read_scaling: Optional[CapacityScalingOptions],
+        write_scaling: Optional[CapacityScalingOptions],
+        global_indexes: List[GlobalIndexOptions],
+    ):
+        if read_scaling:
+            read_scaling.apply(
+                self.table.auto_scale_read_capacity(
+                    **read_scaling.capacity_kwargs
+                )
+            )
+        if write_scaling:
+            write_scaling.apply(
+                self.table.auto_scale_write_capacity(
+                    **write_scaling.capacity_kwargs
+                )
+            )
+        table = self.table
+        for index in global_indexes:
+            if index.read_scaling:
+                index.read_scaling.apply(
+                    table.auto_scale_global_secondary_index_read_capacity(
+                        index.index_name, **index.read_scaling.capacity_kwargs
+                    )
+                )
+            if index.write_scaling:
+                index.write_scaling.apply(
+                    table.auto_scale_global_secondary_index_write_capacity(
+                        index.index_name, **index.write_scaling.capacity_kwargs
+                    )
+                )
+
+    def add_dax(self, *, vpc: ec2.IVpc, options: DaxOptions):
+        self.dax_port = options.port
+        self.dax_transit_encryption = options.transit_encryption
+        self.dax_security_group = ec2.SecurityGroup(
+            self,
+            "DaxSecurityGroup",
+            vpc=vpc,
+            description=f"{self.node.id} DAX",
+        )
+        self.connections = ec2.Connections(
+            security_groups=[self.dax_security_group],
+            default_port=ec2.Port.tcp(options.port),
+        )
+        role = iam.Role(
+            self,
+            "DaxRole",
+            assumed_by=iam.ServicePrincipal("dax.amazonaws.com"),
+        )
+        self.table.grant_read_write_data(role)
+
+        subnet_group = dax.CfnSubnetGroup(
+            self,
+            "DaxSubnetGroup",
+            description=f"{self.node.id} DAX subnets",
+            subnet_ids=vpc.select_subnets(
+                subnet_type=options.subnet_type
+            ).subnet_ids,
+        )
+        parameter_group = None
+        if options.parameters:
+            parameter_group = dax.CfnParameterGroup(
+                self,
+                "DaxParameterGroup",
+                description=f"{self.node.id} DAX TTLs",
+                parameter_name_values=options.parameters,
+            )
+        self.dax_cluster = dax.CfnCluster(
+            self,
+            "DaxCluster",
+            node_type=options.node_type,
+            replication_factor=options.replication_factor,
+            iam_role_arn=role.role_arn,
+            subnet_group_name=subnet_group.ref,
+            security_group_ids=[self.dax_security_group.security_group_id],
+            sse_specification=dax.CfnCluster.SSESpecificationProperty(
+                sse_enabled=options.encryption
+            ),
+            parameter_group_name=(
+                parameter_group.ref if parameter_group else None
+            ),
+            preferred_maintenance_window=options.preferred_maintenance_window,
+        )
+        # not modelled by this version of aws-dax
+        self.dax_cluster.add_property_override(
+            "ClusterEndpointEncryptionType",
+            "TLS" if options.transit_encryption else "NONE",
+        )
+        # the role must be able to reach the table before DAX starts
+        self.dax_cluster.node.add_dependency(role)
+
+    @property
+    def dax_endpoint(self) -> Optional[str]:
+        if self.dax_cluster is None:
+            return None
+        if self.dax_transit_encryption:
+            return core.Token.as_string(
+                self.dax_cluster.get_att("ClusterDiscoveryEndpointURL")
+            )
+        return self.dax_cluster.attr_cluster_discovery_endpoint
+
+    @property
+    def environment(self) -> Dict[str, str]:
+        environment = {
+            "DYNAMODB_TABLE_NAME": self.table.table_name,
+            "DYNAMODB_TABLE_ARN": self.table.table_arn,
+        }
+        if self.dax_endpoint:
+            environment["DAX_ENDPOINT"] = self.dax_endpoint
+        return environment
+
+    @property
+    def policy_statements(self) -> List[iam.PolicyStatement]:
+        """
+        Data access to the table and its indexes, and through DAX when
+        it is enabled.
+        """
+        statements = [
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[f"dynamodb:{action}" for action in DATA_ACTIONS],
+                resources=[
+                    self.table.table_arn,
+                    f"{self.table.table_arn}/index/*",
+                ],
+            )
+        ]
+        if self.dax_cluster is not None:
+            statements.append(
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=[f"dax:{action}" for action in DATA_ACTIONS],
+                    resources=[self.dax_cluster.attr_arn],
+                )
+            )
+        return statements
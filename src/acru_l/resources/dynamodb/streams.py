@@ -0,0 +1,107 @@
+from typing import Optional
+
+from aws_cdk import (
+    core,
+    aws_lambda as _lambda,
+    aws_sqs as sqs,
+)
+from pydantic import BaseModel, Field, root_validator
+
+from acru_l.resources.dynamodb.layers import DynamoDBLayer
+from acru_l.resources.dynamodb.resource import DynamoDB
+from acru_l.resources.functions import FunctionWrapper
+
+
+class StreamConsumerOptions(BaseModel):
+    batch_size: int = Field(100, ge=1, le=10000)
+    # seconds to wait for a full batch
+    max_batching_window: int = Field(0, ge=0, le=300)
+    # concurrent batches per shard
+    parallelization_factor: int = Field(1, ge=1, le=10)
+    bisect_batch_on_error: bool = True
+    # -1 retries until the record expires
+    retry_attempts: int = Field(2, ge=-1, le=10000)
+    max_record_age: Optional[int] = Field(None, ge=60, le=604800)
+    starting_position: _lambda.StartingPosition = (
+        _lambda.StartingPosition.TRIM_HORIZON
+    )
+    # acrul_streams.process reports the failed batch instead of failing
+    # the whole invocation
+    report_batch_item_failures: bool = True
+    # send details of records that exhaust their retries to an SQS queue
+    on_failure_queue: bool = True
+
+    @root_validator(skip_on_failure=True)
+    def check_batching(cls, values):
+        if values["batch_size"] > 1000 and not values["max_batching_window"]:
+            raise ValueError("batch_size > 1000 requires max_batching_window")
+        return values
+
+    @property
+    def mapping_kwargs(self) -> dict:
+        kwargs = {
+            "batch_size": self.batch_size,
+            "parallelization_factor": self.parallelization_factor,
+            "bisect_batch_on_error": self.bisect_batch_on_error,
+            "retry_attempts": self.retry_attempts,
+            "starting_position": self.starting_position,
+        }
+        if self.max_batching_window:
+            kwargs["max_batching_window"] = core.Duration.seconds(
+                self.max_batching_window
+            )
+        if self.max_record_age:
+            kwargs["max_record_age"] = core.Duration.seconds(
+                self.max_record_age
+            )
+        return kwargs
+
+
+class StreamConsumer(core.Construct):
+    """
+    Invokes `function` with batches of `table`'s stream records. The
+    function gets the `acrul_streams` layer to decode them.
+    """
+
+    on_failure: Optional[sqs.Queue] = None
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        *,
+        table: DynamoDB,
+        function: FunctionWrapper,
+        options: StreamConsumerOptions,
+    ):
+        super().__init__(scope, id)
+        if table.table.table_stream_arn is None:
+            raise ValueError(f"{table.node.id} has no stream")
+        handler = function.handler
+        handler.add_layers(DynamoDBLayer.of(self).layer)
+        table.table.grant_stream_read(handler)
+
+        self.mapping = _lambda.EventSourceMapping(
+            self,
+            "Mapping",
+            target=handler,
+            event_source_arn=table.table.table_stream_arn,
+            **options.mapping_kwargs,
+        )
+        # not modelled by this version of aws-lambda
+        cfn_mapping = self.mapping.node.default_child
+        if options.report_batch_item_failures:
+            cfn_mapping.add_property_override(
+                "FunctionResponseTypes", ["ReportBatchItemFailures"]
+            )
+        if options.on_failure_queue:
+            self.on_failure = sqs.Queue(
+                self,
+                "OnFailure",
+                retention_period=core.Duration.days(14),
+            )
+            self.on_failure.grant_send_messages(handler)
+            cfn_mapping.add_property_override(
+                "DestinationConfig.OnFailure.Destination",
+                self.on_failure.queue_arn,
+            )
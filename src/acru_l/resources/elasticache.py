@@ -0,0 +1,156 @@
+from typing import Dict, Optional
+
+from aws_cdk import (
+    core,
+    aws_ec2 as ec2,
+    aws_elasticache as elasticache,
+)
+from pydantic import BaseModel, root_validator
+
+
+class RedisOptions(BaseModel):
+    node_type: str = "cache.t3.micro"
+    engine_version: str = "6.x"
+    port: int = 6379
+    # cluster mode shards the keyspace over `num_node_groups`
+    cluster_mode: bool = False
+    num_node_groups: int = 1
+    replicas_per_node_group: int = 1
+    multi_az: bool = False
+    parameter_group_name: Optional[str] = None
+    at_rest_encryption: bool = True
+    transit_encryption: bool = False
+    snapshot_retention_limit: int = 0
+    preferred_maintenance_window: Optional[str] = None
+    removal_policy: core.RemovalPolicy = core.RemovalPolicy.DESTROY
+
+    @root_validator(skip_on_failure=True)
+    def check_topology(cls, values):
+        if not values["cluster_mode"] and values["num_node_groups"] != 1:
+            raise ValueError("num_node_groups > 1 requires cluster_mode")
+        if values["multi_az"] and not values["replicas_per_node_group"]:
+            raise ValueError("multi_az requires at least one replica")
+        return values
+
+    @property
+    def automatic_failover(self) -> bool:
+        return self.cluster_mode or self.replicas_per_node_group > 0
+
+    @property
+    def num_cache_clusters(self) -> Optional[int]:
+        # without cluster mode the group is a single primary and its
+        # replicas, which CloudFormation only sizes by num_cache_clusters
+        if self.cluster_mode:
+            return None
+        return 1 + self.replicas_per_node_group
+
+    @property
+    def cache_parameter_group_name(self) -> Optional[str]:
+        if self.parameter_group_name or not self.cluster_mode:
+            return self.parameter_group_name
+        major_version = self.engine_version.split(".")[0]
+        return f"default.redis{major_version}.x.cluster.on"
+
+
+class RedisCluster(core.Construct):
+    """
+    Redis replication group in the private subnets of `vpc`.
+
+    Nothing can reach it until it is opened up through `connections`,
+    e.g. `service.allow_connection_to(redis, ec2.Port.tcp(redis.port))`.
+    """
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        *,
+        vpc: ec2.IVpc,
+        options: RedisOptions,
+    ):
+        super().__init__(scope, id)
+        self.port = options.port
+        self.cluster_mode = options.cluster_mode
+        self.transit_encryption = options.transit_encryption
+
+        self.security_group = ec2.SecurityGroup(
+            self,
+            "SecurityGroup",
+            vpc=vpc,
+            description=f"{id} Redis",
+        )
+        self.connections = ec2.Connections(
+            security_groups=[self.security_group],
+            default_port=ec2.Port.tcp(options.port),
+        )
+
+        self.subnet_group = elasticache.CfnSubnetGroup(
+            self,
+            "SubnetGroup",
+            description=f"{id} Redis subnets",
+            subnet_ids=vpc.select_subnets(
+                subnet_type=ec2.SubnetType.PRIVATE
+            ).subnet_ids,
+        )
+
+        self.replication_group = elasticache.CfnReplicationGroup(
+            self,
+            "ReplicationGroup",
+            replication_group_description=f"{id} Redis",
+            engine="redis",
+            engine_version=options.engine_version,
+            cache_node_type=options.node_type,
+            port=options.port,
+            num_cache_clusters=options.num_cache_clusters,
+            num_node_groups=(
+                options.num_node_groups if self.cluster_mode else None
+            ),
+            replicas_per_node_group=(
+                options.replicas_per_node_group if self.cluster_mode else None
+            ),
+            automatic_failover_enabled=options.automatic_failover,
+            multi_az_enabled=options.multi_az,
+            cache_subnet_group_name=self.subnet_group.ref,
+            security_group_ids=[self.security_group.security_group_id],
+            at_rest_encryption_enabled=options.at_rest_encryption,
+            transit_encryption_enabled=options.transit_encryption,
+            snapshot_retention_limit=options.snapshot_retention_limit,
+            cache_parameter_group_name=options.cache_parameter_group_name,
+            preferred_maintenance_window=options.preferred_maintenance_window,
+        )
+        self.replication_group.apply_removal_policy(options.removal_policy)
+
+    @property
+    def endpoint_address(self) -> str:
+        if self.cluster_mode:
+            return self.replication_group.attr_configuration_end_point_address
+        return self.replication_group.attr_primary_end_point_address
+
+    @property
+    def endpoint_port(self) -> str:
+        if self.cluster_mode:
+            return self.replication_group.attr_configuration_end_point_port
+        return self.replication_group.attr_primary_end_point_port
+
+    @property
+    def reader_endpoint_address(self) -> Optional[str]:
+        if self.cluster_mode:
+            return None
+        return self.replication_group.attr_reader_end_point_address
+
+    @property
+    def url(self) -> str:
+        scheme = "rediss" if self.transit_encryption else "redis"
+        return f"{scheme}://{self.endpoint_address}:{self.endpoint_port}/0"
+
+    @property
+    def environment(self) -> Dict[str, str]:
+        environment = {
+            "REDIS_HOST": self.endpoint_address,
+            "REDIS_PORT": self.endpoint_port,
+            "REDIS_URL": self.url,
+            "REDIS_CLUSTER_MODE": str(self.cluster_mode).lower(),
+        }
+        if self.reader_endpoint_address:
+            environment["REDIS_READER_HOST"] = self.reader_endpoint_address
+        return environment
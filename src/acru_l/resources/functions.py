@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from aws_cdk import (
     core,
@@ -9,6 +9,83 @@ from aws_cdk import (
     aws_logs as logs,
     aws_s3 as s3,
 )
+from pydantic import BaseModel, Field
+
+from acru_l.resources.secrets import SecretsLayer
+
+PROFILES_CONTEXT_KEY = "acrul:profiles"
+DEFAULT_PROFILE = "default"
+
+
+class FunctionProfile(BaseModel):
+    """
+    Performance settings for a Lambda function. Profiles are declared by
+    name under `profiles` in acru-l.toml and referenced from the options
+    of the functions that use them. Unset fields keep the function's own
+    defaults.
+
+    A profile named "default" applies to every function that does not
+    reference one. Settings passed explicitly to a function take
+    precedence over its profile, see `apply_profile`.
+    """
+
+    memory_size: Optional[int] = Field(None, ge=128, le=10240)
+    timeout: Optional[int] = Field(None, ge=1, le=900)
+    reserved_concurrent_executions: Optional[int] = Field(None, ge=0)
+    # size of /tmp in MiB
+    ephemeral_storage_size: Optional[int] = Field(None, ge=512, le=10240)
+    tracing: Optional[_lambda.Tracing] = None
+    profiling: Optional[bool] = None
+    log_retention: Optional[logs.RetentionDays] = None
+
+    @property
+    def function_kwargs(self) -> Dict[str, Any]:
+        kwargs = self.dict(exclude_none=True)
+        if "timeout" in kwargs:
+            kwargs["timeout"] = core.Duration.seconds(kwargs["timeout"])
+        return kwargs
+
+    @classmethod
+    def resolve(
+        cls,
+        scope: core.Construct,
+        profile: Optional[Union[str, "FunctionProfile"]] = None,
+    ) -> Optional["FunctionProfile"]:
+        """
+        Looks up a profile by name in the app context, falling back to
+        the "default" profile when no name is given.
+        """
+        if isinstance(profile, FunctionProfile):
+            return profile
+        profiles = scope.node.try_get_context(PROFILES_CONTEXT_KEY) or {}
+        name = profile or DEFAULT_PROFILE
+        if name in profiles:
+            return cls(**profiles[name])
+        if profile:
+            raise ValueError(f"Unknown function profile: {profile}")
+        return None
+
+
+def apply_profile(
+    scope: core.Construct,
+    profile: Optional[Union[str, FunctionProfile]],
+    settings: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    The function settings of `profile`, or of the "default" profile when
+    none is given, with the explicit `settings` applied on top.
+    """
+    profile = FunctionProfile.resolve(scope, profile)
+    if profile is None:
+        return settings
+    return {**profile.function_kwargs, **settings}
+
+
+def set_ephemeral_storage(function: _lambda.Function, size: Optional[int]):
+    # not modelled by this version of aws-lambda
+    if size:
+        cfn_function = function.node.default_child
+        cfn_function.add_property_override("EphemeralStorage.Size", size)
 
 
 class FunctionWrapper(core.Construct):
@@ -20,11 +97,34 @@ class FunctionWrapper(core.Construct):
         private_bucket: Optional[s3.Bucket] = None,
         secret_arns: Optional[List] = None,
         policy_statements: Optional[List[iam.PolicyStatement]] = None,
+        prefetch_secrets: bool = True,
+        secrets_ttl: int = 300,
     ):
         super().__init__(scope, id)
         self.secret_arns = secret_arns
         self.policy_statements = policy_statements or []
         self.private_bucket = private_bucket
+        self.prefetch_secrets = prefetch_secrets
+        self.secrets_ttl = secrets_ttl
+
+    def setup_secrets_layer(
+        self,
+        layers: List[_lambda.ILayerVersion],
+        environment_variables: Optional[dict],
+    ):
+        """
+        Adds the acrul_secrets layer and the ARNs it prefetches when the
+        function has secrets.
+        """
+        layers = list(layers or [])
+        environment_variables = dict(environment_variables or {})
+        if self.secret_arns and self.prefetch_secrets:
+            layers.append(SecretsLayer.of(self).layer)
+            environment_variables["ACRUL_SECRET_ARNS"] = ",".join(
+                self.secret_arns
+            )
+            environment_variables["ACRUL_SECRETS_TTL"] = str(self.secrets_ttl)
+        return layers, environment_variables
 
     def setup_function_perms(self):
         if self.secret_arns:
@@ -75,9 +175,14 @@ class Function(FunctionWrapper):
         log_retention: logs.RetentionDays = logs.RetentionDays.ONE_DAY,
         profiling: bool = False,
         tracing: Optional[_lambda.Tracing] = None,
+        reserved_concurrent_executions: Optional[int] = None,
+        ephemeral_storage_size: Optional[int] = None,
         **kwargs,
     ):
         super().__init__(scope, id, **kwargs)
+        layers, environment_variables = self.setup_secrets_layer(
+            layers, environment_variables
+        )
         self.handler = _lambda.Function(
             self,
             "Handler",
@@ -92,7 +197,9 @@ class Function(FunctionWrapper):
             log_retention=log_retention,
             tracing=tracing,
             profiling=profiling,
+            reserved_concurrent_executions=reserved_concurrent_executions,
         )
+        set_ephemeral_storage(self.handler, ephemeral_storage_size)
         self.setup_function_perms()
 
 
@@ -114,9 +221,14 @@ class PythonFunction(FunctionWrapper):
         log_retention: logs.RetentionDays = logs.RetentionDays.ONE_DAY,
         profiling: bool = False,
         tracing: Optional[_lambda.Tracing] = None,
+        reserved_concurrent_executions: Optional[int] = None,
+        ephemeral_storage_size: Optional[int] = None,
         **kwargs,
     ):
         super().__init__(scope, id, **kwargs)
+        layers, environment_variables = self.setup_secrets_layer(
+            layers, environment_variables
+        )
         self.handler = lambda_python.PythonFunction(
             self,
             "Handler",
@@ -132,5 +244,7 @@ class PythonFunction(FunctionWrapper):
             log_retention=log_retention,
             tracing=tracing,
             profiling=profiling,
+            reserved_concurrent_executions=reserved_concurrent_executions,
         )
+        set_ephemeral_storage(self.handler, ephemeral_storage_size)
         self.setup_function_perms()
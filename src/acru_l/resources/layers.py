@@ -0,0 +1,40 @@
+from aws_cdk import (
+    core,
+    aws_lambda as _lambda,
+)
+
+
+class SharedLayer(core.Construct):
+    """
+    Lambda layer with acru-l runtime modules, shared by every function
+    in a stack, see `SharedLayer.of`.
+
+    Subclasses set the stack level construct `layer_id`, the directory
+    of the layer's code `asset_path` and its `description`.
+    """
+
+    layer_id: str
+    asset_path: str
+    description: str
+
+    def __init__(self, scope: core.Construct, id: str):
+        super().__init__(scope, id)
+        self.layer = _lambda.LayerVersion(
+            self,
+            "Layer",
+            code=_lambda.Code.from_asset(self.asset_path),
+            compatible_runtimes=[
+                _lambda.Runtime.PYTHON_3_6,
+                _lambda.Runtime.PYTHON_3_7,
+                _lambda.Runtime.PYTHON_3_8,
+            ],
+            description=self.description,
+        )
+
+    @classmethod
+    def of(cls, scope: core.Construct):
+        stack = core.Stack.of(scope)
+        existing = stack.node.try_find_child(cls.layer_id)
+        if existing is not None:
+            return existing
+        return cls(stack, cls.layer_id)
@@ -0,0 +1,179 @@
+import weakref
+from typing import Dict, List, Optional
+
+from aws_cdk import (
+    core,
+    aws_ec2 as ec2,
+    aws_route53 as route53,
+)
+from pydantic import BaseModel, Field, root_validator
+
+LOOKUPS_CONTEXT_KEY = "acrul:lookups"
+
+
+class VpcLookup(BaseModel):
+    """
+    A VPC described by its attributes, or by the `export_name` of a VPC
+    created by `acru_l.resources.vpc.VPC` in `availability_zones`, which
+    must list as many AZs as that VPC spans.
+    """
+
+    availability_zones: List[str]
+    vpc_id: Optional[str] = None
+    vpc_cidr_block: Optional[str] = None
+    public_subnet_ids: Optional[List[str]] = None
+    private_subnet_ids: Optional[List[str]] = None
+    isolated_subnet_ids: Optional[List[str]] = None
+    export_name: Optional[str] = None
+    # import the isolated subnets of a VPC with `database_mask`
+    database_subnets: bool = False
+
+    @root_validator(skip_on_failure=True)
+    def check_source(cls, values):
+        if bool(values["vpc_id"]) == bool(values["export_name"]):
+            raise ValueError("set either vpc_id or export_name")
+        count = len(values["availability_zones"])
+        for name in (
+            "public_subnet_ids",
+            "private_subnet_ids",
+            "isolated_subnet_ids",
+        ):
+            if values[name] and len(values[name]) % count:
+                raise ValueError(
+                    f"{name} must have a multiple of {count} subnets"
+                )
+        return values
+
+    @property
+    def attributes(self) -> dict:
+        if not self.export_name:
+            return self.dict(
+                exclude={"export_name", "database_subnets"}, exclude_none=True
+            )
+        attributes = {
+            "availability_zones": self.availability_zones,
+            # keyed on the AZ count, so a lookup that disagrees with the
+            # exporting VPC fails to deploy instead of dropping subnets
+            "vpc_id": core.Fn.import_value(
+                zoned_export_name(
+                    self.export_name, len(self.availability_zones)
+                )
+            ),
+            "vpc_cidr_block": core.Fn.import_value(
+                cidr_export_name(self.export_name)
+            ),
+            "public_subnet_ids": self.imported_subnets("Public"),
+            "private_subnet_ids": self.imported_subnets("Private"),
+        }
+        if self.database_subnets:
+            attributes["isolated_subnet_ids"] = self.imported_subnets(
+                "Database"
+            )
+        return attributes
+
+    def imported_subnets(self, name: str) -> List[str]:
+        return [
+            core.Fn.import_value(subnet_export_name(self.export_name, name, i))
+            for i in range(len(self.availability_zones))
+        ]
+
+
+class HostedZoneLookup(BaseModel):
+    hosted_zone_id: Optional[str] = None
+    # export of a zone created by `acru_l.resources.hosted_zone.HostedZone`
+    export_name: Optional[str] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_source(cls, values):
+        if bool(values["hosted_zone_id"]) == bool(values["export_name"]):
+            raise ValueError("set either hosted_zone_id or export_name")
+        return values
+
+    @property
+    def zone_id(self) -> str:
+        if self.export_name:
+            return core.Fn.import_value(self.export_name)
+        return self.hosted_zone_id
+
+
+class LookupCache(BaseModel):
+    """
+    Pre-resolved lookups, declared once under `lookups` in acru-l.toml and
+    shared by every stack. VPCs are keyed by name, zones by domain name.
+    """
+
+    vpcs: Dict[str, VpcLookup] = Field(default_factory=dict)
+    hosted_zones: Dict[str, HostedZoneLookup] = Field(default_factory=dict)
+
+
+def cidr_export_name(export_name: str) -> str:
+    return f"{export_name}-Cidr"
+
+
+def zoned_export_name(export_name: str, az_count: int) -> str:
+    return f"{export_name}-{az_count}AZ"
+
+
+def subnet_export_name(export_name: str, name: str, index: int) -> str:
+    return f"{export_name}-{name}Subnet{index}"
+
+
+_caches: "weakref.WeakKeyDictionary[core.IConstruct, LookupCache]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def lookup_cache(scope: core.Construct) -> LookupCache:
+    """
+    Parses the cache from the app context once per app.
+    """
+    app = scope.node.root
+    cache = _caches.get(app)
+    if cache is None:
+        data = scope.node.try_get_context(LOOKUPS_CONTEXT_KEY) or {}
+        cache = _caches[app] = LookupCache(**data)
+    return cache
+
+
+def lookup_vpc(scope: core.Construct, vpc_name: str) -> ec2.IVpc:
+    """
+    Resolves `vpc_name` from the lookup cache, falling back to a context
+    lookup. The result is shared by every caller in the same stack.
+    """
+    stack = core.Stack.of(scope)
+    construct_id = f"VpcLookup{vpc_name}"
+    existing = stack.node.try_find_child(construct_id)
+    if existing is not None:
+        return existing
+    cached = lookup_cache(scope).vpcs.get(vpc_name)
+    if cached is not None:
+        return ec2.Vpc.from_vpc_attributes(
+            stack, construct_id, **cached.attributes
+        )
+    return ec2.Vpc.from_lookup(stack, construct_id, vpc_name=vpc_name)
+
+
+def lookup_hosted_zone(
+    scope: core.Construct, domain_name: str
+) -> route53.IHostedZone:
+    """
+    Resolves `domain_name` from the lookup cache, falling back to a
+    context lookup. The result is shared by every caller in the same
+    stack.
+    """
+    stack = core.Stack.of(scope)
+    construct_id = f"HostedZoneLookup{domain_name}"
+    existing = stack.node.try_find_child(construct_id)
+    if existing is not None:
+        return existing
+    cached = lookup_cache(scope).hosted_zones.get(domain_name)
+    if cached is not None:
+        return route53.HostedZone.from_hosted_zone_attributes(
+            stack,
+            construct_id,
+            hosted_zone_id=cached.zone_id,
+            zone_name=domain_name,
+        )
+    return route53.HostedZone.from_lookup(
+        stack, construct_id, domain_name=domain_name
+    )
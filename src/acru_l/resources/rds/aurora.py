@@ -0,0 +1,343 @@
+import json
+import re
+from typing import Dict, List, Literal, Optional
+
+from aws_cdk import (
+    core,
+    aws_applicationautoscaling as appscaling,
+    aws_cloudwatch as cloudwatch,
+    aws_ec2 as ec2,
+    aws_logs as logs,
+    aws_rds as rds,
+    aws_secretsmanager as secretsmanager,
+)
+from pydantic import BaseModel, Field, root_validator, validator
+
+from acru_l.resources.rds.instances import ProxyOptions, SlowQueryLogOptions
+from acru_l.resources.rds.parameters import (
+    ParameterGroupOptions,
+    instance_memory,
+)
+
+READER_METRICS = {
+    "cpu": appscaling.PredefinedMetric.RDS_READER_AVERAGE_CPU_UTILIZATION,
+    "connections": appscaling.PredefinedMetric.RDS_READER_AVERAGE_DATABASE_CONNECTIONS,  # noqa: E501
+}
+
+
+class ReaderScalingOptions(BaseModel):
+    # Aurora supports up to 15 replicas
+    min_capacity: int = Field(1, ge=1, le=15)
+    max_capacity: int = Field(3, ge=1, le=15)
+    metric: Literal["cpu", "connections"] = "cpu"
+    # average reader CPU percent or connection count
+    target_value: float = 70
+    scale_in_cooldown: int = 300
+    scale_out_cooldown: int = 300
+
+    @root_validator(skip_on_failure=True)
+    def check_capacity(cls, values):
+        if values["min_capacity"] > values["max_capacity"]:
+            raise ValueError("min_capacity cannot exceed max_capacity")
+        return values
+
+
+class AuroraClusterOptions(BaseModel):
+    db_name: str
+    db_username: str
+    engine_version: str = "11.8"
+    instance_class: str = "BURSTABLE3"
+    instance_size: str = "MEDIUM"
+    # reader instances created with the cluster, autoscaling adds more
+    readers: int = Field(1, ge=0, le=15)
+    reader_scaling: Optional[ReaderScalingOptions] = None
+    port: int = 5432
+    deletion_protection: bool = False
+    removal_policy: core.RemovalPolicy = core.RemovalPolicy.DESTROY
+    storage_encrypted: bool = True
+    backup_retention: int = 1
+    monitoring_interval: int = 60
+    enable_performance_insights: bool = True
+    cloudwatch_logs_retention: logs.RetentionDays = (
+        logs.RetentionDays.ONE_MONTH
+    )
+    auto_minor_version_upgrade: bool = True
+    parameter_group: Optional[ParameterGroupOptions] = None
+    slow_query_log: Optional[SlowQueryLogOptions] = None
+    proxy: Optional[ProxyOptions] = None
+    # ISOLATED places the instances in the VPC's database subnets
+    subnet_type: ec2.SubnetType = ec2.SubnetType.PRIVATE
+    setup_alarms: bool = False
+    max_replica_lag: int = 1000  # milliseconds
+
+    @validator("engine_version")
+    def check_engine_version(cls, value):
+        if not re.fullmatch(r"\d+(\.\d+){1,2}", value):
+            raise ValueError("expected a full version, e.g. 11.8")
+        return value
+
+    @root_validator(skip_on_failure=True)
+    def check_readers(cls, values):
+        scaling = values["reader_scaling"]
+        if scaling and values["readers"] < 1:
+            raise ValueError("reader_scaling requires at least one reader")
+        parameter_group = values["parameter_group"]
+        if parameter_group:
+            parameter_group.build(
+                instance_memory(
+                    values["instance_class"], values["instance_size"]
+                ),
+                aurora=True,
+            )
+        return values
+
+    @property
+    def instance_type(self) -> ec2.InstanceType:
+        return ec2.InstanceType.of(
+            getattr(ec2.InstanceClass, self.instance_class),
+            getattr(ec2.InstanceSize, self.instance_size),
+        )
+
+    @property
+    def parameters(self) -> Dict[str, str]:
+        parameters = {}
+        if self.slow_query_log:
+            parameters.update(self.slow_query_log.parameters)
+        if self.parameter_group:
+            memory = instance_memory(self.instance_class, self.instance_size)
+            parameters.update(self.parameter_group.build(memory, aurora=True))
+        return parameters
+
+    @property
+    def engine(self) -> rds.IClusterEngine:
+        major = self.engine_version.split(".")[0]
+        if int(major) < 10:
+            major = ".".join(self.engine_version.split(".")[:2])
+        return rds.DatabaseClusterEngine.aurora_postgres(
+            version=rds.AuroraPostgresEngineVersion.of(
+                self.engine_version, major
+            )
+        )
+
+
+class AuroraPostgresCluster(core.Construct):
+    """
+    Provisioned Aurora Postgres cluster with one writer and `readers`
+    reader instances, optionally autoscaled.
+
+    Exposes the same endpoint attributes as `RDSInstance`, with the
+    cluster reader endpoint in `reader_endpoint_addresses`.
+    """
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        *,
+        vpc: ec2.Vpc,
+        options: AuroraClusterOptions,
+    ):
+        super().__init__(scope, id)
+        self.db_name = options.db_name
+        self.db_username = options.db_username
+        self.port = options.port
+
+        sg_rds = ec2.SecurityGroup(self, "SecurityGroup", vpc=vpc)
+        sg_rds.add_ingress_rule(
+            peer=ec2.Peer.ipv4(vpc.vpc_cidr_block),
+            connection=ec2.Port.tcp(options.port),
+        )
+        self.creds = secretsmanager.Secret(
+            self,
+            "Credentials",
+            generate_secret_string=secretsmanager.SecretStringGenerator(
+                exclude_punctuation=True,
+                include_space=False,
+                generate_string_key="password",
+                secret_string_template=json.dumps(
+                    {"username": options.db_username}
+                ),
+            ),
+        )
+
+        engine = options.engine
+        self.parameter_group = None
+        if options.parameters:
+            self.parameter_group = rds.ParameterGroup(
+                self,
+                "ParameterGroup",
+                engine=engine,
+                description=options.parameter_group.description
+                if options.parameter_group
+                else None,
+                parameters=options.parameters,
+            )
+
+        self.cluster = rds.DatabaseCluster(
+            self,
+            "Cluster",
+            engine=engine,
+            instances=1 + options.readers,
+            instance_props=rds.InstanceProps(
+                vpc=vpc,
+                vpc_subnets=ec2.SubnetSelection(
+                    subnet_type=options.subnet_type
+                ),
+                instance_type=options.instance_type,
+                security_groups=[sg_rds],
+                parameter_group=self.parameter_group,
+                enable_performance_insights=(
+                    options.enable_performance_insights
+                ),
+                auto_minor_version_upgrade=options.auto_minor_version_upgrade,
+            ),
+            credentials=rds.Credentials.from_password(
+                username=options.db_username,
+                password=self.creds.secret_value_from_json("password"),
+            ),
+            default_database_name=options.db_name,
+            port=options.port,
+            backup=rds.BackupProps(
+                retention=core.Duration.days(options.backup_retention)
+            ),
+            storage_encrypted=options.storage_encrypted,
+            deletion_protection=options.deletion_protection,
+            removal_policy=options.removal_policy,
+            monitoring_interval=core.Duration.seconds(
+                options.monitoring_interval
+            ),
+            cloudwatch_logs_exports=["postgresql"]
+            if options.slow_query_log
+            else None,
+            cloudwatch_logs_retention=options.cloudwatch_logs_retention,
+        )
+
+        self.proxy = None
+        self.proxy_reader_endpoint = None
+        if options.proxy:
+            self.add_proxy(
+                vpc=vpc, security_group=sg_rds, options=options.proxy
+            )
+
+        if options.reader_scaling:
+            self.setup_reader_scaling(options=options.reader_scaling)
+
+        if options.setup_alarms:
+            self.setup_alarms(max_replica_lag=options.max_replica_lag)
+
+    def add_proxy(
+        self,
+        *,
+        vpc: ec2.Vpc,
+        security_group: ec2.SecurityGroup,
+        options: ProxyOptions,
+    ):
+        stack = core.Stack.of(self)
+        self.proxy = self.cluster.add_proxy(
+            "Proxy",
+            secrets=[self.creds],
+            vpc=vpc,
+            db_proxy_name=f"{stack.stack_name}-{self.node.id}-Proxy",
+            security_groups=[security_group],
+            **options.proxy_kwargs,
+        )
+        if options.reader_endpoint:
+            # not modelled by this version of aws-rds
+            endpoint = core.CfnResource(
+                self,
+                "ProxyReaderEndpoint",
+                type="AWS::RDS::DBProxyEndpoint",
+                properties={
+                    "DBProxyEndpointName": f"{self.node.id}-read-only",
+                    "DBProxyName": self.proxy.db_proxy_name,
+                    "TargetRole": "READ_ONLY",
+                    "VpcSecurityGroupIds": [security_group.security_group_id],
+                    "VpcSubnetIds": vpc.select_subnets(
+                        subnet_type=ec2.SubnetType.PRIVATE
+                    ).subnet_ids,
+                },
+            )
+            self.proxy_reader_endpoint = core.Token.as_string(
+                endpoint.get_att("Endpoint")
+            )
+
+    def setup_reader_scaling(self, *, options: ReaderScalingOptions):
+        target = appscaling.ScalableTarget(
+            self,
+            "ReaderScaling",
+            service_namespace=appscaling.ServiceNamespace.RDS,
+            scalable_dimension="rds:cluster:ReadReplicaCount",
+            resource_id=f"cluster:{self.cluster.cluster_identifier}",
+            min_capacity=options.min_capacity,
+            max_capacity=options.max_capacity,
+        )
+        target.scale_to_track_metric(
+            "ReaderTracking",
+            target_value=options.target_value,
+            predefined_metric=READER_METRICS[options.metric],
+            scale_in_cooldown=core.Duration.seconds(options.scale_in_cooldown),
+            scale_out_cooldown=core.Duration.seconds(
+                options.scale_out_cooldown
+            ),
+        )
+
+    @property
+    def connection_interface(self):
+        return self.proxy or self.cluster
+
+    @property
+    def vpc(self) -> ec2.Vpc:
+        return self.cluster.vpc
+
+    @property
+    def endpoint_port(self) -> str:
+        return core.Token.as_string(self.cluster.cluster_endpoint.port)
+
+    @property
+    def endpoint_address(self) -> str:
+        if self.proxy:
+            return self.proxy.endpoint
+        return self.cluster.cluster_endpoint.hostname
+
+    @property
+    def reader_endpoint_addresses(self) -> List[str]:
+        if self.proxy_reader_endpoint:
+            return [self.proxy_reader_endpoint]
+        return [self.cluster.cluster_read_endpoint.hostname]
+
+    def setup_alarms(self, *, max_replica_lag: int):
+        cloudwatch.Alarm(
+            self,
+            "HighCPU",
+            metric=self.cluster.metric_cpu_utilization(
+                unit=cloudwatch.Unit.PERCENT
+            ),
+            statistic="Average",
+            threshold=80,
+            evaluation_periods=2,
+            period=core.Duration.minutes(5),
+        )
+        cloudwatch.Alarm(
+            self,
+            "LowFreeMemory",
+            metric=self.cluster.metric_freeable_memory(
+                unit=cloudwatch.Unit.BYTES
+            ),
+            threshold=104857600,  # 100MB
+            evaluation_periods=2,
+            period=core.Duration.minutes(5),
+            statistic="Average",
+            comparison_operator=cloudwatch.ComparisonOperator.LESS_THAN_OR_EQUAL_TO_THRESHOLD,  # noqa: E501
+        )
+        cloudwatch.Alarm(
+            self,
+            "HighReplicaLag",
+            metric=self.cluster.metric(
+                "AuroraReplicaLagMaximum", unit=cloudwatch.Unit.MILLISECONDS
+            ),
+            statistic="Maximum",
+            threshold=max_replica_lag,
+            evaluation_periods=2,
+            period=core.Duration.minutes(5),
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
@@ -0,0 +1 @@
+from .resource import DataAPILayer  # noqa: F401
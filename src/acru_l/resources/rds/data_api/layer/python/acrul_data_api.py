@@ -0,0 +1,299 @@
+"""
+Aurora Serverless Data API (rds-data) helpers for acru-l functions.
+
+Statements run over HTTPS, so functions do not hold Postgres
+connections. The cluster, secret and database default to
+DATA_API_RESOURCE_ARN, DATA_API_SECRET_ARN and DATA_API_DATABASE, which
+`PostgresCluster.grant_data_api` sets.
+
+Usage:
+    from acrul_data_api import DataAPI
+
+    db = DataAPI()
+    with db.transaction():
+        db.batch_execute(
+            "INSERT INTO events (id, payload) VALUES (:id, :payload)",
+            [{"id": e.id, "payload": e.payload} for e in events],
+        )
+    for row in db.stream("SELECT * FROM events ORDER BY id"):
+        ...
+"""
+import datetime
+import decimal
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# the Data API rejects requests above 4MB
+MAX_REQUEST_BYTES = 3 * 1024 * 1024
+DEFAULT_BATCH_SIZE = 500
+# the cluster is resuming from auto pause
+RESUMING_ERRORS = ("Communications link failure", "is resuming after")
+
+
+def format_timestamp(value: datetime.datetime) -> str:
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc)
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+# checked in order, bool is an int and datetime is a date
+SCALAR_FIELDS = (
+    (bool, "booleanValue", bool),
+    (int, "longValue", int),
+    (float, "doubleValue", float),
+    ((bytes, bytearray), "blobValue", bytes),
+)
+TYPED_FIELDS = (
+    (decimal.Decimal, "DECIMAL", str),
+    (datetime.datetime, "TIMESTAMP", format_timestamp),
+    (datetime.date, "DATE", datetime.date.isoformat),
+    (datetime.time, "TIME", datetime.time.isoformat),
+    (uuid.UUID, "UUID", str),
+    ((dict, list), "JSON", json.dumps),
+)
+
+
+def to_field(value: Any) -> Dict[str, Any]:
+    """
+    Marshals a Python value into a Data API `Field` and optional
+    type hint.
+    """
+    if value is None:
+        return {"value": {"isNull": True}}
+    for types, key, convert in SCALAR_FIELDS:
+        if isinstance(value, types):
+            return {"value": {key: convert(value)}}
+    for types, type_hint, convert in TYPED_FIELDS:
+        if isinstance(value, types):
+            return {
+                "value": {"stringValue": convert(value)},
+                "typeHint": type_hint,
+            }
+    return {"value": {"stringValue": str(value)}}
+
+
+def to_parameters(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"name": name, **to_field(value)} for name, value in values.items()
+    ]
+
+
+def from_field(field: Dict[str, Any]) -> Any:
+    if field.get("isNull"):
+        return None
+    if "arrayValue" in field:
+        return from_array(field["arrayValue"])
+    for key in (
+        "stringValue",
+        "longValue",
+        "doubleValue",
+        "booleanValue",
+        "blobValue",
+    ):
+        if key in field:
+            return field[key]
+    return None
+
+
+def from_array(array: Dict[str, Any]) -> List[Any]:
+    if "arrayValues" in array:
+        return [from_array(item) for item in array["arrayValues"]]
+    for values in array.values():
+        return list(values)
+    return []
+
+
+def batches(
+    parameter_sets: Iterable[List[Dict[str, Any]]],
+    batch_size: int,
+    max_bytes: int = MAX_REQUEST_BYTES,
+) -> Iterator[List[List[Dict[str, Any]]]]:
+    """
+    Groups parameter sets by count and approximate request size.
+    """
+    batch: List[List[Dict[str, Any]]] = []
+    size = 0
+    for parameters in parameter_sets:
+        parameters_size = len(json.dumps(parameters, default=str))
+        if batch and (
+            len(batch) >= batch_size or size + parameters_size > max_bytes
+        ):
+            yield batch
+            batch, size = [], 0
+        batch.append(parameters)
+        size += parameters_size
+    if batch:
+        yield batch
+
+
+class DataAPI:
+    def __init__(
+        self,
+        *,
+        resource_arn: Optional[str] = None,
+        secret_arn: Optional[str] = None,
+        database: Optional[str] = None,
+        client=None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        resume_retries: int = 5,
+        sleep=time.sleep,
+    ):
+        self.resource_arn = resource_arn or os.environ["DATA_API_RESOURCE_ARN"]
+        self.secret_arn = secret_arn or os.environ["DATA_API_SECRET_ARN"]
+        self.database = database or os.environ.get("DATA_API_DATABASE")
+        self.batch_size = batch_size
+        self.resume_retries = resume_retries
+        self.sleep = sleep
+        self._client = client
+        self.transaction_id: Optional[str] = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client("rds-data")
+        return self._client
+
+    def _request(self, **kwargs) -> Dict[str, Any]:
+        request = {
+            "resourceArn": self.resource_arn,
+            "secretArn": self.secret_arn,
+            **kwargs,
+        }
+        if self.database:
+            request["database"] = self.database
+        if self.transaction_id:
+            request["transactionId"] = self.transaction_id
+        return request
+
+    def _call(self, method: str, **kwargs) -> Dict[str, Any]:
+        attempt = 0
+        while True:
+            try:
+                return getattr(self.client, method)(**kwargs)
+            except Exception as error:
+                resuming = any(text in str(error) for text in RESUMING_ERRORS)
+                if not resuming or attempt >= self.resume_retries:
+                    raise
+                self.sleep(min(2 ** attempt, 10))
+                attempt += 1
+
+    @contextmanager
+    def transaction(self):
+        """
+        Runs the statements in the block in one transaction. Nested blocks
+        reuse the outer transaction.
+        """
+        if self.transaction_id:
+            yield self.transaction_id
+            return
+        request = {
+            "resourceArn": self.resource_arn,
+            "secretArn": self.secret_arn,
+        }
+        if self.database:
+            request["database"] = self.database
+        response = self._call("begin_transaction", **request)
+        self.transaction_id = response["transactionId"]
+        try:
+            yield self.transaction_id
+        except BaseException:
+            transaction_id, self.transaction_id = self.transaction_id, None
+            self._call(
+                "rollback_transaction",
+                resourceArn=self.resource_arn,
+                secretArn=self.secret_arn,
+                transactionId=transaction_id,
+            )
+            raise
+        transaction_id, self.transaction_id = self.transaction_id, None
+        self._call(
+            "commit_transaction",
+            resourceArn=self.resource_arn,
+            secretArn=self.secret_arn,
+            transactionId=transaction_id,
+        )
+
+    def execute(
+        self, sql: str, parameters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        return self._call(
+            "execute_statement",
+            **self._request(
+                sql=sql,
+                parameters=to_parameters(parameters or {}),
+                includeResultMetadata=True,
+            ),
+        )
+
+    def query(
+        self, sql: str, parameters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the rows as dicts keyed by column name.
+        """
+        response = self.execute(sql, parameters)
+        columns = [
+            column["name"] for column in response.get("columnMetadata", [])
+        ]
+        return [
+            dict(zip(columns, [from_field(field) for field in record]))
+            for record in response.get("records", [])
+        ]
+
+    def stream(
+        self,
+        sql: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        *,
+        page_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yields rows page by page with LIMIT/OFFSET, keeping each response
+        under the Data API's 1MB result limit. `sql` needs a stable
+        ORDER BY.
+        """
+        offset = 0
+        while True:
+            page = self.query(
+                f"{sql} LIMIT :_page_size OFFSET :_page_offset",
+                {
+                    **(parameters or {}),
+                    "_page_size": page_size,
+                    "_page_offset": offset,
+                },
+            )
+            yield from page
+            if len(page) < page_size:
+                return
+            offset += page_size
+
+    def batch_execute(
+        self,
+        sql: str,
+        parameter_sets: Iterable[Dict[str, Any]],
+        *,
+        batch_size: Optional[int] = None,
+    ) -> int:
+        """
+        Runs `sql` once per parameter set, in as few calls as the Data
+        API limits allow, inside one transaction. Returns the number of
+        parameter sets.
+        """
+        count = 0
+        with self.transaction():
+            for batch in batches(
+                (to_parameters(values) for values in parameter_sets),
+                batch_size or self.batch_size,
+            ):
+                self._call(
+                    "batch_execute_statement",
+                    **self._request(sql=sql, parameterSets=batch),
+                )
+                count += len(batch)
+        return count
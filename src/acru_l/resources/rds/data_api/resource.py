@@ -0,0 +1,16 @@
+import os
+
+from acru_l.resources.layers import SharedLayer
+
+data_api_dirname = os.path.dirname(__file__)
+
+
+class DataAPILayer(SharedLayer):
+    """
+    Lambda layer with the `acrul_data_api` runtime module, a batching
+    client for the Aurora Serverless Data API.
+    """
+
+    layer_id = "AcrulDataAPILayer"
+    asset_path = os.path.join(data_api_dirname, "layer")
+    description = "acru-l rds-data batching client"
@@ -1,4 +1,6 @@
 import json
+import re
+from typing import Dict, List, Literal, Optional
 
 from aws_cdk import (
     core,
@@ -8,7 +10,94 @@ from aws_cdk import (
     aws_cloudwatch as cloudwatch,
     aws_rds as rds,
 )
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, root_validator, validator
+
+from acru_l.resources.rds.parameters import (
+    ParameterGroupOptions,
+    instance_memory,
+)
+
+
+class ReadReplicaOptions(BaseModel):
+    count: int = Field(1, ge=1, le=5)
+    # defaults to the primary's instance type
+    instance_class: Optional[str] = None
+    instance_size: Optional[str] = None
+    # replicas are spread over these in order, e.g. ["us-east-1a"]
+    availability_zones: List[str] = Field(default_factory=list)
+    max_replica_lag: int = 30
+
+
+class SlowQueryLogOptions(BaseModel):
+    # statements slower than this are logged, see `acrul-slow-queries`
+    min_duration: int = Field(500, ge=0)
+    log_lock_waits: bool = True
+    # logs temporary files above this size in kB, -1 disables
+    log_temp_files: int = -1
+
+    @property
+    def parameters(self) -> Dict[str, str]:
+        return {
+            "log_min_duration_statement": str(self.min_duration),
+            "log_lock_waits": str(int(self.log_lock_waits)),
+            "log_temp_files": str(self.log_temp_files),
+        }
+
+
+class ProxyOptions(BaseModel):
+    # share of the database's max_connections the proxy may open
+    max_connections_percent: int = Field(100, ge=1, le=100)
+    # unset leaves RDS's default of half of max_connections_percent
+    max_idle_connections_percent: Optional[int] = Field(None, ge=0, le=100)
+    # seconds a client waits for a pooled connection
+    borrow_timeout: int = Field(120, ge=0, le=3600)
+    idle_client_timeout: int = Field(1800, ge=1, le=28800)
+    init_query: Optional[str] = None
+    session_pinning_filters: List[Literal["EXCLUDE_VARIABLE_SETS"]] = Field(
+        default_factory=list
+    )
+    require_tls: bool = True
+    iam_auth: bool = False
+    debug_logging: bool = False
+    # read-only endpoint over the readers, Aurora clusters only
+    reader_endpoint: bool = False
+    # alarm thresholds
+    max_client_connections: int = 1000
+    max_borrow_latency: int = 100000  # microseconds
+
+    @root_validator(skip_on_failure=True)
+    def check_idle_connections(cls, values):
+        max_idle = values["max_idle_connections_percent"]
+        if (
+            max_idle is not None
+            and max_idle > values["max_connections_percent"]
+        ):
+            raise ValueError(
+                "max_idle_connections_percent cannot exceed "
+                "max_connections_percent"
+            )
+        return values
+
+    @property
+    def proxy_kwargs(self) -> Dict:
+        return {
+            "max_connections_percent": self.max_connections_percent,
+            "max_idle_connections_percent": (
+                self.max_idle_connections_percent
+            ),
+            "borrow_timeout": core.Duration.seconds(self.borrow_timeout),
+            "idle_client_timeout": core.Duration.seconds(
+                self.idle_client_timeout
+            ),
+            "init_query": self.init_query,
+            "session_pinning_filters": [
+                getattr(rds.SessionPinningFilter, name)
+                for name in self.session_pinning_filters
+            ],
+            "require_tls": self.require_tls,
+            "iam_auth": self.iam_auth,
+            "debug_logging": self.debug_logging,
+        }
 
 
 class RDSInstanceOptions(BaseModel):
@@ -25,6 +114,13 @@ class RDSInstanceOptions(BaseModel):
     port: int = 5432
     removal_policy: core.RemovalPolicy = core.RemovalPolicy.DESTROY
     storage_type: rds.StorageType = rds.StorageType.STANDARD
+    # provisioned IOPS, io1 only
+    iops: Optional[int] = None
+    # enables storage autoscaling up to this many GiB
+    max_allocated_storage: Optional[int] = None
+    # alarm threshold for read plus write throughput in bytes per second,
+    # none by default as the limit depends on the instance class
+    max_throughput: Optional[int] = Field(None, gt=0)
     storage_encrypted: bool = True
     backup_retention: int = 1
     monitoring_interval: int = 60
@@ -33,6 +129,100 @@ class RDSInstanceOptions(BaseModel):
         logs.RetentionDays.ONE_MONTH
     )  # noqa: E501
     auto_minor_version_upgrade: bool = True
+    read_replicas: Optional[ReadReplicaOptions] = None
+    engine_version: str = "11.5"
+    parameter_group: Optional[ParameterGroupOptions] = None
+    slow_query_log: Optional[SlowQueryLogOptions] = None
+    # implies add_proxy
+    proxy: Optional[ProxyOptions] = None
+    # ISOLATED places the instance and its replicas in the VPC's database
+    # subnets
+    subnet_type: ec2.SubnetType = ec2.SubnetType.PRIVATE
+
+    @validator("engine_version")
+    def check_engine_version(cls, value):
+        if not re.fullmatch(r"\d+(\.\d+){1,2}", value):
+            raise ValueError("expected a full version, e.g. 12.4")
+        return value
+
+    @validator("proxy")
+    def check_proxy(cls, value):
+        if value and value.reader_endpoint:
+            raise ValueError("proxy reader endpoints require Aurora")
+        return value
+
+    @root_validator(skip_on_failure=True)
+    def check_storage(cls, values):
+        storage_type = values["storage_type"]
+        iops = values["iops"]
+        allocated_storage = values["allocated_storage"]
+        if storage_type == rds.StorageType.IO1:
+            if iops is None:
+                raise ValueError("io1 storage requires iops")
+            if not 1000 <= iops <= 80000:
+                raise ValueError("iops must be between 1000 and 80000")
+            if not 0.5 <= iops / allocated_storage <= 50:
+                raise ValueError(
+                    "iops must be 0.5 to 50 times allocated_storage"
+                )
+            if allocated_storage < 100:
+                raise ValueError("io1 storage requires at least 100GiB")
+        elif iops is not None:
+            raise ValueError("iops requires io1 storage")
+        max_allocated_storage = values["max_allocated_storage"]
+        if (
+            max_allocated_storage is not None
+            and max_allocated_storage <= allocated_storage
+        ):
+            raise ValueError(
+                "max_allocated_storage must exceed allocated_storage"
+            )
+        return values
+
+    @root_validator(skip_on_failure=True)
+    def check_parameters(cls, values):
+        parameter_group = values.get("parameter_group")
+        if parameter_group:
+            parameter_group.build(
+                instance_memory(
+                    values["instance_class"], values["instance_size"]
+                )
+            )
+        return values
+
+    @property
+    def proxy_options(self) -> Optional[ProxyOptions]:
+        if self.proxy:
+            return self.proxy
+        if self.add_proxy:
+            return ProxyOptions()
+        return None
+
+    @property
+    def memory(self) -> Optional[int]:
+        return instance_memory(self.instance_class, self.instance_size)
+
+    @property
+    def parameters(self) -> Dict[str, str]:
+        parameters = {}
+        if self.slow_query_log:
+            parameters.update(self.slow_query_log.parameters)
+        if self.parameter_group:
+            parameters.update(self.parameter_group.build(self.memory))
+        return parameters
+
+    @property
+    def cloudwatch_logs_exports(self) -> Optional[List[str]]:
+        if self.slow_query_log:
+            return ["postgresql"]
+        return None
+
+    @property
+    def postgres_engine_version(self) -> rds.PostgresEngineVersion:
+        parts = self.engine_version.split(".")
+        # majors are "9.6" style before postgres 10
+        major = parts[0] if int(parts[0]) >= 10 else ".".join(parts[:2])
+        return rds.PostgresEngineVersion.of(self.engine_version, major)
 
     @property
     def instance_type(self) -> ec2.InstanceType:
@@ -41,6 +231,20 @@ class RDSInstanceOptions(BaseModel):
             getattr(ec2.InstanceSize, self.instance_size),
         )
 
+    @property
+    def read_replica_instance_type(self) -> ec2.InstanceType:
+        replicas = self.read_replicas
+        return ec2.InstanceType.of(
+            getattr(
+                ec2.InstanceClass,
+                replicas.instance_class or self.instance_class,
+            ),
+            getattr(
+                ec2.InstanceSize,
+                replicas.instance_size or self.instance_size,
+            ),
+        )
+
 
 class RDSInstance(core.Construct):
     def __init__(
@@ -83,6 +287,18 @@ class RDSInstance(core.Construct):
             ),
         )
 
+        self.parameter_group = None
+        if options.parameters:
+            self.parameter_group = rds.ParameterGroup(
+                self,
+                "ParameterGroup",
+                engine=engine,
+                description=options.parameter_group.description
+                if options.parameter_group
+                else None,
+                parameters=options.parameters,
+            )
+
         self.instance = rds.DatabaseInstance(
             self,
             "Instance",
@@ -95,33 +311,103 @@ class RDSInstance(core.Construct):
             security_groups=[sg_rds],
             database_name=options.db_name,
             engine=engine,
+            parameter_group=self.parameter_group,
             vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=options.subnet_type),
             port=options.port,
             instance_type=options.instance_type,
             removal_policy=options.removal_policy,
             multi_az=options.multi_az,
             storage_type=options.storage_type,
+            iops=options.iops,
+            max_allocated_storage=options.max_allocated_storage,
             storage_encrypted=options.storage_encrypted,
             backup_retention=core.Duration.days(options.backup_retention),
             monitoring_interval=core.Duration.seconds(
                 options.monitoring_interval
             ),
             enable_performance_insights=options.enable_performance_insights,
+            cloudwatch_logs_exports=options.cloudwatch_logs_exports,
             cloudwatch_logs_retention=options.cloudwatch_logs_retention,
             auto_minor_version_upgrade=options.auto_minor_version_upgrade,
         )
         self.port = options.port
         self.proxy = None
-        if options.add_proxy:
+        proxy_options = options.proxy_options
+        if proxy_options:
             self.proxy = self.instance.add_proxy(
                 "Proxy",
                 secrets=[self.creds],
                 vpc=vpc,
                 db_proxy_name=f"{scope.stack_name}-{id}-Proxy",
                 security_groups=[sg_rds],
+                **proxy_options.proxy_kwargs,
+            )
+        self.read_replicas: List[rds.DatabaseInstanceReadReplica] = []
+        if options.read_replicas:
+            self.add_read_replicas(
+                vpc=vpc, security_group=sg_rds, options=options
             )
         if options.setup_alarms:
             self.setup_alarms()
+            self.setup_storage_alarms(
+                provisioned_iops=options.iops,
+                max_throughput=options.max_throughput,
+                burstable=options.storage_type == rds.StorageType.GP2,
+            )
+            if self.proxy:
+                self.setup_proxy_alarms(options=proxy_options)
+            if options.read_replicas:
+                self.setup_replica_alarms(
+                    max_replica_lag=options.read_replicas.max_replica_lag
+                )
+
+    def add_read_replicas(
+        self,
+        *,
+        vpc: ec2.Vpc,
+        security_group: ec2.SecurityGroup,
+        options: RDSInstanceOptions,
+    ):
+        replica_options = options.read_replicas
+        zones = replica_options.availability_zones
+        for index in range(replica_options.count):
+            replica = rds.DatabaseInstanceReadReplica(
+                self,
+                f"ReadReplica{index}",
+                source_database_instance=self.instance,
+                instance_type=options.read_replica_instance_type,
+                vpc=vpc,
+                vpc_subnets=ec2.SubnetSelection(
+                    subnet_type=options.subnet_type
+                ),
+                availability_zone=zones[index % len(zones)] if zones else None,
+                security_groups=[security_group],
+                port=options.port,
+                storage_type=options.storage_type,
+                iops=options.iops,
+                max_allocated_storage=options.max_allocated_storage,
+                storage_encrypted=options.storage_encrypted,
+                deletion_protection=options.deletion_protection,
+                removal_policy=options.removal_policy,
+                monitoring_interval=core.Duration.seconds(
+                    options.monitoring_interval
+                ),
+                enable_performance_insights=(
+                    options.enable_performance_insights
+                ),
+                cloudwatch_logs_exports=options.cloudwatch_logs_exports,
+                cloudwatch_logs_retention=options.cloudwatch_logs_retention,
+                auto_minor_version_upgrade=options.auto_minor_version_upgrade,
+            )
+            if self.parameter_group:
+                # not exposed on DatabaseInstanceReadReplica
+                binding = self.parameter_group.bind_to_instance()
+                cfn_replica = replica.node.default_child
+                cfn_replica.db_parameter_group_name = (
+                    binding.parameter_group_name
+                )
+            self.read_replicas.append(replica)
 
     @property
     def connection_interface(self):
@@ -141,6 +427,13 @@ class RDSInstance(core.Construct):
             return self.proxy.endpoint
         return self.instance.db_instance_endpoint_address
 
+    @property
+    def reader_endpoint_addresses(self) -> List[str]:
+        return [
+            replica.db_instance_endpoint_address
+            for replica in self.read_replicas
+        ]
+
     def setup_alarms(self):
         cloudwatch.Alarm(
             self,
@@ -215,10 +508,141 @@ class RDSInstance(core.Construct):
             comparison_operator=cloudwatch.ComparisonOperator.LESS_THAN_OR_EQUAL_TO_THRESHOLD,  # noqa: E501
         )
 
+    def setup_storage_alarms(
+        self,
+        *,
+        provisioned_iops: Optional[int],
+        max_throughput: Optional[int],
+        burstable: bool,
+    ):
+        period = core.Duration.minutes(5)
+        # gp2 volumes only slow down once their burst balance runs out,
+        # io1 volumes at their provisioned IOPS
+        if provisioned_iops:
+            cloudwatch.Alarm(
+                self,
+                "HighIOPS",
+                metric=cloudwatch.MathExpression(
+                    expression="read + write",
+                    using_metrics={
+                        "read": self.instance.metric(
+                            "ReadIOPS", statistic="Average", period=period
+                        ),
+                        "write": self.instance.metric(
+                            "WriteIOPS", statistic="Average", period=period
+                        ),
+                    },
+                    label="IOPS",
+                    period=period,
+                ),
+                threshold=int(provisioned_iops * 0.9),
+                evaluation_periods=3,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+            )
+        if max_throughput:
+            cloudwatch.Alarm(
+                self,
+                "HighThroughput",
+                metric=cloudwatch.MathExpression(
+                    expression="read + write",
+                    using_metrics={
+                        "read": self.instance.metric(
+                            "ReadThroughput",
+                            statistic="Average",
+                            period=period,
+                        ),
+                        "write": self.instance.metric(
+                            "WriteThroughput",
+                            statistic="Average",
+                            period=period,
+                        ),
+                    },
+                    label="Throughput",
+                    period=period,
+                ),
+                threshold=max_throughput,
+                evaluation_periods=3,
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+            )
+        if burstable:
+            cloudwatch.Alarm(
+                self,
+                "LowBurstBalance",
+                metric=self.instance.metric(
+                    "BurstBalance", unit=cloudwatch.Unit.PERCENT
+                ),
+                statistic="Average",
+                threshold=20,
+                evaluation_periods=2,
+                period=period,
+                comparison_operator=cloudwatch.ComparisonOperator.LESS_THAN_OR_EQUAL_TO_THRESHOLD,  # noqa: E501
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+            )
+        cloudwatch.Alarm(
+            self,
+            "HighDiskQueueDepth",
+            metric=self.instance.metric("DiskQueueDepth"),
+            statistic="Average",
+            threshold=10,
+            evaluation_periods=3,
+            period=period,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
+
+    def proxy_metric(self, metric_name: str, **kwargs) -> cloudwatch.Metric:
+        return cloudwatch.Metric(
+            namespace="AWS/RDS",
+            metric_name=metric_name,
+            dimensions={"ProxyName": self.proxy.db_proxy_name},
+            **kwargs,
+        )
+
+    def setup_proxy_alarms(self, *, options: ProxyOptions):
+        cloudwatch.Alarm(
+            self,
+            "HighProxyClientConnections",
+            metric=self.proxy_metric(
+                "ClientConnections", unit=cloudwatch.Unit.COUNT
+            ),
+            statistic="Maximum",
+            threshold=options.max_client_connections,
+            evaluation_periods=2,
+            period=core.Duration.minutes(5),
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
+        cloudwatch.Alarm(
+            self,
+            "HighProxyBorrowLatency",
+            metric=self.proxy_metric(
+                "DatabaseConnectionsBorrowLatency",
+                unit=cloudwatch.Unit.MICROSECONDS,
+            ),
+            statistic="Average",
+            threshold=options.max_borrow_latency,
+            evaluation_periods=2,
+            period=core.Duration.minutes(5),
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
+
+    def setup_replica_alarms(self, *, max_replica_lag: int):
+        for index, replica in enumerate(self.read_replicas):
+            cloudwatch.Alarm(
+                self,
+                f"HighReplicaLag{index}",
+                metric=replica.metric(
+                    "ReplicaLag", unit=cloudwatch.Unit.SECONDS
+                ),
+                statistic="Maximum",
+                threshold=max_replica_lag,
+                evaluation_periods=2,
+                period=core.Duration.minutes(5),
+                treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+            )
+
 
 class PostgresInstance(RDSInstance):
     def __init__(self, *args, **kwargs):
         kwargs["engine"] = rds.DatabaseInstanceEngine.postgres(
-            version=rds.PostgresEngineVersion.VER_11_5
+            version=kwargs["options"].postgres_engine_version
         )
         super().__init__(*args, **kwargs)
@@ -0,0 +1,206 @@
+from typing import Dict, Literal, Optional, Union
+
+from pydantic import BaseModel, Field, StrictFloat, StrictInt, StrictStr
+
+# memory of the LARGE size of each RDS instance family in MiB, the other
+# sizes scale linearly with SIZE_FACTORS
+LARGE_MEMORY = {
+    "BURSTABLE2": 8192,
+    "BURSTABLE3": 8192,
+    "BURSTABLE3_AMD": 8192,
+    "BURSTABLE4_GRAVITON": 8192,
+    "STANDARD4": 8192,
+    "STANDARD5": 8192,
+    "STANDARD5_AMD": 8192,
+    "STANDARD6_GRAVITON": 8192,
+    "MEMORY4": 15616,
+    "MEMORY5": 16384,
+    "MEMORY5_AMD": 16384,
+    "MEMORY6_GRAVITON": 16384,
+}
+SIZE_FACTORS = {
+    "MICRO": 0.125,
+    "SMALL": 0.25,
+    "MEDIUM": 0.5,
+    "LARGE": 1,
+    "XLARGE": 2,
+    "XLARGE2": 4,
+    "XLARGE4": 8,
+    "XLARGE8": 16,
+    "XLARGE10": 20,
+    "XLARGE12": 24,
+    "XLARGE16": 32,
+    "XLARGE24": 48,
+}
+
+# postgres units: 8kB pages for buffers, kB for the *_mem settings
+PAGE_PARAMETERS = ("shared_buffers", "effective_cache_size")
+KB_PARAMETERS = ("work_mem", "maintenance_work_mem")
+LIMITS = {
+    "max_connections": (6, 262143),
+    "work_mem": (64, 2147483647),
+    "maintenance_work_mem": (1024, 2147483647),
+    "random_page_cost": (0, 100),
+    "effective_io_concurrency": (0, 1000),
+    "default_statistics_target": (1, 10000),
+}
+
+
+def instance_memory(instance_class: str, instance_size: str) -> Optional[int]:
+    """
+    Memory in MiB, or None for families without a known size.
+    """
+    if instance_class not in LARGE_MEMORY:
+        return None
+    if instance_size not in SIZE_FACTORS:
+        return None
+    return int(LARGE_MEMORY[instance_class] * SIZE_FACTORS[instance_size])
+
+
+def clamp(value: float, low: int, high: int) -> int:
+    return int(max(low, min(high, value)))
+
+
+def oltp_preset(memory: int) -> Dict[str, Union[int, float]]:
+    """
+    Many short transactions: a quarter of memory for shared buffers and
+    a modest work_mem shared by a large connection pool.
+    """
+    max_connections = clamp(memory / 10, 100, 5000)
+    return {
+        "max_connections": max_connections,
+        "shared_buffers": memory * 128 // 4,
+        "effective_cache_size": memory * 128 * 3 // 4,
+        "work_mem": clamp(memory * 1024 / 4 / max_connections, 4096, 65536),
+        "maintenance_work_mem": clamp(memory * 1024 / 16, 65536, 2097152),
+        "random_page_cost": 1.1,
+    }
+
+
+def read_heavy_preset(memory: int) -> Dict[str, Union[int, float]]:
+    """
+    Reporting and read replica traffic: fewer connections, larger sorts
+    and hashes, more planner statistics.
+    """
+    max_connections = clamp(memory / 20, 50, 2000)
+    return {
+        "max_connections": max_connections,
+        "shared_buffers": memory * 128 // 4,
+        "effective_cache_size": memory * 128 * 3 // 4,
+        "work_mem": clamp(memory * 1024 / 2 / max_connections, 8192, 262144),
+        "maintenance_work_mem": clamp(memory * 1024 / 16, 65536, 2097152),
+        "random_page_cost": 1.1,
+        "effective_io_concurrency": 200,
+        "default_statistics_target": 200,
+    }
+
+
+PRESETS = {
+    "oltp": oltp_preset,
+    "read_heavy": read_heavy_preset,
+}
+
+# Aurora storage is not read through the OS page cache and the engine
+# already gives shared_buffers about 75% of memory, so cluster presets
+# leave buffer and I/O settings at the engine defaults
+AURORA_MANAGED_PARAMETERS = (
+    "shared_buffers",
+    "effective_cache_size",
+    "random_page_cost",
+    "effective_io_concurrency",
+)
+
+
+def aurora_oltp_preset(memory: int) -> Dict[str, Union[int, float]]:
+    return without_managed(oltp_preset(memory))
+
+
+def aurora_read_heavy_preset(memory: int) -> Dict[str, Union[int, float]]:
+    return without_managed(read_heavy_preset(memory))
+
+
+def without_managed(
+    parameters: Dict[str, Union[int, float]]
+) -> Dict[str, Union[int, float]]:
+    return {
+        name: value
+        for name, value in parameters.items()
+        if name not in AURORA_MANAGED_PARAMETERS
+    }
+
+
+AURORA_PRESETS = {
+    "oltp": aurora_oltp_preset,
+    "read_heavy": aurora_read_heavy_preset,
+}
+
+
+class ParameterGroupOptions(BaseModel):
+    """
+    Postgres parameters for the instance. A preset is sized from the
+    instance's memory; explicit `parameters` win over the preset. Values
+    may also be RDS formulas such as "{DBInstanceClassMemory/32768}".
+    """
+
+    preset: Optional[Literal["oltp", "read_heavy"]] = None
+    pg_stat_statements: bool = False
+    parameters: Dict[str, Union[StrictInt, StrictFloat, StrictStr]] = Field(
+        default_factory=dict
+    )
+    description: Optional[str] = None
+
+    def build(
+        self, memory: Optional[int], *, aurora: bool = False
+    ) -> Dict[str, str]:
+        """
+        Resolves the parameters and validates them against `memory`
+        (MiB) when it is known. Raises ValueError on invalid values.
+        """
+        parameters: Dict[str, Union[int, float, str]] = {}
+        if self.preset:
+            if memory is None:
+                raise ValueError(
+                    f"the {self.preset} preset needs a known instance type"
+                )
+            presets = AURORA_PRESETS if aurora else PRESETS
+            parameters.update(presets[self.preset](memory))
+        if self.pg_stat_statements:
+            parameters.update(
+                {
+                    "shared_preload_libraries": "pg_stat_statements",
+                    "pg_stat_statements.track": "top",
+                    "track_io_timing": 1,
+                }
+            )
+        parameters.update(self.parameters)
+        validate_parameters(parameters, memory)
+        return {name: str(value) for name, value in parameters.items()}
+
+
+def validate_parameters(
+    parameters: Dict[str, Union[int, float, str]], memory: Optional[int]
+):
+    for name, value in parameters.items():
+        if isinstance(value, str):
+            # formulas and enum-like values are checked by RDS
+            continue
+        if name in LIMITS:
+            low, high = LIMITS[name]
+            if not low <= value <= high:
+                raise ValueError(
+                    f"{name}={value} is outside of [{low}, {high}]"
+                )
+        if memory is None:
+            continue
+        if name in PAGE_PARAMETERS:
+            size = value * 8 // 1024
+        elif name in KB_PARAMETERS:
+            size = value // 1024
+        else:
+            continue
+        limit = memory if name == "effective_cache_size" else memory * 0.8
+        if size > limit:
+            raise ValueError(
+                f"{name}={value} needs {size}MiB, "
+                f"the instance has {memory}MiB"
+            )
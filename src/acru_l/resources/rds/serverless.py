@@ -1,14 +1,52 @@
 import json
+import warnings
+from typing import Optional
 
 from aws_cdk import (
     core,
     aws_secretsmanager as secretsmanager,
     aws_ec2 as ec2,
+    aws_iam as iam,
+    aws_lambda as _lambda,
     aws_rds as rds,
 )
 
+from acru_l.resources.rds.data_api import DataAPILayer
+
+# capacity units Aurora Serverless v1 accepts for aurora-postgresql
+POSTGRES_CAPACITIES = (2, 4, 8, 16, 32, 64, 192, 384)
+
+
+def scaling_configuration(
+    *,
+    auto_pause: bool,
+    min_capacity: int,
+    max_capacity: int,
+    seconds_until_auto_pause: int,
+) -> rds.CfnDBCluster.ScalingConfigurationProperty:
+    for capacity in (min_capacity, max_capacity):
+        if capacity not in POSTGRES_CAPACITIES:
+            raise ValueError(
+                f"capacity {capacity} is not one of {POSTGRES_CAPACITIES}"
+            )
+    if min_capacity > max_capacity:
+        raise ValueError("min_capacity cannot exceed max_capacity")
+    if not 300 <= seconds_until_auto_pause <= 86400:
+        raise ValueError("seconds_until_auto_pause must be 300 to 86400")
+    return rds.CfnDBCluster.ScalingConfigurationProperty(
+        auto_pause=auto_pause,
+        min_capacity=min_capacity,
+        max_capacity=max_capacity,
+        seconds_until_auto_pause=seconds_until_auto_pause,
+    )
+
 
 class PostgresCluster(core.Construct):
+    """
+    Aurora Serverless v1 Postgres cluster. See `AuroraPostgresCluster` for
+    provisioned writer and reader instances.
+    """
+
     def __init__(
         self,
         scope: core.Construct,
@@ -19,14 +57,27 @@ class PostgresCluster(core.Construct):
         vpc: ec2.Vpc,
         stage: str = None,
         auto_pause: bool = True,
+        min_capacity: int = 2,
         max_capacity: int = 2,
-        seconds_util_auto_pause: int = 3600,
+        seconds_until_auto_pause: int = 3600,
+        engine_version: str = "10.7",
         backup_retention_period: int = 1,
         enable_http_endpoint: bool = True,
         deletion_protection: bool = False,
+        subnet_type: ec2.SubnetType = ec2.SubnetType.PRIVATE,
+        seconds_util_auto_pause: Optional[int] = None,
     ):
         super().__init__(scope, id)
 
+        if seconds_util_auto_pause is not None:
+            warnings.warn(
+                "seconds_util_auto_pause is deprecated, "
+                "use seconds_until_auto_pause",
+                DeprecationWarning,
+                stacklevel=2,
+            )
+            seconds_until_auto_pause = seconds_util_auto_pause
+
         stage = stage or ""
         name = f"{id.lower()}-{stage.lower()}" if stage else f"{id.lower()}"
         identifier = f"{name}-pg-cluster"
@@ -38,7 +89,7 @@ class PostgresCluster(core.Construct):
             self,
             f"{id}DBSubnetGroup",
             db_subnet_group_description="API Cluster subnets",
-            subnet_ids=[subnet.subnet_id for subnet in vpc.private_subnets],
+            subnet_ids=vpc.select_subnets(subnet_type=subnet_type).subnet_ids,
         )
 
         self.creds = secretsmanager.Secret(
@@ -68,7 +119,7 @@ class PostgresCluster(core.Construct):
             f"{id}Cluster",
             engine="aurora-postgresql",
             engine_mode="serverless",
-            engine_version="10.7",
+            engine_version=engine_version,
             enable_http_endpoint=enable_http_endpoint,
             database_name=self.db_name,
             master_username=core.Fn.join(
@@ -88,12 +139,12 @@ class PostgresCluster(core.Construct):
                 ],
             ),
             backup_retention_period=backup_retention_period,
-            scaling_configuration={
-                "auto_pause": auto_pause,
-                "max_capacity": max_capacity,
-                "min_capacity": 2,
-                "seconds_util_auto_pause": seconds_util_auto_pause,
-            },
+            scaling_configuration=scaling_configuration(
+                auto_pause=auto_pause,
+                min_capacity=min_capacity,
+                max_capacity=max_capacity,
+                seconds_until_auto_pause=seconds_until_auto_pause,
+            ),
             vpc_security_group_ids=sg_ids,
             db_subnet_group_name=subnet_group.ref,
             deletion_protection=deletion_protection,
@@ -107,3 +158,34 @@ class PostgresCluster(core.Construct):
     @property
     def endpoint_address(self):
         return self.db_cluster.attr_endpoint_address
+
+    @property
+    def data_api_environment(self):
+        return {
+            "DATA_API_RESOURCE_ARN": self.db_cluster_arn,
+            "DATA_API_SECRET_ARN": self.creds.secret_arn,
+            "DATA_API_DATABASE": self.db_name,
+        }
+
+    def grant_data_api(self, handler: _lambda.Function):
+        """
+        Lets `handler` run statements through the Data API with the
+        `acrul_data_api` layer, without network access to the cluster.
+        """
+        handler.add_layers(DataAPILayer.of(self).layer)
+        for key, value in self.data_api_environment.items():
+            handler.add_environment(key, value)
+        handler.add_to_role_policy(
+            iam.PolicyStatement(
+                effect=iam.Effect.ALLOW,
+                actions=[
+                    "rds-data:BatchExecuteStatement",
+                    "rds-data:BeginTransaction",
+                    "rds-data:CommitTransaction",
+                    "rds-data:ExecuteStatement",
+                    "rds-data:RollbackTransaction",
+                ],
+                resources=[self.db_cluster_arn],
+            )
+        )
+        self.creds.grant_read(handler)
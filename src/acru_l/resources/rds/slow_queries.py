@@ -0,0 +1,197 @@
+"""
+Summarizes slow statements from Postgres logs, as written when
+`log_min_duration_statement` is set (see `SlowQueryLogOptions`).
+
+Works offline on files downloaded from RDS or exported from the
+CloudWatch log group, e.g.:
+
+    aws rds download-db-log-file-portion --db-instance-identifier db \\
+        --log-file-name error/postgresql.log.2021-01-12-10 \\
+        --output text > postgresql.log
+    acrul-slow-queries postgresql.log --top 20
+"""
+import hashlib
+import json
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+import click
+
+# RDS log_line_prefix is "%t:%r:%u@%d:[%p]:"
+ENTRY_RE = re.compile(
+    r"^(?:\d{4}-\d\d-\d\d \d\d:\d\d:\d\d(?:\.\d+)? \w+:)"
+    r"(?:[^:]*:(?P<user>[^@:]*)@(?P<database>[^:]*):\[\d+\]:)?"
+    r"(?P<level>[A-Z]+):\s+(?P<message>.*)$"
+)
+DURATION_RE = re.compile(
+    r"^duration: (?P<duration>[\d.]+) ms\s+"
+    r"(?:statement|execute [^:]*):\s(?P<statement>.*)$",
+    re.DOTALL,
+)
+
+COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.I)
+PARAM_RE = re.compile(r"\$\d+")
+LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+VALUES_RE = re.compile(r"(values\s*\(\?\+?\))(?:\s*,\s*\(\?\+?\))+")
+SPACE_RE = re.compile(r"\s+")
+
+
+class Statement(NamedTuple):
+    duration: float
+    statement: str
+    user: Optional[str] = None
+    database: Optional[str] = None
+
+
+class QueryStats(NamedTuple):
+    fingerprint: str
+    query: str
+    calls: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    example: str
+
+
+def normalize(statement: str) -> str:
+    """
+    Replaces literals with "?" so executions of the same statement with
+    different values normalize to the same text.
+    """
+    query = COMMENT_RE.sub(" ", statement)
+    query = STRING_RE.sub("?", query)
+    query = PARAM_RE.sub("?", query)
+    query = NUMBER_RE.sub("?", query)
+    query = SPACE_RE.sub(" ", query).strip().rstrip(";").strip().lower()
+    query = LIST_RE.sub("(?+)", query)
+    query = VALUES_RE.sub(r"\1", query)
+    return query
+
+
+def fingerprint(query: str) -> str:
+    return hashlib.md5(query.encode()).hexdigest()[:16]
+
+
+def iter_entries(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Joins continuation lines (multi-line statements) onto their entry.
+    """
+    entry = None
+    for line in lines:
+        line = line.rstrip("\n")
+        match = ENTRY_RE.match(line)
+        if match:
+            if entry:
+                yield entry
+            entry = match.groupdict()
+        elif entry and line.startswith(("\t", " ")):
+            entry["message"] += "\n" + line.strip()
+    if entry:
+        yield entry
+
+
+def parse(lines: Iterable[str]) -> Iterator[Statement]:
+    for entry in iter_entries(lines):
+        if entry["level"] != "LOG":
+            continue
+        match = DURATION_RE.match(entry["message"])
+        if match:
+            yield Statement(
+                duration=float(match["duration"]),
+                statement=match["statement"].strip(),
+                user=entry["user"] or None,
+                database=entry["database"] or None,
+            )
+
+
+def aggregate(statements: Iterable[Statement]) -> List[QueryStats]:
+    groups: Dict[str, dict] = {}
+    for statement in statements:
+        query = normalize(statement.statement)
+        key = fingerprint(query)
+        group = groups.setdefault(
+            key,
+            {
+                "query": query,
+                "calls": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "example": statement.statement,
+            },
+        )
+        group["calls"] += 1
+        group["total_ms"] += statement.duration
+        if statement.duration > group["max_ms"]:
+            group["max_ms"] = statement.duration
+            group["example"] = statement.statement
+    return [
+        QueryStats(
+            fingerprint=key,
+            query=group["query"],
+            calls=group["calls"],
+            total_ms=group["total_ms"],
+            mean_ms=group["total_ms"] / group["calls"],
+            max_ms=group["max_ms"],
+            example=group["example"],
+        )
+        for key, group in groups.items()
+    ]
+
+
+def top(stats: List[QueryStats], by: str, limit: int) -> List[QueryStats]:
+    return sorted(stats, key=lambda s: getattr(s, by), reverse=True)[:limit]
+
+
+def format_table(title: str, stats: List[QueryStats], width: int) -> str:
+    lines = [
+        title,
+        f"{'fingerprint':<16} {'calls':>7} {'total ms':>11} "
+        f"{'mean ms':>9} {'max ms':>9}  query",
+    ]
+    for s in stats:
+        query = s.query if len(s.query) <= width else s.query[: width - 3]
+        if query != s.query:
+            query += "..."
+        lines.append(
+            f"{s.fingerprint:<16} {s.calls:>7} {s.total_ms:>11.1f} "
+            f"{s.mean_ms:>9.1f} {s.max_ms:>9.1f}  {query}"
+        )
+    return "\n".join(lines)
+
+
+@click.command()
+@click.argument(
+    "log_files", nargs=-1, required=True, type=click.File(errors="replace")
+)
+@click.option("--top", "limit", default=10, show_default=True)
+@click.option("--width", default=80, show_default=True)
+@click.option("--database", help="Only statements run against this db")
+@click.option("--json", "as_json", is_flag=True, help="Print JSON")
+def main(log_files, limit, width, database, as_json):
+    statements = [
+        statement
+        for log_file in log_files
+        for statement in parse(log_file)
+        if not database or statement.database == database
+    ]
+    stats = aggregate(statements)
+    by_total = top(stats, "total_ms", limit)
+    by_mean = top(stats, "mean_ms", limit)
+    if as_json:
+        click.echo(
+            json.dumps(
+                {
+                    "statements": len(statements),
+                    "by_total": [s._asdict() for s in by_total],
+                    "by_mean": [s._asdict() for s in by_mean],
+                },
+                indent=2,
+            )
+        )
+        return
+    click.echo(f"{len(statements)} slow statements, {len(stats)} queries\n")
+    click.echo(format_table("Top by total time", by_total, width))
+    click.echo("")
+    click.echo(format_table("Top by mean time", by_mean, width))
@@ -0,0 +1 @@
+from .resource import SecretsLayer  # noqa: F401
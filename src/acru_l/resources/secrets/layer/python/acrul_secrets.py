@@ -0,0 +1,146 @@
+"""
+Secrets Manager prefetch and cache for acru-l functions.
+
+The secrets listed in ACRUL_SECRET_ARNS are fetched concurrently when
+this module is first imported (during the function's init phase), kept
+in memory for ACRUL_SECRETS_TTL seconds and refreshed by a background
+thread.
+
+`get_secret` has the same signature as acrul_toolkit.secretsmanager's.
+
+Usage:
+    from acrul_secrets import get_secret
+
+    password = get_secret(os.environ["DB_SECRET_ID"], key="password")
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SecretCache:
+    def __init__(
+        self,
+        secret_ids: Iterable[str] = (),
+        *,
+        client=None,
+        ttl: float = 300,
+        max_workers: int = 8,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.secret_ids = list(secret_ids)
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.clock = clock
+        self._client = client
+        self._values: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._aliases: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client("secretsmanager")
+        return self._client
+
+    def fetch(self, secret_id: str) -> Dict[str, Any]:
+        response = self.client.get_secret_value(SecretId=secret_id)
+        fetched_at = self.clock()
+        with self._lock:
+            self._values[secret_id] = (response, fetched_at)
+            for alias in (response.get("ARN"), response.get("Name")):
+                if alias:
+                    self._aliases[alias] = secret_id
+        return response
+
+    def _fetch_quietly(self, secret_id: str):
+        try:
+            self.fetch(secret_id)
+        except Exception:  # lookups retry synchronously
+            logger.exception("Failed to prefetch secret %s", secret_id)
+
+    def prefetch(self, secret_ids: Optional[Iterable[str]] = None):
+        secret_ids = list(secret_ids or self.secret_ids)
+        if not secret_ids:
+            return
+        workers = min(self.max_workers, len(secret_ids))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(self._fetch_quietly, secret_ids))
+
+    def refresh(self):
+        with self._lock:
+            secret_ids = set(self.secret_ids) | set(self._values)
+        self.prefetch(secret_ids)
+
+    def start_refresh(self, interval: float):
+        if self._refresher is not None:
+            return
+
+        def refresh_forever():
+            while True:
+                time.sleep(interval)
+                self.refresh()
+
+        self._refresher = threading.Thread(
+            target=refresh_forever, name="acrul-secrets-refresh", daemon=True
+        )
+        self._refresher.start()
+
+    def get(self, secret_id: str) -> Dict[str, Any]:
+        with self._lock:
+            secret_id = self._aliases.get(secret_id, secret_id)
+            cached = self._values.get(secret_id)
+        if cached is not None and self.clock() - cached[1] < self.ttl:
+            return cached[0]
+        return self.fetch(secret_id)
+
+    def get_string(self, secret_id: str):
+        response = self.get(secret_id)
+        if "SecretString" in response:
+            return response["SecretString"]
+        return response["SecretBinary"]
+
+    def get_json(self, secret_id: str) -> Any:
+        return json.loads(self.get_string(secret_id))
+
+
+_cache: Optional[SecretCache] = None
+
+
+def get_cache() -> SecretCache:
+    global _cache
+    if _cache is None:
+        arns = os.environ.get("ACRUL_SECRET_ARNS", "")
+        ttl = float(os.environ.get("ACRUL_SECRETS_TTL", 300))
+        _cache = SecretCache(
+            [arn for arn in arns.split(",") if arn],
+            ttl=ttl,
+        )
+        _cache.prefetch()
+        # refresh before entries expire so lookups never block
+        if ttl > 0:
+            _cache.start_refresh(ttl / 2)
+    return _cache
+
+
+def get_secret(secret_id: str, key: Optional[str] = None):
+    if key:
+        return get_cache().get_json(secret_id)[key]
+    return get_cache().get_string(secret_id)
+
+
+def get_secret_json(secret_id: str) -> Any:
+    return get_cache().get_json(secret_id)
+
+
+if os.environ.get("ACRUL_SECRET_ARNS"):
+    get_cache()
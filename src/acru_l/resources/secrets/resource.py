@@ -0,0 +1,16 @@
+import os
+
+from acru_l.resources.layers import SharedLayer
+
+secrets_dirname = os.path.dirname(__file__)
+
+
+class SecretsLayer(SharedLayer):
+    """
+    Lambda layer with the `acrul_secrets` runtime module. Functions that
+    set ACRUL_SECRET_ARNS prefetch those secrets when it is imported.
+    """
+
+    layer_id = "AcrulSecretsLayer"
+    asset_path = os.path.join(secrets_dirname, "layer")
+    description = "acru-l secrets prefetch and cache"
@@ -24,7 +24,8 @@ class SESVerification(core.Construct):
         id: str,
         *,
         hosted_zone: route53.HostedZone,
-        emails: Optional[List[str]]
+        emails: Optional[List[str]],
+        profile: Optional[str] = None
     ):
         super().__init__(scope, id)
 
@@ -40,6 +41,7 @@ class SESVerification(core.Construct):
             "SESDomainValidation",
             source_dir=os.path.join(dirname, "domain_validation"),
             handler="on_event",
+            profile=profile,
             environment={
                 "DOMAIN": hosted_zone.zone_name,
                 "HOSTED_ZONE_ID": hosted_zone.hosted_zone_id,
@@ -70,6 +72,7 @@ class SESVerification(core.Construct):
             "SESVerifyEmails",
             source_dir=os.path.join(dirname, "verified_emails"),
             handler="on_event",
+            profile=profile,
             layers=[
                 ses_config_layer,
             ],
@@ -1,10 +1,40 @@
+from typing import Optional, Sequence
+
 from aws_cdk import (
     core,
     aws_ec2 as ec2,
 )
 
+from acru_l.resources.lookups import (
+    cidr_export_name,
+    subnet_export_name,
+    zoned_export_name,
+)
+
+
+def interface_endpoint_service(
+    name: str,
+) -> ec2.IInterfaceVpcEndpointService:
+    """
+    `name` is an `ec2.InterfaceVpcEndpointAwsService` attribute, e.g.
+    "SECRETS_MANAGER", or a full service name listening on 443.
+    """
+    if name.startswith("com.amazonaws."):
+        return ec2.InterfaceVpcEndpointService(name, 443)
+    return getattr(ec2.InterfaceVpcEndpointAwsService, name)
+
 
 class VPC(core.Construct):
+    """
+    Public and private subnets in `max_azs` AZs, plus isolated "Database"
+    subnets when `database_mask` is set. With `nat_per_az` each private
+    subnet routes through the NAT gateway in its own AZ.
+
+    Gateway endpoints (free) and interface endpoints keep calls to AWS
+    APIs from the private subnets off the NAT gateway. With private DNS
+    the SDKs use them without any configuration.
+    """
+
     def __init__(
         self,
         scope: core.Construct,
@@ -12,29 +42,93 @@ class VPC(core.Construct):
         *,
         name: str,
         cidr: str = "10.1.0.0/16",
-        export_name: str = "VpcId"
+        export_name: str = "VpcId",
+        gateway_endpoints: Sequence[str] = ("S3", "DYNAMODB"),
+        interface_endpoints: Sequence[str] = (),
+        private_dns: bool = True,
+        max_azs: Optional[int] = None,
+        nat_per_az: bool = False,
+        public_mask: int = 24,
+        private_mask: int = 24,
+        database_mask: Optional[int] = None,
     ):
         super().__init__(scope, id)
 
-        subnet0 = ec2.SubnetConfiguration(
-            name="Public", subnet_type=ec2.SubnetType.PUBLIC, cidr_mask=24
-        )
-        subnet1 = ec2.SubnetConfiguration(
-            name="Private", subnet_type=ec2.SubnetType.PRIVATE, cidr_mask=24
-        )
-        vpc = ec2.Vpc(
+        subnet_configuration = [
+            ec2.SubnetConfiguration(
+                name="Public",
+                subnet_type=ec2.SubnetType.PUBLIC,
+                cidr_mask=public_mask,
+            ),
+            ec2.SubnetConfiguration(
+                name="Private",
+                subnet_type=ec2.SubnetType.PRIVATE,
+                cidr_mask=private_mask,
+            ),
+        ]
+        if database_mask:
+            # no route to the internet, see RDSInstanceOptions.subnet_type
+            subnet_configuration.append(
+                ec2.SubnetConfiguration(
+                    name="Database",
+                    subnet_type=ec2.SubnetType.ISOLATED,
+                    cidr_mask=database_mask,
+                )
+            )
+        self.vpc = vpc = ec2.Vpc(
             self,
             name,
             cidr=cidr,
             enable_dns_hostnames=True,
             enable_dns_support=True,
-            nat_gateways=1,
-            subnet_configuration=[
-                subnet0,
-                subnet1,
-            ],
+            max_azs=max_azs,
+            # one NAT gateway per AZ when unset
+            nat_gateways=None if nat_per_az else 1,
+            subnet_configuration=subnet_configuration,
         )
+        for service in gateway_endpoints:
+            vpc.add_gateway_endpoint(
+                f"{service.title()}Endpoint",
+                service=getattr(ec2.GatewayVpcEndpointAwsService, service),
+            )
+        for service in interface_endpoints:
+            endpoint_id = service.split(".")[-1].replace("_", " ").title()
+            vpc.add_interface_endpoint(
+                f"{endpoint_id.replace(' ', '')}Endpoint",
+                service=interface_endpoint_service(service),
+                private_dns_enabled=private_dns,
+                subnets=ec2.SubnetSelection(
+                    subnet_type=ec2.SubnetType.PRIVATE
+                ),
+            )
         # Usage: core.Fn.import_value('VpcId')
         core.CfnOutput(
             self, "VpcId", value=vpc.vpc_id, export_name=export_name
         )
+        # attributes for `VpcLookup(export_name=...)`
+        core.CfnOutput(
+            self,
+            "ZonedVpcId",
+            value=vpc.vpc_id,
+            export_name=zoned_export_name(
+                export_name, len(vpc.availability_zones)
+            ),
+        )
+        core.CfnOutput(
+            self,
+            "VpcCidr",
+            value=vpc.vpc_cidr_block,
+            export_name=cidr_export_name(export_name),
+        )
+        for name, subnets in (
+            ("Public", vpc.public_subnets),
+            ("Private", vpc.private_subnets),
+            ("Database", vpc.isolated_subnets),
+        ):
+            for index, subnet in enumerate(subnets):
+                core.CfnOutput(
+                    self,
+                    f"{name}Subnet{index}",
+                    value=subnet.subnet_id,
+                    export_name=subnet_export_name(export_name, name, index),
+                )
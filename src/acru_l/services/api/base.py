@@ -1,11 +1,14 @@
 import os
-from typing import Mapping, Any, Optional, List, Dict
+import re
+from typing import Mapping, Any, Optional, List, Dict, Literal, Union
 
 from aws_cdk import (
+    aws_apigatewayv2 as apigateway,
     aws_certificatemanager as acm,
     aws_ec2 as ec2,
     aws_events as events,
     aws_events_targets as targets,
+    aws_iam as iam,
     aws_lambda as _lambda,
     aws_logs as logs,
     aws_route53 as route53,
@@ -13,12 +16,16 @@ from aws_cdk import (
 )
 from aws_cdk import core, aws_secretsmanager as secretsmanager
 from aws_cdk.aws_ec2 import IConnectable
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 
-from acru_l.resources.apigateway import LambdaAPIGateway
+from acru_l.resources.apigateway import DistributionOptions, LambdaAPIGateway
 from acru_l.resources.canary import Canary
 from acru_l.resources.custom_resources import CustomResource
-from acru_l.resources.functions import Function
+from acru_l.resources.functions import (
+    Function,
+    FunctionProfile,
+    apply_profile,
+)
 
 
 class SecretsOptions(BaseModel):
@@ -45,12 +52,137 @@ class CanaryOptions(BaseModel):
     deploy_id: str
     version: str
     health_check_url: str
+    profile: Optional[str] = None
 
 
 class CustomResourceOptions(BaseModel):
 
     source_path: str
     properties: Mapping[str, Any]
+    profile: Optional[str] = None
+
+
+class CompressionOptions(BaseModel):
+    encodings: List[Literal["br", "gzip"]] = ["br", "gzip"]
+    min_size: int = 1024
+    content_types: List[str] = [
+        "text/",
+        "application/json",
+        "application/javascript",
+        "application/xml",
+        "application/problem+json",
+        "application/vnd.api+json",
+        "image/svg+xml",
+    ]
+    level: int = Field(6, ge=1, le=9)
+
+    @property
+    def environment(self) -> Dict[str, str]:
+        return {
+            "API_COMPRESSION_ENCODINGS": ",".join(self.encodings),
+            "API_COMPRESSION_MIN_SIZE": str(self.min_size),
+            "API_COMPRESSION_CONTENT_TYPES": ",".join(self.content_types),
+            "API_COMPRESSION_LEVEL": str(self.level),
+        }
+
+
+class OffloadOptions(BaseModel):
+    # keeps the base64 encoded response below Lambda's 6MB limit
+    threshold: int = Field(4 * 1024 * 1024, gt=0, le=4_500_000)
+    expires_in: int = 300
+    prefix: str = "offload/"
+    expiration_days: int = 1
+    # browsers send `Origin: null` after a cross-origin redirect, so XHR
+    # and fetch clients following the 303 need a wildcard rule
+    cors_origins: List[str] = ["*"]
+
+    @property
+    def environment(self) -> Dict[str, str]:
+        return {
+            "API_OFFLOAD_THRESHOLD": str(self.threshold),
+            "API_OFFLOAD_EXPIRES_IN": str(self.expires_in),
+            "API_OFFLOAD_PREFIX": self.prefix,
+        }
+
+
+class ResponseCacheOptions(BaseModel):
+    max_entries: int = 256
+    max_bytes: int = 32 * 1024 * 1024
+    max_entry_bytes: int = 1024 * 1024
+    max_ttl: int = 300
+    key_headers: List[str] = Field(
+        default_factory=lambda: [
+            "Accept",
+            "Accept-Encoding",
+            "Accept-Language",
+        ]
+    )
+    metrics_namespace: Optional[str] = "acru-l/ResponseCache"
+    metrics_interval: int = 60
+
+    @property
+    def environment(self) -> Dict[str, str]:
+        environment = {
+            "API_CACHE_MAX_ENTRIES": str(self.max_entries),
+            "API_CACHE_MAX_BYTES": str(self.max_bytes),
+            "API_CACHE_MAX_ENTRY_BYTES": str(self.max_entry_bytes),
+            "API_CACHE_MAX_TTL": str(self.max_ttl),
+            "API_CACHE_KEY_HEADERS": ",".join(self.key_headers),
+            "API_CACHE_METRICS_INTERVAL": str(self.metrics_interval),
+        }
+        if self.metrics_namespace:
+            environment["API_CACHE_METRICS_NAMESPACE"] = self.metrics_namespace
+        return environment
+
+
+# names of the service's own functions, `<name>Lambda`
+RESERVED_ROUTE_NAMES = ("Main", "PreDeploy", "PostDeploy")
+
+
+class RouteOptions(BaseModel):
+    """
+    Routes `methods` on `path` to a function of its own, so the route
+    scales and is sized independently of the main API function. Explicit
+    settings take precedence over the profile.
+    """
+
+    name: str
+    path: str
+    methods: List[apigateway.HttpMethod] = [apigateway.HttpMethod.ANY]
+    # defaults to the API function's source
+    source_path: Optional[str] = None
+    profile: Optional[str] = None
+    memory_size: Optional[int] = Field(None, ge=128, le=10240)
+    timeout: Optional[int] = Field(None, ge=1, le=900)
+    reserved_concurrent_executions: Optional[int] = Field(None, ge=0)
+
+    @validator("name")
+    def check_name(cls, name):
+        # used in construct ids next to the service's own functions
+        if not re.fullmatch(r"[A-Za-z][A-Za-z0-9]*", name):
+            raise ValueError("name must be alphanumeric")
+        if name in RESERVED_ROUTE_NAMES:
+            raise ValueError(f"{name} is reserved")
+        return name
+
+    @validator("path")
+    def check_path(cls, path):
+        if not path.startswith("/"):
+            raise ValueError("path must start with /")
+        return path
+
+    @property
+    def function_kwargs(self) -> Dict[str, Any]:
+        return FunctionProfile(
+            **self.dict(
+                include={
+                    "memory_size",
+                    "timeout",
+                    "reserved_concurrent_executions",
+                },
+                exclude_none=True,
+            )
+        ).function_kwargs
 
 
 class ServiceOptions(BaseModel):
@@ -59,11 +191,31 @@ class ServiceOptions(BaseModel):
     api_lambda_source_path: Optional[str] = None
     secrets: Optional[List[SecretsOptions]] = Field(default_factory=list)
     secret_arns: Optional[List[str]] = Field(default_factory=list)
+    prefetch_secrets: bool = True
+    secrets_ttl: int = 300
     local_environment: Optional[List[str]] = Field(default_factory=list)
     environment: Optional[Dict[str, Any]] = Field(default_factory=dict)
     health_check_url: Optional[str] = None
     pre_deploy_options: Optional[CustomResourceOptions] = None
     post_deploy_options: Optional[CustomResourceOptions] = None
+    payload_format_version: Literal["1.0", "2.0"] = "1.0"
+    binary_support: bool = True
+    non_binary_content_types: Optional[List[str]] = None
+    compression: Optional[CompressionOptions] = None
+    offload: Optional[OffloadOptions] = None
+    response_cache: Optional[ResponseCacheOptions] = None
+    distribution: Optional[DistributionOptions] = None
+    routes: List[RouteOptions] = Field(default_factory=list)
+    # names of entries under `profiles` in acru-l.toml
+    api_profile: Optional[str] = None
+    canary_profile: Optional[str] = None
+
+    @validator("routes")
+    def check_routes(cls, routes):
+        names = [route.name for route in routes]
+        if len(names) != len(set(names)):
+            raise ValueError("route names must be unique")
+        return routes
 
 
 class Service(core.Construct):
@@ -73,6 +225,7 @@ class Service(core.Construct):
     canary: Optional[Canary] = None
     layers: List[_lambda.LayerVersion]
     api_lambda: Function
+    route_lambdas: List[Function]
     apigw: LambdaAPIGateway
 
     def __init__(
@@ -98,6 +251,8 @@ class Service(core.Construct):
         self.runtime = runtime
         self.environment_variables = options.environment
         self.secret_arns = options.secret_arns
+        self.prefetch_secrets = options.prefetch_secrets
+        self.secrets_ttl = options.secrets_ttl
 
         self.setup_environment(
             secrets=options.secrets,
@@ -113,6 +268,15 @@ class Service(core.Construct):
             domain_name=options.domain_name,
             certificate=certificate,
             hosted_zone=hosted_zone,
+            payload_format_version=options.payload_format_version,
+            binary_support=options.binary_support,
+            non_binary_content_types=options.non_binary_content_types,
+            compression=options.compression,
+            offload=options.offload,
+            response_cache=options.response_cache,
+            distribution_options=options.distribution,
+            profile=options.api_profile,
+            routes=options.routes,
         )
         canary_options = None
         if options.health_check_url:
@@ -120,6 +284,7 @@ class Service(core.Construct):
                 deploy_id=deploy_id,
                 version=version,
                 health_check_url=options.health_check_url,
+                profile=options.canary_profile,
             )
         self.add_canary(options=canary_options)
         self.add_post_deploy(options=options.post_deploy_options)
@@ -144,6 +309,16 @@ class Service(core.Construct):
         bucket_name = self.private_bucket.bucket_name
         self.environment_variables["PRIVATE_S3_BUCKET_NAME"] = bucket_name
 
+        if self.vpc:
+            # regional endpoints resolve to the VPC endpoints, the legacy
+            # global STS and us-east-1 S3 endpoints would go through NAT
+            self.environment_variables.update(
+                {
+                    "AWS_STS_REGIONAL_ENDPOINTS": "regional",
+                    "AWS_S3_US_EAST_1_REGIONAL_ENDPOINT": "regional",
+                }
+            )
+
     def package_project(
         self, *, source_path: str
     ) -> List[_lambda.LayerVersion]:
@@ -155,14 +330,23 @@ class Service(core.Construct):
         )
         return [project_layer]
 
-    def make_function(self, name: str, **kwargs):
+    def make_function(
+        self,
+        name: str,
+        *,
+        profile: Optional[Union[str, FunctionProfile]] = None,
+        **kwargs,
+    ):
+        kwargs.setdefault("environment_variables", self.environment_variables)
+        kwargs = apply_profile(self, profile, kwargs)
         return self.function_class(
             self,
             name,
             layers=self.layers,
             private_bucket=self.private_bucket,
             secret_arns=self.secret_arns,
-            environment_variables=self.environment_variables,
+            prefetch_secrets=self.prefetch_secrets,
+            secrets_ttl=self.secrets_ttl,
             vpc=self.vpc,
             runtime=self.runtime,
             **kwargs,
@@ -175,25 +359,76 @@ class Service(core.Construct):
         domain_name: str,
         certificate: acm.Certificate,
         hosted_zone: route53.HostedZone,
+        payload_format_version: str = "1.0",
+        binary_support: bool = True,
+        non_binary_content_types: Optional[List[str]] = None,
+        compression: Optional[CompressionOptions] = None,
+        offload: Optional[OffloadOptions] = None,
+        response_cache: Optional[ResponseCacheOptions] = None,
+        distribution_options: Optional[DistributionOptions] = None,
+        profile: Optional[str] = None,
+        routes: Optional[List[RouteOptions]] = None,
     ):
-        self.api_lambda = self.make_function(
-            "MainLambda",
-            source_path=api_lambda_source_path,
+        environment_variables = {
+            **self.environment_variables,
+            "API_BINARY_SUPPORT": str(binary_support).lower(),
+        }
+        if non_binary_content_types:
+            environment_variables["API_NON_BINARY_CONTENT_TYPES"] = ",".join(
+                non_binary_content_types
+            )
+        if compression:
+            environment_variables.update(compression.environment)
+        if response_cache:
+            environment_variables.update(response_cache.environment)
+        if offload:
+            environment_variables.update(offload.environment)
+            self.private_bucket.add_lifecycle_rule(
+                id="ExpireOffloadedResponses",
+                prefix=offload.prefix,
+                expiration=core.Duration.days(offload.expiration_days),
+            )
+            if offload.cors_origins:
+                self.private_bucket.add_cors_rule(
+                    id="OffloadedResponses",
+                    allowed_methods=[s3.HttpMethods.GET, s3.HttpMethods.HEAD],
+                    allowed_origins=offload.cors_origins,
+                    allowed_headers=["*"],
+                    max_age=3600,
+                )
+        function_kwargs = dict(
+            environment_variables=environment_variables,
             profiling=True,
             tracing=_lambda.Tracing.ACTIVE,
             log_retention=logs.RetentionDays.THREE_MONTHS,
         )
-        if self.pre_deploy:
-            self.api_lambda.handler.node.add_dependency(
-                self.pre_deploy.resource
-            )
-
-        keep_warm = events.Rule(
-            self, "KeepWarm", schedule=events.Schedule.cron(minute="*/5")
-        )
-        keep_warm.add_target(
-            targets.LambdaFunction(handler=self.api_lambda.handler)
+        self.api_lambda = self.make_function(
+            "MainLambda",
+            source_path=api_lambda_source_path,
+            profile=profile,
+            **function_kwargs,
         )
+        self.route_lambdas = [
+            self.make_function(
+                f"{route.name}Lambda",
+                source_path=route.source_path or api_lambda_source_path,
+                profile=route.profile,
+                **{**function_kwargs, **route.function_kwargs},
+            )
+            for route in routes or []
+        ]
+        names = ["", *[route.name for route in routes or []]]
+        for name, function in zip(names, self.api_functions):
+            if self.pre_deploy:
+                function.handler.node.add_dependency(self.pre_deploy.resource)
+            keep_warm = events.Rule(
+                self,
+                f"{name}KeepWarm",
+                schedule=events.Schedule.cron(minute="*/5"),
+            )
+            keep_warm.add_target(
+                targets.LambdaFunction(handler=function.handler)
+            )
 
         self.apigw = LambdaAPIGateway(
             self,
@@ -202,7 +437,21 @@ class Service(core.Construct):
             certificate=certificate,
             handler=self.api_lambda.handler,
             hosted_zone=hosted_zone,
+            payload_format_version=apigateway.PayloadFormatVersion.custom(
+                payload_format_version
+            ),
+            distribution_options=distribution_options,
         )
+        for route, function in zip(routes or [], self.route_lambdas):
+            self.apigw.add_route(
+                path=route.path,
+                methods=route.methods,
+                handler=function.handler,
+            )
+
+    @property
+    def api_functions(self) -> List[Function]:
+        return [self.api_lambda, *self.route_lambdas]
 
     def add_canary(self, *, options: Optional[CanaryOptions]):
         if options:
@@ -212,13 +461,16 @@ class Service(core.Construct):
                 deploy_id=options.deploy_id,
                 version=options.version,
                 health_check_url=options.health_check_url,
+                profile=options.profile,
             )
             self.canary.add_dependency(self.api_lambda.handler)
 
     def add_pre_deploy(self, *, options: Optional[CustomResourceOptions]):
         if options:
             pre_deploy_lambda = self.make_function(
-                "PreDeployLambda", source_path=options.source_path
+                "PreDeployLambda",
+                source_path=options.source_path,
+                profile=options.profile,
             )
 
             self.pre_deploy = CustomResource(
@@ -231,7 +483,9 @@ class Service(core.Construct):
     def add_post_deploy(self, *, options: Optional[CustomResourceOptions]):
         if options:
             post_deploy_lambda = self.make_function(
-                "PostDeployLambda", source_path=options.source_path
+                "PostDeployLambda",
+                source_path=options.source_path,
+                profile=options.profile,
             )
 
             self.post_deploy = CustomResource(
@@ -258,4 +512,16 @@ class Service(core.Construct):
             other.connections.allow_from(
                 self.post_deploy.on_event_handler, port_range
             )
-        other.connections.allow_from(self.api_lambda.handler, port_range)
+        for function in self.api_functions:
+            other.connections.allow_from(function.handler, port_range)
+
+    def add_to_role_policy(self, statement: iam.PolicyStatement):
+        """
+        Adds `statement` to the API, route and deploy hook functions.
+        """
+        if self.pre_deploy:
+            self.pre_deploy.on_event_handler.add_to_role_policy(statement)
+        if self.post_deploy:
+            self.post_deploy.on_event_handler.add_to_role_policy(statement)
+        for function in self.api_functions:
+            function.handler.add_to_role_policy(statement)
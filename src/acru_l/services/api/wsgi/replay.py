@@ -0,0 +1,432 @@
+"""
+Replays API Gateway requests against the WSGI Lambda handler locally and
+reports latency per endpoint. No AWS access is needed. The handler needs
+apig-wsgi, installed with the `replay` extra (`pip install acru-l[replay]`).
+
+Usage:
+    acrul-replay --wsgi-application myproject.wsgi.application \\
+        --request "GET /health" --request "GET /items?page=2" \\
+        --iterations 200 --workers 4 --payload-format 2.0
+
+Requests can also be read from a JSON lines file (`--requests-file`).
+Each line is either a recorded API Gateway event or a request spec:
+
+    {"method": "GET", "path": "/items", "query": "page=2",
+     "headers": {"accept": "application/json"}, "body": ""}
+"""
+import base64
+import importlib.util
+import json
+import math
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs
+
+import click
+from pydantic import BaseModel, Field
+
+wsgi_dirname = os.path.dirname(__file__)
+default_handler_path = os.path.join(wsgi_dirname, "src")
+
+
+class ReplayRequest(BaseModel):
+    method: str = "GET"
+    path: str = "/"
+    query: str = ""
+    headers: Dict[str, str] = Field(default_factory=dict)
+    body: str = ""
+    is_base64_encoded: bool = False
+    event: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "ReplayRequest":
+        """
+        Parses "METHOD /path?query".
+        """
+        method, _, target = spec.strip().partition(" ")
+        if not target:
+            method, target = "GET", method
+        path, _, query = target.partition("?")
+        return cls(method=method.upper(), path=path, query=query)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ReplayRequest":
+        if "httpMethod" in data or "requestContext" in data:
+            method, path = event_endpoint(data)
+            return cls(method=method, path=path, event=data)
+        request = cls(**data)
+        request.method = request.method.upper()
+        return request
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.method} {self.path}"
+
+    def event_v1(self) -> Dict[str, Any]:
+        query = parse_qs(self.query, keep_blank_values=True)
+        headers = {"Host": "localhost", **self.headers}
+        return {
+            "version": "1.0",
+            "resource": "$default",
+            "path": self.path,
+            "httpMethod": self.method,
+            "headers": headers,
+            "multiValueHeaders": {k: [v] for k, v in headers.items()},
+            "queryStringParameters": {k: v[-1] for k, v in query.items()}
+            or None,
+            "multiValueQueryStringParameters": query or None,
+            "requestContext": {
+                "httpMethod": self.method,
+                "path": self.path,
+                "requestId": uuid.uuid4().hex,
+                "identity": {"sourceIp": "127.0.0.1"},
+            },
+            "body": self.body or None,
+            "isBase64Encoded": self.is_base64_encoded,
+        }
+
+    def event_v2(self) -> Dict[str, Any]:
+        headers = {"host": "localhost"}
+        cookies = []
+        for key, value in self.headers.items():
+            if key.lower() == "cookie":
+                cookies += [c.strip() for c in value.split(";") if c.strip()]
+            else:
+                headers[key.lower()] = value
+        return {
+            "version": "2.0",
+            "routeKey": "$default",
+            "rawPath": self.path,
+            "rawQueryString": self.query,
+            "cookies": cookies,
+            "headers": headers,
+            "requestContext": {
+                "http": {
+                    "method": self.method,
+                    "path": self.path,
+                    "protocol": "HTTP/1.1",
+                    "sourceIp": "127.0.0.1",
+                    "userAgent": headers.get("user-agent", "acrul-replay"),
+                },
+                "requestId": uuid.uuid4().hex,
+                "routeKey": "$default",
+                "stage": "$default",
+            },
+            "body": self.body,
+            "isBase64Encoded": self.is_base64_encoded,
+        }
+
+    def to_event(self, payload_format: str) -> Dict[str, Any]:
+        if self.event is not None:
+            return self.event
+        if payload_format == "2.0":
+            return self.event_v2()
+        return self.event_v1()
+
+
+def event_endpoint(event: Dict[str, Any]) -> Tuple[str, str]:
+    if "httpMethod" in event:
+        return event["httpMethod"], event["path"]
+    http = event["requestContext"]["http"]
+    return http["method"], event.get("rawPath", http["path"])
+
+
+def load_requests(path: str) -> List[ReplayRequest]:
+    with open(path) as f:
+        return [
+            ReplayRequest.from_dict(json.loads(line))
+            for line in f
+            if line.strip()
+        ]
+
+
+class LambdaContext:
+    function_name = "acrul-replay"
+    function_version = "$LATEST"
+    memory_limit_in_mb = 1024
+
+    def __init__(self, timeout: float = 300):
+        self.aws_request_id = uuid.uuid4().hex
+        self.deadline = time.monotonic() + timeout
+
+    def get_remaining_time_in_millis(self) -> int:
+        return int((self.deadline - time.monotonic()) * 1000)
+
+
+def current_rss() -> int:
+    """
+    Resident set size in bytes (peak RSS where /proc is unavailable).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def load_handler(handler_path: str, environment: Dict[str, str]):
+    os.environ.update(environment)
+    if handler_path not in sys.path:
+        sys.path.insert(0, handler_path)
+    spec = importlib.util.spec_from_file_location(
+        "handler", os.path.join(handler_path, "handler.py")
+    )
+    handler = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(handler)
+    return handler
+
+
+class Sample(NamedTuple):
+    endpoint: str
+    seconds: float
+    status: int
+    rss_delta: int
+    response_bytes: int
+
+
+class WorkerResult(NamedTuple):
+    init_seconds: float
+    init_rss_delta: int
+    wall_seconds: float
+    samples: List[Sample]
+
+
+def run_worker(
+    handler_path: str,
+    environment: Dict[str, str],
+    requests: List[ReplayRequest],
+    iterations: int,
+    payload_format: str,
+) -> WorkerResult:
+    rss = current_rss()
+    start = time.perf_counter()
+    handler = load_handler(handler_path, environment)
+    init_seconds = time.perf_counter() - start
+    init_rss_delta = current_rss() - rss
+
+    samples = []
+    wall_start = time.perf_counter()
+    for iteration in range(iterations):
+        request = requests[iteration % len(requests)]
+        event = request.to_event(payload_format)
+        rss = current_rss()
+        start = time.perf_counter()
+        response = handler.main(event, LambdaContext())
+        seconds = time.perf_counter() - start
+        body = response.get("body") or ""
+        if response.get("isBase64Encoded"):
+            response_bytes = len(base64.b64decode(body))
+        else:
+            response_bytes = len(body.encode())
+        samples.append(
+            Sample(
+                endpoint=request.endpoint,
+                seconds=seconds,
+                status=response.get("statusCode", 0),
+                rss_delta=current_rss() - rss,
+                response_bytes=response_bytes,
+            )
+        )
+    return WorkerResult(
+        init_seconds=init_seconds,
+        init_rss_delta=init_rss_delta,
+        wall_seconds=time.perf_counter() - wall_start,
+        samples=samples,
+    )
+
+
+def run(
+    *,
+    handler_path: str,
+    environment: Dict[str, str],
+    requests: List[ReplayRequest],
+    iterations: int,
+    workers: int = 1,
+    payload_format: str = "1.0",
+) -> List[WorkerResult]:
+    """
+    Runs the requests in-process (workers=1) or in a pool of fresh
+    processes, each standing in for a separate Lambda container.
+    """
+    if workers <= 1:
+        return [
+            run_worker(
+                handler_path,
+                environment,
+                requests,
+                iterations,
+                payload_format,
+            )
+        ]
+    shares = [iterations // workers] * workers
+    for index in range(iterations % workers):
+        shares[index] += 1
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as executor:
+        futures = [
+            executor.submit(
+                run_worker,
+                handler_path,
+                environment,
+                requests,
+                share,
+                payload_format,
+            )
+            for share in shares
+            if share
+        ]
+        return [future.result() for future in futures]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # nearest rank
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def summarize(results: List[WorkerResult]) -> Dict[str, Any]:
+    by_endpoint: Dict[str, List[Sample]] = {}
+    for result in results:
+        for sample in result.samples:
+            by_endpoint.setdefault(sample.endpoint, []).append(sample)
+
+    # workers run side by side, so the slowest one bounds the wall time
+    wall_seconds = max((r.wall_seconds for r in results), default=0.0)
+    endpoints = {}
+    for endpoint, samples in by_endpoint.items():
+        latencies = [s.seconds * 1000 for s in samples]
+        endpoints[endpoint] = {
+            "requests": len(samples),
+            "errors": sum(1 for s in samples if s.status >= 500),
+            "mean_ms": statistics.mean(latencies),
+            "p50_ms": percentile(latencies, 50),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": max(latencies),
+            "throughput_rps": len(samples) / wall_seconds
+            if wall_seconds
+            else 0.0,
+            "memory_growth_bytes": sum(s.rss_delta for s in samples),
+            "mean_response_bytes": statistics.mean(
+                s.response_bytes for s in samples
+            ),
+        }
+    init_times = [r.init_seconds * 1000 for r in results]
+    total = sum(len(r.samples) for r in results)
+    return {
+        "workers": len(results),
+        "cold_init_ms": {
+            "mean": statistics.mean(init_times) if init_times else 0.0,
+            "max": max(init_times, default=0.0),
+        },
+        "init_memory_bytes": max(
+            (r.init_rss_delta for r in results), default=0
+        ),
+        "requests": total,
+        "throughput_rps": total / wall_seconds if wall_seconds else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"workers: {report['workers']}  requests: {report['requests']}  "
+        f"throughput: {report['throughput_rps']:.1f} req/s",
+        f"cold init: mean {report['cold_init_ms']['mean']:.1f} ms, "
+        f"max {report['cold_init_ms']['max']:.1f} ms, "
+        f"memory +{report['init_memory_bytes'] / 1024 / 1024:.1f} MiB",
+        "",
+        f"{'endpoint':<40} {'n':>6} {'p50 ms':>9} {'p99 ms':>9} "
+        f"{'req/s':>9} {'mem KiB':>9} {'5xx':>5}",
+    ]
+    for endpoint, stats in sorted(report["endpoints"].items()):
+        lines.append(
+            f"{endpoint[:40]:<40} {stats['requests']:>6} "
+            f"{stats['p50_ms']:>9.2f} {stats['p99_ms']:>9.2f} "
+            f"{stats['throughput_rps']:>9.1f} "
+            f"{stats['memory_growth_bytes'] / 1024:>9.0f} "
+            f"{stats['errors']:>5}"
+        )
+    return "\n".join(lines)
+
+
+@click.command()
+@click.option("--wsgi-application", help="Dotted path, e.g. app.wsgi.app")
+@click.option(
+    "--handler-path",
+    default=default_handler_path,
+    show_default=True,
+    help="Directory containing handler.py",
+)
+@click.option("--request", "request_specs", multiple=True)
+@click.option("--requests-file", type=click.Path(exists=True))
+@click.option("--iterations", default=100, show_default=True)
+@click.option("--workers", default=1, show_default=True)
+@click.option(
+    "--payload-format",
+    type=click.Choice(["1.0", "2.0"]),
+    default="1.0",
+    show_default=True,
+)
+@click.option("--env", "env_vars", multiple=True, help="KEY=VALUE")
+@click.option("--json", "as_json", is_flag=True, help="Print JSON")
+def main(
+    wsgi_application,
+    handler_path,
+    request_specs,
+    requests_file,
+    iterations,
+    workers,
+    payload_format,
+    env_vars,
+    as_json,
+):
+    environment = dict(var.split("=", 1) for var in env_vars)
+    if wsgi_application:
+        environment["WSGI_APPLICATION"] = wsgi_application
+    if "WSGI_APPLICATION" not in {**os.environ, **environment}:
+        raise click.UsageError("WSGI_APPLICATION is required")
+
+    requests = [ReplayRequest.parse(spec) for spec in request_specs]
+    if requests_file:
+        requests += load_requests(requests_file)
+    if not requests:
+        requests = [ReplayRequest()]
+
+    try:
+        import apig_wsgi  # noqa: F401
+    except ImportError:
+        raise click.ClickException(
+            "apig-wsgi is required, install acru-l[replay]"
+        )
+
+    # the application's modules are resolved from the working directory
+    sys.path.insert(0, os.getcwd())
+    results = run(
+        handler_path=os.path.abspath(handler_path),
+        environment=environment,
+        requests=requests,
+        iterations=iterations,
+        workers=workers,
+        payload_format=payload_format,
+    )
+    report = summarize(results)
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+    else:
+        click.echo(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
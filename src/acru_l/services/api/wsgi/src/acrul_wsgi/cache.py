@@ -0,0 +1,265 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .utils import close_result, get_header
+
+DEFAULT_KEY_HEADERS = ("Accept", "Accept-Encoding", "Accept-Language")
+
+
+class CacheEntry(NamedTuple):
+    status: str
+    headers: List[Tuple[str, str]]
+    body: bytes
+    stored_at: float
+    expires_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers)
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for item in (value or "").split(","):
+        name, _, argument = item.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+class LRUCache:
+    """
+    Least recently used cache bounded by entry count and total bytes.
+    """
+
+    def __init__(self, *, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries: "OrderedDict[Tuple, CacheEntry]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Tuple, now: float) -> Optional[CacheEntry]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= now:
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key: Tuple, entry: CacheEntry) -> int:
+        """
+        Stores the entry and returns the number of evicted entries.
+        """
+        evicted = 0
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = entry
+            self.size += entry.size
+            while self.entries and (
+                len(self.entries) > self.max_entries
+                or self.size > self.max_bytes
+            ):
+                self._remove(next(iter(self.entries)))
+                evicted += 1
+        return evicted
+
+    def _remove(self, key: Tuple):
+        entry = self.entries.pop(key)
+        self.size -= entry.size
+
+
+def print_metrics(namespace: str, counters: Dict[str, int]):
+    # CloudWatch embedded metric format, picked up from the function logs
+    print(
+        json.dumps(
+            {
+                "_aws": {
+                    "Timestamp": int(time.time() * 1000),
+                    "CloudWatchMetrics": [
+                        {
+                            "Namespace": namespace,
+                            "Dimensions": [[]],
+                            "Metrics": [
+                                {"Name": name, "Unit": "Count"}
+                                for name in counters
+                            ],
+                        }
+                    ],
+                },
+                **counters,
+            }
+        )
+    )
+
+
+class ResponseCacheMiddleware:
+    """
+    WSGI middleware that keeps GET/HEAD responses in memory for as long
+    as the application's Cache-Control allows (capped by `max_ttl`).
+
+    Only 200 responses with a max-age or s-maxage are stored.
+    Requests carrying credentials bypass the cache unless the credential
+    header is part of `key_headers`.
+
+    Hit, miss, store, bypass and eviction counts are kept in `stats` and
+    emitted every `metrics_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        application,
+        *,
+        max_entries: int = 256,
+        max_bytes: int = 32 * 1024 * 1024,
+        max_entry_bytes: int = 1024 * 1024,
+        max_ttl: int = 300,
+        key_headers: Iterable[str] = DEFAULT_KEY_HEADERS,
+        metrics_namespace: Optional[str] = None,
+        metrics_interval: int = 60,
+        emit_metrics: Callable[[str, Dict[str, int]], None] = print_metrics,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.application = application
+        self.cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+        self.max_entry_bytes = max_entry_bytes
+        self.max_ttl = max_ttl
+        self.key_headers = [header.lower() for header in key_headers]
+        self.metrics_namespace = metrics_namespace
+        self.metrics_interval = metrics_interval
+        self.emit_metrics = emit_metrics
+        self.clock = clock
+        self.stats = dict.fromkeys(
+            ("Hits", "Misses", "Stores", "Bypasses", "Evictions"), 0
+        )
+        self._emitted = dict(self.stats)
+        self._last_emit = clock()
+
+    def environ_key(self, header: str) -> str:
+        header = header.upper().replace("-", "_")
+        if header == "CONTENT_TYPE":
+            return header
+        return f"HTTP_{header}"
+
+    def cache_key(self, environ) -> Optional[Tuple]:
+        if environ.get("REQUEST_METHOD") not in ("GET", "HEAD"):
+            return None
+        for credential in ("authorization", "cookie"):
+            if (
+                environ.get(self.environ_key(credential))
+                and credential not in self.key_headers
+            ):
+                return None
+        request_directives = parse_cache_control(
+            environ.get("HTTP_CACHE_CONTROL")
+        )
+        if (
+            "no-cache" in request_directives
+            or "no-store" in request_directives
+        ):
+            return None
+        return (
+            environ["REQUEST_METHOD"],
+            environ.get("PATH_INFO", ""),
+            environ.get("QUERY_STRING", ""),
+        ) + tuple(
+            environ.get(self.environ_key(header), "")
+            for header in self.key_headers
+        )
+
+    def ttl(self, status: str, headers: List[Tuple[str, str]]) -> int:
+        if not status.startswith("200"):
+            return 0
+        if get_header(headers, "set-cookie"):
+            return 0
+        vary = ",".join(v for k, v in headers if k.lower() == "vary")
+        for header in vary.split(","):
+            header = header.strip().lower()
+            if header and header not in self.key_headers:
+                return 0
+        directives = parse_cache_control(get_header(headers, "cache-control"))
+        if {"private", "no-store", "no-cache"} & directives.keys():
+            return 0
+        max_age = directives.get("s-maxage") or directives.get("max-age")
+        try:
+            ttl = int(max_age) if max_age else 0
+        except ValueError:
+            return 0
+        return min(ttl, self.max_ttl)
+
+    def __call__(self, environ, start_response):
+        try:
+            return self.respond(environ, start_response)
+        finally:
+            self.maybe_emit_metrics()
+
+    def respond(self, environ, start_response):
+        key = self.cache_key(environ)
+        if key is None:
+            self.stats["Bypasses"] += 1
+            return self.application(environ, start_response)
+
+        now = self.clock()
+        entry = self.cache.get(key, now)
+        if entry is not None:
+            self.stats["Hits"] += 1
+            age = str(int(now - entry.stored_at))
+            start_response(
+                entry.status,
+                entry.headers + [("Age", age), ("X-Cache", "Hit")],
+            )
+            return [entry.body]
+
+        self.stats["Misses"] += 1
+        response = {}
+        buffer = BytesIO()
+
+        def buffered_start_response(status, headers, exc_info=None):
+            response["status"] = status
+            response["headers"] = list(headers)
+            response["exc_info"] = exc_info
+            return buffer.write
+
+        result = self.application(environ, buffered_start_response)
+        try:
+            for data in result:
+                if data:
+                    buffer.write(data)
+        finally:
+            close_result(result)
+
+        status = response["status"]
+        headers = response["headers"]
+        body = buffer.getvalue()
+        ttl = self.ttl(status, headers)
+        if ttl > 0 and len(body) <= self.max_entry_bytes:
+            self.stats["Stores"] += 1
+            self.stats["Evictions"] += self.cache.set(
+                key, CacheEntry(status, headers, body, now, now + ttl)
+            )
+        start_response(
+            status, headers + [("X-Cache", "Miss")], response["exc_info"]
+        )
+        return [body]
+
+    def maybe_emit_metrics(self):
+        if not self.metrics_namespace:
+            return
+        now = self.clock()
+        if now - self._last_emit < self.metrics_interval:
+            return
+        counters = {
+            name: value - self._emitted[name]
+            for name, value in self.stats.items()
+        }
+        self._emitted = dict(self.stats)
+        self._last_emit = now
+        self.emit_metrics(self.metrics_namespace, counters)
@@ -0,0 +1,203 @@
+import gzip
+from importlib import metadata
+from io import BytesIO
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .utils import close_result, get_header
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+DEFAULT_CONTENT_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/problem+json",
+    "application/vnd.api+json",
+    "image/svg+xml",
+)
+
+
+# apig_wsgi returns any Content-Encoding base64 encoded from 2.19, earlier
+# releases only gzip, so their brotli bodies of non-binary content types
+# would be sent as (corrupted) text
+APIG_WSGI_ANY_ENCODING = (2, 19)
+
+
+def apig_wsgi_version() -> Tuple[int, ...]:
+    for name in ("apig-wsgi", "apig_wsgi"):
+        try:
+            version = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            continue
+        return tuple(int(part) for part in version.split(".")[:2])
+    return ()
+
+
+def binary_safe_encodings(
+    encodings: Iterable[str], version: Optional[Tuple[int, ...]] = None
+) -> List[str]:
+    """
+    The encodings apig_wsgi `version` returns base64 encoded.
+    """
+    if version is None:
+        version = apig_wsgi_version()
+    if version >= APIG_WSGI_ANY_ENCODING:
+        return list(encodings)
+    return [encoding for encoding in encodings if encoding == "gzip"]
+
+
+def _gzip(data: bytes, level: int) -> bytes:
+    return gzip.compress(data, compresslevel=level)
+
+
+def _brotli(data: bytes, level: int) -> bytes:
+    # brotli quality goes up to 11, gzip levels up to 9
+    return brotli.compress(data, quality=min(level, 11))
+
+
+COMPRESSORS: Dict[str, Callable[[bytes, int], bytes]] = {"gzip": _gzip}
+if brotli is not None:
+    COMPRESSORS["br"] = _brotli
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    accepted = {}
+    for item in value.split(","):
+        parts = item.strip().split(";")
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            key, _, q = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(q)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    WSGI middleware that compresses buffered responses with gzip or
+    brotli, negotiated on the request's Accept-Encoding header.
+
+    Usage:
+        application = CompressionMiddleware(
+            application, encodings=["br", "gzip"], min_size=1024
+        )
+    """
+
+    def __init__(
+        self,
+        application,
+        *,
+        encodings: Iterable[str] = ("br", "gzip"),
+        min_size: int = 1024,
+        content_types: Iterable[str] = DEFAULT_CONTENT_TYPES,
+        level: int = 6,
+    ):
+        self.application = application
+        # server preference order, limited to what is installed
+        self.encodings = [
+            encoding.lower()
+            for encoding in encodings
+            if encoding.lower() in COMPRESSORS
+        ]
+        self.min_size = min_size
+        self.content_types = tuple(ct.lower() for ct in content_types)
+        self.level = level
+
+    def negotiate(self, accept_encoding: str) -> Optional[str]:
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        candidates = [
+            (accepted.get(encoding, wildcard), encoding)
+            for encoding in self.encodings
+        ]
+        candidates = [item for item in candidates if item[0] > 0]
+        if not candidates:
+            return None
+        best = max(quality for quality, _ in candidates)
+        return next(enc for quality, enc in candidates if quality == best)
+
+    def should_compress(
+        self, environ, status: str, headers: List[Tuple[str, str]], body
+    ) -> bool:
+        if environ.get("REQUEST_METHOD") == "HEAD":
+            return False
+        status_code = int(status.split()[0])
+        if status_code < 200 or status_code in (204, 304):
+            return False
+        if get_header(headers, "content-encoding"):
+            return False
+        cache_control = get_header(headers, "cache-control") or ""
+        if "no-transform" in cache_control.lower():
+            return False
+        content_type = (get_header(headers, "content-type") or "").lower()
+        if not content_type.startswith(self.content_types):
+            return False
+        return len(body) >= self.min_size
+
+    def __call__(self, environ, start_response):
+        encoding = self.negotiate(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return self.application(environ, start_response)
+
+        response = {}
+        buffer = BytesIO()
+
+        def buffered_start_response(status, headers, exc_info=None):
+            response["status"] = status
+            response["headers"] = list(headers)
+            response["exc_info"] = exc_info
+            return buffer.write
+
+        result = self.application(environ, buffered_start_response)
+        try:
+            for data in result:
+                if data:
+                    buffer.write(data)
+        finally:
+            close_result(result)
+
+        status = response["status"]
+        headers = response["headers"]
+        body = buffer.getvalue()
+        if self.should_compress(environ, status, headers, body):
+            compressed = COMPRESSORS[encoding](body, self.level)
+            if len(compressed) < len(body):
+                body = compressed
+                headers = self.compressed_headers(headers, encoding, body)
+
+        start_response(status, headers, response["exc_info"])
+        return [body]
+
+    @staticmethod
+    def compressed_headers(
+        headers: List[Tuple[str, str]], encoding: str, body: bytes
+    ) -> List[Tuple[str, str]]:
+        vary = ", ".join(
+            value for key, value in headers if key.lower() == "vary"
+        )
+        headers = [
+            (key, value)
+            for key, value in headers
+            if key.lower() not in ("content-length", "vary")
+        ]
+        if not vary:
+            vary = "Accept-Encoding"
+        elif "accept-encoding" not in vary.lower() and vary != "*":
+            vary = f"{vary}, Accept-Encoding"
+        headers += [
+            ("Content-Encoding", encoding),
+            ("Content-Length", str(len(body))),
+            ("Vary", vary),
+        ]
+        return headers
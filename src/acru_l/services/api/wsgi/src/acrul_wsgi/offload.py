@@ -0,0 +1,113 @@
+import tempfile
+import uuid
+from typing import List, Tuple
+
+from .utils import close_result, get_header
+
+# base64 encoding grows the body by a third, this keeps the encoded
+# response below Lambda's 6MB payload limit.
+DEFAULT_THRESHOLD = 4 * 1024 * 1024
+
+
+class S3OffloadMiddleware:
+    """
+    WSGI middleware that moves responses larger than `threshold` bytes
+    into an S3 bucket and redirects the client to a presigned URL.
+
+    The body is spooled to disk once it outgrows the threshold and then
+    uploaded with a managed (multipart) transfer.
+
+    Usage:
+        application = S3OffloadMiddleware(
+            application,
+            client=boto3.client("s3"),
+            bucket_name=os.environ["PRIVATE_S3_BUCKET_NAME"],
+        )
+    """
+
+    def __init__(
+        self,
+        application,
+        *,
+        client,
+        bucket_name: str,
+        threshold: int = DEFAULT_THRESHOLD,
+        expires_in: int = 300,
+        prefix: str = "offload/",
+    ):
+        self.application = application
+        self.client = client
+        self.bucket_name = bucket_name
+        self.threshold = threshold
+        self.expires_in = expires_in
+        self.prefix = prefix
+
+    def __call__(self, environ, start_response):
+        response = {}
+        spool = tempfile.SpooledTemporaryFile(max_size=self.threshold)
+
+        def buffered_start_response(status, headers, exc_info=None):
+            response["status"] = status
+            response["headers"] = list(headers)
+            response["exc_info"] = exc_info
+            return spool.write
+
+        result = self.application(environ, buffered_start_response)
+        try:
+            for data in result:
+                if data:
+                    spool.write(data)
+        finally:
+            close_result(result)
+
+        status = response["status"]
+        headers = response["headers"]
+        size = spool.tell()
+        spool.seek(0)
+        with spool:
+            if size > self.threshold and status.startswith("200"):
+                url = self.upload(spool, headers)
+                start_response(
+                    "303 See Other",
+                    self.redirect_headers(headers, url),
+                    response["exc_info"],
+                )
+                return [b""]
+            body = spool.read()
+        start_response(status, headers, response["exc_info"])
+        return [body]
+
+    def upload(self, fileobj, headers: List[Tuple[str, str]]) -> str:
+        key = f"{self.prefix}{uuid.uuid4().hex}"
+        extra_args = {}
+        for header, arg in (
+            ("content-type", "ContentType"),
+            ("content-encoding", "ContentEncoding"),
+            ("content-disposition", "ContentDisposition"),
+        ):
+            value = get_header(headers, header)
+            if value:
+                extra_args[arg] = value
+        self.client.upload_fileobj(
+            fileobj, self.bucket_name, key, ExtraArgs=extra_args
+        )
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket_name, "Key": key},
+            ExpiresIn=self.expires_in,
+        )
+
+    @staticmethod
+    def redirect_headers(
+        headers: List[Tuple[str, str]], url: str
+    ) -> List[Tuple[str, str]]:
+        cookies = [
+            (key, value)
+            for key, value in headers
+            if key.lower() == "set-cookie"
+        ]
+        return cookies + [
+            ("Location", url),
+            ("Cache-Control", "no-store"),
+            ("Content-Length", "0"),
+        ]
@@ -0,0 +1,15 @@
+from typing import List, Optional, Tuple
+
+
+def get_header(headers: List[Tuple[str, str]], name: str) -> Optional[str]:
+    name = name.lower()
+    for key, value in reversed(headers):
+        if key.lower() == name:
+            return value
+    return None
+
+
+def close_result(result):
+    close = getattr(result, "close", None)
+    if close:
+        close()
@@ -3,13 +3,95 @@ import os
 from apig_wsgi import make_lambda_handler
 from acrul_toolkit.module_loading import import_string
 
+from acrul_wsgi.cache import DEFAULT_KEY_HEADERS, ResponseCacheMiddleware
+from acrul_wsgi.compression import (
+    CompressionMiddleware,
+    DEFAULT_CONTENT_TYPES,
+    binary_safe_encodings,
+)
+from acrul_wsgi.offload import S3OffloadMiddleware
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def env_list(name: str):
+    value = os.environ.get(name)
+    if not value:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+if os.environ.get("ACRUL_SECRET_ARNS"):
+    # prefetch secrets before the application's settings need them
+    import acrul_secrets  # noqa: F401
 
 WSGI_APPLICATION = os.environ.get("WSGI_APPLICATION")
+BINARY_SUPPORT = env_bool("API_BINARY_SUPPORT", default=True)
+NON_BINARY_CONTENT_TYPES = env_list("API_NON_BINARY_CONTENT_TYPES")
+COMPRESSION_ENCODINGS = binary_safe_encodings(
+    env_list("API_COMPRESSION_ENCODINGS") or []
+)
+OFFLOAD_THRESHOLD = os.environ.get("API_OFFLOAD_THRESHOLD")
+CACHE_MAX_ENTRIES = os.environ.get("API_CACHE_MAX_ENTRIES")
+
 application = import_string(WSGI_APPLICATION)
-handle_request = make_lambda_handler(application, binary_support=True)
+# compressed bodies can only be returned base64 encoded
+if COMPRESSION_ENCODINGS and BINARY_SUPPORT:
+    application = CompressionMiddleware(
+        application,
+        encodings=COMPRESSION_ENCODINGS,
+        min_size=int(os.environ.get("API_COMPRESSION_MIN_SIZE", 1024)),
+        content_types=env_list("API_COMPRESSION_CONTENT_TYPES")
+        or DEFAULT_CONTENT_TYPES,
+        level=int(os.environ.get("API_COMPRESSION_LEVEL", 6)),
+    )
+if CACHE_MAX_ENTRIES:
+    application = ResponseCacheMiddleware(
+        application,
+        max_entries=int(CACHE_MAX_ENTRIES),
+        max_bytes=int(os.environ.get("API_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+        max_entry_bytes=int(
+            os.environ.get("API_CACHE_MAX_ENTRY_BYTES", 1024 * 1024)
+        ),
+        max_ttl=int(os.environ.get("API_CACHE_MAX_TTL", 300)),
+        key_headers=env_list("API_CACHE_KEY_HEADERS") or DEFAULT_KEY_HEADERS,
+        metrics_namespace=os.environ.get("API_CACHE_METRICS_NAMESPACE"),
+        metrics_interval=int(os.environ.get("API_CACHE_METRICS_INTERVAL", 60)),
+    )
+if OFFLOAD_THRESHOLD:
+    import boto3
+    from botocore.config import Config
+
+    application = S3OffloadMiddleware(
+        application,
+        client=boto3.client("s3", config=Config(signature_version="s3v4")),
+        bucket_name=os.environ["PRIVATE_S3_BUCKET_NAME"],
+        threshold=int(OFFLOAD_THRESHOLD),
+        expires_in=int(os.environ.get("API_OFFLOAD_EXPIRES_IN", 300)),
+        prefix=os.environ.get("API_OFFLOAD_PREFIX", "offload/"),
+    )
+handle_request = make_lambda_handler(
+    application,
+    binary_support=BINARY_SUPPORT,
+    non_binary_content_type_prefixes=NON_BINARY_CONTENT_TYPES,
+)
+
+
+def is_http_event(event) -> bool:
+    # payload format 1.0
+    if "httpMethod" in event:
+        return True
+    # payload format 2.0
+    request_context = event.get("requestContext") or {}
+    return event.get("version") == "2.0" and "http" in request_context
 
 
 def main(event, context):
-    if "httpMethod" not in event:
+    if not is_http_event(event):
         return {"status": "success"}
     return handle_request(event, context)
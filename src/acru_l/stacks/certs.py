@@ -5,6 +5,7 @@ from pydantic import BaseModel, Field
 
 from acru_l.core import Stack, StackFactory
 from acru_l.resources.hosted_zone import HostedZone
+from acru_l.resources.lookups import lookup_hosted_zone
 
 
 class HostedZoneFactory(BaseModel):
@@ -57,8 +58,8 @@ class CertsFactory(BaseModel):
         if self.hosted_zone:
             hosted_zone = self.hosted_zone.build(scope)
         else:
-            hosted_zone = route53.HostedZone.from_lookup(
-                scope, self.name, domain_name=self.hosted_zone_domain_name
+            hosted_zone = lookup_hosted_zone(
+                scope, self.hosted_zone_domain_name
             )
 
         for cert_options in self.certificates:
@@ -0,0 +1,102 @@
+from typing import Dict, List, Optional
+
+from aws_cdk import core, aws_ec2 as ec2
+from pydantic import BaseModel, Field
+
+from acru_l.core import Stack, StackFactory
+from acru_l.resources.dynamodb import (
+    DynamoDB,
+    DynamoDBOptions,
+    StreamConsumer,
+    StreamConsumerOptions,
+)
+from acru_l.resources.functions import Function, apply_profile
+from acru_l.resources.lookups import lookup_vpc
+
+
+class StreamConsumerFunctionOptions(BaseModel):
+    name: str
+    source_path: str
+    handler_path: str = "handler.main"
+    environment: Dict[str, str] = Field(default_factory=dict)
+    # name of an entry under `profiles` in acru-l.toml
+    profile: Optional[str] = None
+    options: StreamConsumerOptions = Field(
+        default_factory=StreamConsumerOptions
+    )
+
+
+class DynamoDBStackOptions(BaseModel):
+    table: DynamoDBOptions
+    export_name: Optional[str] = None
+    stream_export_name: Optional[str] = None
+    # required by `table.dax`
+    vpc_name: Optional[str] = None
+    stream_consumers: List[StreamConsumerFunctionOptions] = Field(
+        default_factory=list
+    )
+
+
+class DynamoDBStack(Stack):
+    table: DynamoDB
+
+    def build(self, options: DynamoDBStackOptions):
+        vpc = None
+        if options.vpc_name:
+            vpc = lookup_vpc(self, options.vpc_name)
+        self.table = DynamoDB.from_options(
+            self, "DynamoDB", vpc=vpc, options=options.table
+        )
+        if options.export_name:
+            core.CfnOutput(
+                self,
+                "TableARNExport",
+                value=self.table.table.table_arn,
+                export_name=options.export_name,
+            )
+        if options.stream_export_name and options.table.stream:
+            core.CfnOutput(
+                self,
+                "TableStreamARNExport",
+                value=self.table.table.table_stream_arn,
+                export_name=options.stream_export_name,
+            )
+
+        for consumer in options.stream_consumers:
+            self.add_stream_consumer(vpc=vpc, options=consumer)
+
+    def add_stream_consumer(
+        self,
+        *,
+        vpc: Optional[ec2.IVpc],
+        options: StreamConsumerFunctionOptions,
+    ) -> StreamConsumer:
+        settings = apply_profile(self, options.profile, {})
+        function = Function(
+            self,
+            options.name,
+            source_path=options.source_path,
+            handler_path=options.handler_path,
+            layers=[],
+            vpc=vpc,
+            environment_variables={
+                **self.table.environment,
+                **options.environment,
+            },
+            policy_statements=self.table.policy_statements,
+            **settings,
+        )
+        if self.table.connections:
+            self.table.connections.allow_default_port_from(function.handler)
+        return StreamConsumer(
+            self,
+            f"{options.name}Stream",
+            table=self.table,
+            function=function,
+            options=options.options,
+        )
+
+
+class DynamoDBStackFactory(StackFactory):
+    stack_class = DynamoDBStack
+    options_class = DynamoDBStackOptions
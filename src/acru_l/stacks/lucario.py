@@ -4,11 +4,17 @@ from aws_cdk import (
     core,
     aws_ec2 as ec2,
     aws_certificatemanager as acm,
-    aws_route53 as route53,
 )
-from pydantic import BaseModel
+from pydantic import BaseModel, root_validator
 
 from acru_l.core import Stack, StackFactory
+from acru_l.resources.dynamodb import DynamoDB, DynamoDBOptions
+from acru_l.resources.lookups import lookup_hosted_zone, lookup_vpc
+from acru_l.resources.elasticache import RedisCluster, RedisOptions
+from acru_l.resources.rds.aurora import (
+    AuroraClusterOptions,
+    AuroraPostgresCluster,
+)
 from acru_l.resources.rds.instances import PostgresInstance, RDSInstanceOptions
 from acru_l.services.api.base import ServiceOptions
 from acru_l.services.api.wsgi import WSGIService
@@ -21,17 +27,27 @@ class LucarioOptions(BaseModel):
     vpc_name: str
     service_options: ServiceOptions
     rds_options: Optional[RDSInstanceOptions]
+    # provisioned Aurora instead of an RDS instance
+    aurora_options: Optional[AuroraClusterOptions] = None
+    redis_options: Optional[RedisOptions] = None
+    dynamodb_options: Optional[DynamoDBOptions] = None
+
+    @root_validator(skip_on_failure=True)
+    def check_database(cls, values):
+        if values.get("rds_options") and values.get("aurora_options"):
+            raise ValueError("set either rds_options or aurora_options")
+        return values
 
 
 class LucarioStack(Stack):
     """
     WSGI
     POSTGRES
+    REDIS
+    DYNAMODB
     LAMBDA
     API GATEWAY
 
-    TODO: add REDIS
-
     Prerequisites:
     VPC
     HOSTED_ZONE
@@ -41,32 +57,26 @@ class LucarioStack(Stack):
     service: WSGIService
 
     def build(self, options: LucarioOptions):
-        vpc = ec2.Vpc.from_lookup(self, "VPC", vpc_name=options.vpc_name)
-        hosted_zone = route53.HostedZone.from_lookup(
-            self, "HostedZone", domain_name=options.hosted_zone_domain_name
-        )
+        vpc = lookup_vpc(self, options.vpc_name)
+        hosted_zone = lookup_hosted_zone(self, options.hosted_zone_domain_name)
 
         service_options = options.service_options
 
-        db_options = options.rds_options
-        database = None
-        if db_options is not None:
-            database = PostgresInstance(
-                self, "PG", vpc=vpc, options=db_options
-            )
+        database = self.add_database(vpc, options)
 
-            service_options.environment.update(
-                {
-                    "DB_NAME": database.db_name,
-                    "DB_USERNAME": database.db_username,
-                    "DB_HOST": database.endpoint_address,
-                    "DB_PORT": database.endpoint_port,
-                    "DB_SECRET_ID": database.creds.secret_arn,
-                }
+        redis = None
+        if options.redis_options is not None:
+            redis = RedisCluster(
+                self, "Redis", vpc=vpc, options=options.redis_options
             )
-            service_options.secret_arns += [database.creds.secret_arn]
+            service_options.environment.update(redis.environment)
 
-        # TODO: Add options for Redis Elasticache
+        table = None
+        if options.dynamodb_options is not None:
+            table = DynamoDB.from_options(
+                self, "DynamoDB", vpc=vpc, options=options.dynamodb_options
+            )
+            service_options.environment.update(table.environment)
 
         certificate = acm.Certificate.from_certificate_arn(
             self,
@@ -83,13 +93,51 @@ class LucarioStack(Stack):
             deploy_id=self.deploy_id,
             options=service_options,
         )
-        # TODO: add dependency from db to service so that the build happens
-        #       in the right order.
-        # if database:
-        #     self.service.allow_connection_to(
-        #         database.connection_interface,
-        #         ec2.Port.tcp(database.port)
-        #     )
+        if database:
+            self.service.allow_connection_to(
+                database.connection_interface, ec2.Port.tcp(database.port)
+            )
+        if redis:
+            self.service.allow_connection_to(redis, ec2.Port.tcp(redis.port))
+        if table:
+            for statement in table.policy_statements:
+                self.service.add_to_role_policy(statement)
+            if table.connections:
+                self.service.allow_connection_to(
+                    table, ec2.Port.tcp(table.dax_port)
+                )
+
+    def add_database(self, vpc: ec2.IVpc, options: LucarioOptions):
+        """
+        Creates the RDS instance or Aurora cluster, if any, and points the
+        service environment at it.
+        """
+        service_options = options.service_options
+        database = None
+        if options.rds_options is not None:
+            database = PostgresInstance(
+                self, "PG", vpc=vpc, options=options.rds_options
+            )
+        elif options.aurora_options is not None:
+            database = AuroraPostgresCluster(
+                self, "Aurora", vpc=vpc, options=options.aurora_options
+            )
+        if database is not None:
+            service_options.environment.update(
+                {
+                    "DB_NAME": database.db_name,
+                    "DB_USERNAME": database.db_username,
+                    "DB_HOST": database.endpoint_address,
+                    "DB_PORT": database.endpoint_port,
+                    "DB_SECRET_ID": database.creds.secret_arn,
+                }
+            )
+            if database.reader_endpoint_addresses:
+                service_options.environment["DB_READ_HOSTS"] = ",".join(
+                    database.reader_endpoint_addresses
+                )
+            service_options.secret_arns += [database.creds.secret_arn]
+        return database
 
 
 class LucarioStackFactory(StackFactory):
@@ -1,6 +1,7 @@
-from typing import Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from aws_cdk import aws_ec2 as ec2
+from pydantic import BaseModel, Field, validator
 
 from acru_l.core import Stack, StackFactory
 from acru_l.resources.vpc import VPC
@@ -11,6 +12,27 @@ class VpcOptions(BaseModel):
     name: str
     cidr: str
     export_name: str
+    gateway_endpoints: List[Literal["S3", "DYNAMODB"]] = ["S3", "DYNAMODB"]
+    # ec2.InterfaceVpcEndpointAwsService names, e.g. "SECRETS_MANAGER",
+    # or full service names such as "com.amazonaws.us-east-1.xray"
+    interface_endpoints: List[str] = Field(default_factory=list)
+    private_dns: bool = True
+    # defaults to every AZ of the region for environment-specific stacks
+    max_azs: Optional[int] = Field(None, ge=1)
+    # one NAT gateway per AZ instead of one for the VPC
+    nat_per_az: bool = False
+    public_mask: int = Field(24, ge=16, le=28)
+    private_mask: int = Field(24, ge=16, le=28)
+    # adds isolated "Database" subnets with this mask
+    database_mask: Optional[int] = Field(None, ge=16, le=28)
+
+    @validator("interface_endpoints", each_item=True)
+    def check_interface_endpoint(cls, value):
+        if value.startswith("com.amazonaws."):
+            return value
+        if not hasattr(ec2.InterfaceVpcEndpointAwsService, value):
+            raise ValueError(f"unknown interface endpoint service: {value}")
+        return value
 
 
 class NetworkOptions(BaseModel):
@@ -26,6 +48,14 @@ class NetworkStack(Stack):
             name=options.vpc.name,
             cidr=options.vpc.cidr,
             export_name=options.vpc.export_name,
+            gateway_endpoints=options.vpc.gateway_endpoints,
+            interface_endpoints=options.vpc.interface_endpoints,
+            private_dns=options.vpc.private_dns,
+            max_azs=options.vpc.max_azs,
+            nat_per_az=options.vpc.nat_per_az,
+            public_mask=options.vpc.public_mask,
+            private_mask=options.vpc.private_mask,
+            database_mask=options.vpc.database_mask,
         )
         if options.hosted_zone is not None:
             options.hosted_zone.build(self)
@@ -0,0 +1,19 @@
+import importlib.util
+import os
+from types import ModuleType
+
+
+def load_layer_module(package: ModuleType, name: str) -> ModuleType:
+    """
+    Load the runtime module `name` of the layer shipped next to the
+    resources `package`, which is not importable outside of Lambda.
+    """
+    assert package.__file__ is not None, package
+    path = os.path.join(
+        os.path.dirname(package.__file__), "layer", "python", f"{name}.py"
+    )
+    spec = importlib.util.spec_from_file_location(name, path)
+    assert spec is not None and spec.loader is not None, path
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
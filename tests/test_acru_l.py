@@ -1,6 +1,13 @@
+import json
 import os
 
+import pytest
+from aws_cdk import core
+from pydantic import ValidationError
+
 from acru_l.core import app_factory
+from acru_l.resources.lookups import LOOKUPS_CONTEXT_KEY, lookup_cache
+from acru_l.services.api.base import OffloadOptions, RouteOptions
 
 
 os.environ.setdefault("FOO", "bar")
@@ -22,6 +29,28 @@ def test_network_stack_factory():
     assert output.get_stack("MyNetwork")
 
 
+def test_network_vpc_endpoints():
+    output = run_synth("./tests/fixtures/config/network.toml")
+    stack = output.get_stack("MyNetwork")
+    endpoints = resources_of_type(stack, "AWS::EC2::VPCEndpoint").values()
+    gateways = [
+        e for e in endpoints if e.get("VpcEndpointType") != "Interface"
+    ]
+    interfaces = [
+        e for e in endpoints if e.get("VpcEndpointType") == "Interface"
+    ]
+    assert len(gateways) == 2
+    assert len(interfaces) == 3
+    assert all(e["PrivateDnsEnabled"] for e in interfaces)
+
+    # in-VPC service functions use the regional endpoints
+    output = run_synth("./tests/fixtures/config/lucario.toml")
+    functions = lambda_functions(output.get_stack("DummyDjango"))
+    (api,) = [p for k, p in functions.items() if "MainLambda" in k]
+    variables = api["Environment"]["Variables"]
+    assert variables["AWS_STS_REGIONAL_ENDPOINTS"] == "regional"
+
+
 def test_ses_stack_factory():
     output = run_synth("./tests/fixtures/config/ses.toml")
     assert output.get_stack("MyEmails")
@@ -40,3 +69,501 @@ def test_users_stack_factory():
 def test_certs_stack_factory():
     output = run_synth("./tests/fixtures/config/certs.toml")
     assert output.get_stack("MyCerts")
+
+
+def resources_of_type(stack, type_: str) -> dict:
+    return {
+        logical_id: resource["Properties"]
+        for logical_id, resource in stack.template["Resources"].items()
+        if resource["Type"] == type_
+    }
+
+
+def lambda_functions(stack) -> dict:
+    return resources_of_type(stack, "AWS::Lambda::Function")
+
+
+def test_function_profiles():
+    output = run_synth("./tests/fixtures/config/lucario.toml")
+    functions = lambda_functions(output.get_stack("DummyDjango"))
+
+    (api,) = [p for k, p in functions.items() if "MainLambda" in k]
+    assert api["MemorySize"] == 1769
+    assert api["Timeout"] == 29
+    assert api["ReservedConcurrentExecutions"] == 50
+
+    (pre_deploy,) = [p for k, p in functions.items() if "PreDeployLambda" in k]
+    assert pre_deploy["Timeout"] == 900
+    assert pre_deploy["EphemeralStorage"] == {"Size": 2048}
+
+    # no profile referenced, the default profile applies
+    (post_deploy,) = [
+        p for k, p in functions.items() if "PostDeployLambda" in k
+    ]
+    assert post_deploy["MemorySize"] == 256
+    (canary,) = [
+        p for k, p in functions.items() if "CanaryCustomResourceOnEvent" in k
+    ]
+    assert canary["Timeout"] == 60
+
+    output = run_synth("./tests/fixtures/config/users.toml")
+    functions = lambda_functions(output.get_stack("MyUsersService"))
+    (trigger,) = [p for k, p in functions.items() if "PostAuth" in k]
+    assert trigger["MemorySize"] == 256
+    assert trigger["Timeout"] == 5
+
+
+def test_lucario_redis():
+    output = run_synth("./tests/fixtures/config/lucario.toml")
+    stack = output.get_stack("DummyDjango")
+
+    (group,) = resources_of_type(
+        stack, "AWS::ElastiCache::ReplicationGroup"
+    ).values()
+    assert group["CacheNodeType"] == "cache.t3.small"
+    assert group["AutomaticFailoverEnabled"] is True
+    assert group["MultiAZEnabled"] is True
+    assert group["NumCacheClusters"] == 2
+    assert "NumNodeGroups" not in group
+    assert "ReplicasPerNodeGroup" not in group
+
+    functions = lambda_functions(stack)
+    (api,) = [p for k, p in functions.items() if "MainLambda" in k]
+    variables = api["Environment"]["Variables"]
+    assert "REDIS_HOST" in variables
+    assert "REDIS_READER_HOST" in variables
+
+    ingress = [
+        i
+        for i in resources_of_type(
+            stack, "AWS::EC2::SecurityGroupIngress"
+        ).values()
+        if i["FromPort"] == 6379
+    ]
+    assert len(ingress) == 3  # api, pre and post deploy
+
+
+def test_lucario_read_replicas():
+    output = run_synth("./tests/fixtures/config/lucario.toml")
+    stack = output.get_stack("DummyDjango")
+    replicas = [
+        i
+        for i in resources_of_type(stack, "AWS::RDS::DBInstance").values()
+        if "SourceDBInstanceIdentifier" in i
+    ]
+    assert len(replicas) == 2
+    assert replicas[0]["DBInstanceClass"] == "db.t3.small"
+
+    functions = lambda_functions(stack)
+    (api,) = [p for k, p in functions.items() if "MainLambda" in k]
+    assert "DB_READ_HOSTS" in api["Environment"]["Variables"]
+
+
+def test_lucario_parameter_group():
+    output = run_synth("./tests/fixtures/config/lucario.toml")
+    stack = output.get_stack("DummyDjango")
+    (group,) = resources_of_type(stack, "AWS::RDS::DBParameterGroup").values()
+    assert group["Family"] == "postgres12"
+    assert group["Parameters"]["max_connections"] == "102"
+    assert group["Parameters"]["log_min_duration_statement"] == "250"
+
+    instances = list(resources_of_type(stack, "AWS::RDS::DBInstance").values())
+    assert all("DBParameterGroupName" in i for i in instances)
+    assert instances[0]["EngineVersion"] == "12.4"
+
+
+def test_lucario_storage():
+    output = run_synth("./tests/fixtures/config/lucario.toml")
+    stack = output.get_stack("DummyDjango")
+    instances = resources_of_type(stack, "AWS::RDS::DBInstance").values()
+    assert all(i["StorageType"] == "gp2" for i in instances)
+    assert all(i["MaxAllocatedStorage"] == 100 for i in instances)
+
+    alarms = resources_of_type(stack, "AWS::CloudWatch::Alarm")
+    for name in ("HighThroughput", "LowBurstBalance"):
+        assert any(name in alarm for alarm in alarms)
+    # gp2 is watched through its burst balance
+    assert not any("HighIOPS" in alarm for alarm in alarms)
+
+
+def test_lucario_slow_query_log():
+    output = run_synth("./tests/fixtures/config/lucario.toml")
+    stack = output.get_stack("DummyDjango")
+    instances = resources_of_type(stack, "AWS::RDS::DBInstance").values()
+    assert all(
+        i["EnableCloudwatchLogsExports"] == ["postgresql"] for i in instances
+    )
+
+
+def test_lucario_proxy():
+    output = run_synth("./tests/fixtures/config/lucario.toml")
+    stack = output.get_stack("DummyDjango")
+    (target_group,) = resources_of_type(
+        stack, "AWS::RDS::DBProxyTargetGroup"
+    ).values()
+    pool = target_group["ConnectionPoolConfigurationInfo"]
+    assert pool["MaxConnectionsPercent"] == 90
+    assert pool["MaxIdleConnectionsPercent"] == 10
+    assert pool["ConnectionBorrowTimeout"] == 30
+    assert pool["SessionPinningFilters"] == ["EXCLUDE_VARIABLE_SETS"]
+
+    alarms = resources_of_type(stack, "AWS::CloudWatch::Alarm")
+    assert any("HighProxyClientConnections" in alarm for alarm in alarms)
+    assert any("HighProxyBorrowLatency" in alarm for alarm in alarms)
+
+    ingress = [
+        i
+        for i in resources_of_type(
+            stack, "AWS::EC2::SecurityGroupIngress"
+        ).values()
+        if i["FromPort"] == 5432
+    ]
+    assert len(ingress) == 3  # api, pre and post deploy
+
+
+def test_aurora_cluster():
+    output = run_synth("./tests/fixtures/config/aurora.toml")
+    stack = output.get_stack("AuroraDjango")
+
+    def properties(type_):
+        return list(resources_of_type(stack, type_).values())
+
+    assert len(properties("AWS::RDS::DBInstance")) == 2
+    (target,) = properties("AWS::ApplicationAutoScaling::ScalableTarget")
+    assert target["ScalableDimension"] == "rds:cluster:ReadReplicaCount"
+    assert target["MaxCapacity"] == 4
+    (policy,) = properties("AWS::ApplicationAutoScaling::ScalingPolicy")
+    tracking = policy["TargetTrackingScalingPolicyConfiguration"]
+    assert tracking["TargetValue"] == 500
+    (endpoint,) = properties("AWS::RDS::DBProxyEndpoint")
+    assert endpoint["TargetRole"] == "READ_ONLY"
+    # buffer sizing stays with the Aurora engine defaults
+    (parameter_group,) = properties("AWS::RDS::DBParameterGroup")
+    assert "work_mem" in parameter_group["Parameters"]
+    assert "shared_buffers" not in parameter_group["Parameters"]
+
+    functions = lambda_functions(stack)
+    (api,) = [p for k, p in functions.items() if "MainLambda" in k]
+    variables = api["Environment"]["Variables"]
+    assert "DB_HOST" in variables
+    assert "DB_READ_HOSTS" in variables
+
+
+def test_dynamodb_stack_factory():
+    output = run_synth("./tests/fixtures/config/dynamodb.toml")
+    stack = output.get_stack("MyTables")
+    (table,) = resources_of_type(stack, "AWS::DynamoDB::Table").values()
+    assert table["TimeToLiveSpecification"] == {
+        "AttributeName": "expires_at",
+        "Enabled": True,
+    }
+    indexes = {
+        index["IndexName"]: index for index in table["GlobalSecondaryIndexes"]
+    }
+    assert indexes["by_email"]["Projection"] == {"ProjectionType": "KEYS_ONLY"}
+    assert indexes["by_status"]["Projection"] == {
+        "NonKeyAttributes": ["title", "owner"],
+        "ProjectionType": "INCLUDE",
+    }
+    (local,) = table["LocalSecondaryIndexes"]
+    assert local["KeySchema"][1] == {
+        "AttributeName": "created_at",
+        "KeyType": "RANGE",
+    }
+    assert {"AttributeName": "updated_at", "AttributeType": "N"} in table[
+        "AttributeDefinitions"
+    ]
+
+
+def test_lucario_dax():
+    output = run_synth("./tests/fixtures/config/lucario.toml")
+    stack = output.get_stack("DummyDjango")
+
+    (cluster,) = resources_of_type(stack, "AWS::DAX::Cluster").values()
+    assert cluster["NodeType"] == "dax.r5.large"
+    assert cluster["ReplicationFactor"] == 3
+    assert cluster["ClusterEndpointEncryptionType"] == "NONE"
+    (parameter_group,) = resources_of_type(
+        stack, "AWS::DAX::ParameterGroup"
+    ).values()
+    assert parameter_group["ParameterNameValues"] == {
+        "record-ttl-millis": "60000"
+    }
+
+    functions = lambda_functions(stack)
+    (api,) = [p for k, p in functions.items() if "MainLambda" in k]
+    variables = api["Environment"]["Variables"]
+    assert "DAX_ENDPOINT" in variables
+    assert "DYNAMODB_TABLE_NAME" in variables
+
+    statements = [
+        statement
+        for policy in resources_of_type(stack, "AWS::IAM::Policy").values()
+        if "MainLambda" in policy["PolicyName"]
+        for statement in policy["PolicyDocument"]["Statement"]
+    ]
+    actions = {
+        action
+        for statement in statements
+        for action in (
+            statement["Action"]
+            if isinstance(statement["Action"], list)
+            else [statement["Action"]]
+        )
+    }
+    assert {"dax:GetItem", "dynamodb:Query"} <= actions
+
+    ingress = [
+        i
+        for i in resources_of_type(
+            stack, "AWS::EC2::SecurityGroupIngress"
+        ).values()
+        if i["FromPort"] == 8111
+    ]
+    assert len(ingress) == 3
+
+
+def test_dynamodb_autoscaling():
+    output = run_synth("./tests/fixtures/config/dynamodb.toml")
+    stack = output.get_stack("MyProvisionedTables")
+    (table,) = resources_of_type(stack, "AWS::DynamoDB::Table").values()
+    assert table["ProvisionedThroughput"] == {
+        "ReadCapacityUnits": 5,
+        "WriteCapacityUnits": 10,
+    }
+    (index,) = table["GlobalSecondaryIndexes"]
+    assert index["ProvisionedThroughput"] == {
+        "ReadCapacityUnits": 2,
+        "WriteCapacityUnits": 5,
+    }
+
+    targets = resources_of_type(
+        stack, "AWS::ApplicationAutoScaling::ScalableTarget"
+    ).values()
+    assert sorted((t["MinCapacity"], t["MaxCapacity"]) for t in targets) == [
+        (2, 50),
+        (5, 500),
+    ]
+    (table_target,) = [t for t in targets if t["MaxCapacity"] == 500]
+    (action,) = table_target["ScheduledActions"]
+    assert action["Schedule"] == "cron(0 7 ? * MON-FRI *)"
+    assert action["ScalableTargetAction"] == {"MinCapacity": 100}
+
+    policies = resources_of_type(
+        stack, "AWS::ApplicationAutoScaling::ScalingPolicy"
+    ).values()
+    assert len(policies) == 2
+    (table_policy,) = [
+        p
+        for p in policies
+        if p["TargetTrackingScalingPolicyConfiguration"]["TargetValue"] == 60
+    ]
+    assert table_policy["PolicyType"] == "TargetTrackingScaling"
+
+
+def test_dynamodb_stream_consumer():
+    output = run_synth("./tests/fixtures/config/dynamodb.toml")
+    stack = output.get_stack("MyTables")
+    (mapping,) = resources_of_type(
+        stack, "AWS::Lambda::EventSourceMapping"
+    ).values()
+    assert mapping["BatchSize"] == 500
+    assert mapping["MaximumBatchingWindowInSeconds"] == 5
+    assert mapping["ParallelizationFactor"] == 4
+    assert mapping["MaximumRetryAttempts"] == 3
+    assert mapping["BisectBatchOnFunctionError"] is True
+    assert mapping["StartingPosition"] == "TRIM_HORIZON"
+    assert mapping["FunctionResponseTypes"] == ["ReportBatchItemFailures"]
+    assert (
+        "Fn::GetAtt"
+        in mapping["DestinationConfig"]["OnFailure"]["Destination"]
+    )
+
+    functions = lambda_functions(stack)
+    (consumer,) = [p for k, p in functions.items() if "SearchIndexer" in k]
+    assert consumer["Environment"]["Variables"]["SEARCH_INDEX"] == "items"
+    assert len(consumer["Layers"]) == 1
+
+
+def test_cached_lookups():
+    output = run_synth("./tests/fixtures/config/aurora.toml")
+    # nothing left for the CLI to look up in AWS
+    with open(os.path.join(output.directory, "manifest.json")) as f:
+        assert "missing" not in json.load(f)
+    stack = output.get_stack("AuroraDjango")
+    template = json.dumps(stack.template)
+    assert '"Fn::ImportValue": "MyVPC-3AZ"' in template
+    assert '"Fn::ImportValue": "MyVPC-PrivateSubnet1"' in template
+    assert "Z0123456789ABCDEFGHIJ" in template
+
+    output = run_synth("./tests/fixtures/config/network.toml")
+    outputs = output.get_stack("MyNetwork").template["Outputs"]
+    exports = {o["Export"]["Name"] for o in outputs.values()}
+    assert {
+        "MyVPC",
+        "MyVPC-3AZ",
+        "MyVPC-Cidr",
+        "MyVPC-PrivateSubnet0",
+        "MyVPC-PublicSubnet1",
+    } <= exports
+
+    # parsed once per app
+    app = core.App(
+        context={
+            LOOKUPS_CONTEXT_KEY: {
+                "hosted_zones": {"quadio.app": {"hosted_zone_id": "Z1"}}
+            }
+        }
+    )
+    stack = core.Stack(app, "Stack")
+    assert lookup_cache(stack) is lookup_cache(app)
+    assert lookup_cache(app).hosted_zones["quadio.app"].zone_id == "Z1"
+    assert lookup_cache(core.App()) is not lookup_cache(app)
+
+
+def test_network_multi_az():
+    output = run_synth("./tests/fixtures/config/network.toml")
+    stack = output.get_stack("MyNetwork")
+
+    nat_gateways = resources_of_type(stack, "AWS::EC2::NatGateway")
+    assert len(nat_gateways) == 3
+    database = [
+        s
+        for s in resources_of_type(stack, "AWS::EC2::Subnet").values()
+        if {"Key": "aws-cdk:subnet-name", "Value": "Database"} in s["Tags"]
+    ]
+    assert len(database) == 3
+    assert all(s["CidrBlock"].endswith("/26") for s in database)
+    # each private subnet egresses through its own AZ's NAT gateway
+    nat_routes = {
+        route["NatGatewayId"]["Ref"]
+        for route in resources_of_type(stack, "AWS::EC2::Route").values()
+        if "NatGatewayId" in route
+    }
+    assert nat_routes == set(nat_gateways)
+
+    output = run_synth("./tests/fixtures/config/aurora.toml")
+    stack = output.get_stack("AuroraDjango")
+    (subnet_group,) = resources_of_type(
+        stack, "AWS::RDS::DBSubnetGroup"
+    ).values()
+    assert subnet_group["SubnetIds"] == [
+        {"Fn::ImportValue": "MyVPC-DatabaseSubnet0"},
+        {"Fn::ImportValue": "MyVPC-DatabaseSubnet1"},
+        {"Fn::ImportValue": "MyVPC-DatabaseSubnet2"},
+    ]
+
+
+def test_service_routes():
+    output = run_synth("./tests/fixtures/config/aurora.toml")
+    stack = output.get_stack("AuroraDjango")
+
+    route_keys = {
+        route["RouteKey"]
+        for route in resources_of_type(
+            stack, "AWS::ApiGatewayV2::Route"
+        ).values()
+    }
+    assert {
+        "GET /reports/{proxy+}",
+        "POST /reports/{proxy+}",
+        "ANY /health",
+    } <= route_keys
+
+    functions = lambda_functions(stack)
+    (reports,) = [p for k, p in functions.items() if "ReportsLambda" in k]
+    assert reports["MemorySize"] == 3008
+    assert reports["Timeout"] == 120
+    assert reports["ReservedConcurrentExecutions"] == 5
+    assert "DB_HOST" in reports["Environment"]["Variables"]
+    (health,) = [p for k, p in functions.items() if "HealthLambda" in k]
+    assert health["MemorySize"] == 128
+
+    ingress = [
+        i
+        for i in resources_of_type(
+            stack, "AWS::EC2::SecurityGroupIngress"
+        ).values()
+        if i["FromPort"] == 5432
+    ]
+    assert len(ingress) == 3  # api and both routes
+
+    for name in ("Main", "PreDeploy", "Report-Lambda", ""):
+        with pytest.raises(ValidationError):
+            RouteOptions(name=name, path="/reports")
+
+
+def test_service_offload():
+    output = run_synth("./tests/fixtures/config/lucario.toml")
+    stack = output.get_stack("DummyDjango")
+    functions = lambda_functions(stack)
+    (api,) = [p for k, p in functions.items() if "MainLambda" in k]
+    assert api["Environment"]["Variables"]["API_OFFLOAD_THRESHOLD"] == (
+        "4000000"
+    )
+    (bucket,) = [
+        b
+        for k, b in resources_of_type(stack, "AWS::S3::Bucket").items()
+        if "PrivateBucket" in k
+    ]
+    (rule,) = bucket["CorsConfiguration"]["CorsRules"]
+    assert rule["AllowedMethods"] == ["GET", "HEAD"]
+    assert rule["AllowedOrigins"] == ["*"]
+
+    with pytest.raises(ValidationError):
+        OffloadOptions(threshold=5_000_000)
+
+
+def test_default_profile_keeps_explicit_settings():
+    output = run_synth("./tests/fixtures/config/aurora.toml")
+    stack = output.get_stack("AuroraDjango")
+    functions = lambda_functions(stack)
+
+    def retention_days(function_id):
+        (days,) = [
+            retention["RetentionInDays"]
+            for retention in resources_of_type(
+                stack, "Custom::LogRetention"
+            ).values()
+            if function_id in json.dumps(retention["LogGroupName"])
+        ]
+        return days
+
+    # the default profile fills in what make_function leaves unset
+    ((api_id, api),) = [
+        (k, p) for k, p in functions.items() if "MainLambda" in k
+    ]
+    assert api["MemorySize"] == 512
+    assert api["TracingConfig"] == {"Mode": "Active"}
+    assert retention_days(api_id) == 90
+
+    ((health_id, health),) = [
+        (k, p) for k, p in functions.items() if "HealthLambda" in k
+    ]
+    assert health["MemorySize"] == 128
+    assert health["TracingConfig"] == {"Mode": "Active"}
+    assert retention_days(health_id) == 90
+
+    # explicit settings, the service's and the route's, also take
+    # precedence over a named profile
+    (reports,) = [p for k, p in functions.items() if "ReportsLambda" in k]
+    assert reports["MemorySize"] == 3008
+    assert reports["Timeout"] == 120
+    assert reports["ReservedConcurrentExecutions"] == 5
+    assert reports["TracingConfig"] == {"Mode": "Active"}
+
+
+def test_dynamodb_stream_consumer_dax():
+    output = run_synth("./tests/fixtures/config/dynamodb.toml")
+    stack = output.get_stack("MyCachedTables")
+    (ingress,) = resources_of_type(
+        stack, "AWS::EC2::SecurityGroupIngress"
+    ).values()
+    assert ingress["FromPort"] == 8111
+    assert "CacheWarmer" in json.dumps(ingress["SourceSecurityGroupId"])
+    (subnet_group,) = resources_of_type(
+        stack, "AWS::DAX::SubnetGroup"
+    ).values()
+    assert {"Fn::ImportValue": "MyVPC-PrivateSubnet0"} in subnet_group[
+        "SubnetIds"
+    ]
@@ -0,0 +1,170 @@
+import datetime
+import decimal
+import uuid
+
+import pytest
+
+import acru_l.resources.rds.data_api
+from tests.layers import load_layer_module
+
+acrul_data_api = load_layer_module(
+    acru_l.resources.rds.data_api, "acrul_data_api"
+)
+
+
+class StubRDSDataClient:
+    def __init__(self, rows=(), failures=0):
+        self.calls = []
+        self.rows = list(rows)
+        self.failures = failures
+
+    def begin_transaction(self, **kwargs):
+        self.calls.append(("begin_transaction", kwargs))
+        return {"transactionId": f"tx{len(self.calls)}"}
+
+    def commit_transaction(self, **kwargs):
+        self.calls.append(("commit_transaction", kwargs))
+        return {"transactionStatus": "Transaction Committed"}
+
+    def rollback_transaction(self, **kwargs):
+        self.calls.append(("rollback_transaction", kwargs))
+        return {"transactionStatus": "Rollback Complete"}
+
+    def batch_execute_statement(self, **kwargs):
+        self.calls.append(("batch_execute_statement", kwargs))
+        return {"updateResults": [{} for _ in kwargs["parameterSets"]]}
+
+    def execute_statement(self, **kwargs):
+        self.calls.append(("execute_statement", kwargs))
+        if self.failures:
+            self.failures -= 1
+            raise Exception("Communications link failure")
+        parameters = {p["name"]: p["value"] for p in kwargs["parameters"]}
+        limit = parameters.get("_page_size", {}).get("longValue")
+        offset = parameters.get("_page_offset", {}).get("longValue", 0)
+        end = offset + limit if limit else None
+        rows = self.rows[offset:end]
+        return {
+            "columnMetadata": [{"name": "id"}, {"name": "name"}],
+            "records": [
+                [{"longValue": id}, {"stringValue": name}] for id, name in rows
+            ],
+        }
+
+
+def make_client(client, **kwargs):
+    return acrul_data_api.DataAPI(
+        resource_arn="arn:aws:rds:cluster:db",
+        secret_arn="arn:aws:secretsmanager:secret:db",
+        database="db",
+        client=client,
+        sleep=lambda _: None,
+        **kwargs,
+    )
+
+
+def test_to_field():
+    to_field = acrul_data_api.to_field
+    assert to_field(None) == {"value": {"isNull": True}}
+    assert to_field(True) == {"value": {"booleanValue": True}}
+    assert to_field(3) == {"value": {"longValue": 3}}
+    assert to_field(1.5) == {"value": {"doubleValue": 1.5}}
+    assert to_field(b"\x00") == {"value": {"blobValue": b"\x00"}}
+    assert to_field(decimal.Decimal("1.10"))["typeHint"] == "DECIMAL"
+    assert to_field({"a": 1}) == {
+        "value": {"stringValue": '{"a": 1}'},
+        "typeHint": "JSON",
+    }
+    assert to_field(datetime.date(2021, 1, 2)) == {
+        "value": {"stringValue": "2021-01-02"},
+        "typeHint": "DATE",
+    }
+    value = datetime.datetime(
+        2021, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc
+    )
+    assert to_field(value) == {
+        "value": {"stringValue": "2021-01-02 03:04:05.000000"},
+        "typeHint": "TIMESTAMP",
+    }
+    id = uuid.uuid4()
+    assert to_field(id)["value"]["stringValue"] == str(id)
+
+
+def test_from_field():
+    from_field = acrul_data_api.from_field
+    assert from_field({"isNull": True}) is None
+    assert from_field({"longValue": 0}) == 0
+    assert from_field({"booleanValue": False}) is False
+    assert from_field({"arrayValue": {"longValues": [1, 2]}}) == [1, 2]
+
+
+def test_batch_execute_chunks_in_one_transaction():
+    client = StubRDSDataClient()
+    db = make_client(client, batch_size=2)
+    count = db.batch_execute(
+        "INSERT INTO t (id) VALUES (:id)", [{"id": i} for i in range(5)]
+    )
+    assert count == 5
+    methods = [method for method, _ in client.calls]
+    assert methods == [
+        "begin_transaction",
+        "batch_execute_statement",
+        "batch_execute_statement",
+        "batch_execute_statement",
+        "commit_transaction",
+    ]
+    batches = [kwargs for method, kwargs in client.calls[1:4]]
+    assert [len(b["parameterSets"]) for b in batches] == [2, 2, 1]
+    assert {b["transactionId"] for b in batches} == {"tx1"}
+    assert batches[0]["parameterSets"][1] == [
+        {"name": "id", "value": {"longValue": 1}}
+    ]
+
+
+def test_batches_split_on_size():
+    parameter_sets = [[{"name": "x" * 10}]] * 4
+    batches = list(acrul_data_api.batches(parameter_sets, 100, max_bytes=50))
+    assert [len(batch) for batch in batches] == [2, 2]
+
+
+def test_transaction_reuse_and_rollback():
+    client = StubRDSDataClient()
+    db = make_client(client)
+    with pytest.raises(RuntimeError):
+        with db.transaction() as transaction_id:
+            with db.transaction() as nested_id:
+                assert nested_id == transaction_id
+                db.batch_execute("DELETE FROM t WHERE id = :id", [{"id": 1}])
+            raise RuntimeError
+    methods = [method for method, _ in client.calls]
+    assert methods == [
+        "begin_transaction",
+        "batch_execute_statement",
+        "rollback_transaction",
+    ]
+    assert db.transaction_id is None
+
+
+def test_stream_pages():
+    rows = [(i, f"row{i}") for i in range(5)]
+    client = StubRDSDataClient(rows=rows)
+    db = make_client(client)
+    streamed = list(
+        db.stream("SELECT id, name FROM t ORDER BY id", page_size=2)
+    )
+    assert streamed == [{"id": i, "name": name} for i, name in rows]
+    assert len(client.calls) == 3
+    assert client.calls[0][1]["sql"].endswith(
+        "LIMIT :_page_size OFFSET :_page_offset"
+    )
+
+
+def test_retries_while_resuming():
+    client = StubRDSDataClient(rows=[(1, "a")], failures=2)
+    db = make_client(client)
+    assert db.query("SELECT id, name FROM t") == [{"id": 1, "name": "a"}]
+    assert len(client.calls) == 3
+
+    db = make_client(StubRDSDataClient(failures=10), resume_retries=1)
+    with pytest.raises(Exception):
+        db.query("SELECT 1")
@@ -0,0 +1,229 @@
+import pytest
+
+import acru_l.resources.dynamodb
+from tests.layers import load_layer_module
+
+acrul_dynamodb = load_layer_module(acru_l.resources.dynamodb, "acrul_dynamodb")
+
+
+def key_of(item):
+    return item["partition_key"]["S"], item["sort_key"]["S"]
+
+
+class LocalDynamoDB:
+    """
+    In-memory stand-in for the low-level DynamoDB client. Leaves the
+    last `unprocessed` requests of each batch call unprocessed once.
+    """
+
+    def __init__(self, unprocessed=0):
+        self.items = {}
+        self.calls = []
+        self.unprocessed = unprocessed
+
+    def _split(self, requests):
+        if not self.unprocessed or len(requests) <= self.unprocessed:
+            return requests, []
+        split = len(requests) - self.unprocessed
+        done, left = requests[:split], requests[split:]
+        self.unprocessed = 0
+        return done, left
+
+    def batch_get_item(self, RequestItems):
+        ((table_name, request),) = RequestItems.items()
+        self.calls.append(("batch_get_item", len(request["Keys"])))
+        assert len(request["Keys"]) <= 100
+        keys, left = self._split(request["Keys"])
+        response = {
+            "Responses": {
+                table_name: [
+                    self.items[key_of(key)]
+                    for key in keys
+                    if key_of(key) in self.items
+                ]
+            },
+            "UnprocessedKeys": {},
+        }
+        if left:
+            response["UnprocessedKeys"] = {table_name: {"Keys": left}}
+        return response
+
+    def batch_write_item(self, RequestItems):
+        ((table_name, requests),) = RequestItems.items()
+        self.calls.append(("batch_write_item", len(requests)))
+        assert len(requests) <= 25
+        requests, left = self._split(requests)
+        for request in requests:
+            if "PutRequest" in request:
+                item = request["PutRequest"]["Item"]
+                self.items[key_of(item)] = item
+            else:
+                self.items.pop(key_of(request["DeleteRequest"]["Key"]), None)
+        if left:
+            return {"UnprocessedItems": {table_name: left}}
+        return {"UnprocessedItems": {}}
+
+    def _page(self, items, request):
+        items = sorted(items, key=key_of)
+        start = request.get("ExclusiveStartKey")
+        if start:
+            items = [item for item in items if key_of(item) > key_of(start)]
+        limit = request.get("Limit", len(items))
+        page = items[:limit]
+        response = {"Items": page}
+        if len(items) > limit:
+            response["LastEvaluatedKey"] = {
+                "partition_key": page[-1]["partition_key"],
+                "sort_key": page[-1]["sort_key"],
+            }
+        return response
+
+    def query(self, **request):
+        self.calls.append(("query", request.get("ExclusiveStartKey")))
+        values = request["ExpressionAttributeValues"]
+        items = [
+            item
+            for key, item in self.items.items()
+            if key[0] == values[":pk"]["S"]
+            and (":sk" not in values or key[1].startswith(values[":sk"]["S"]))
+        ]
+        response = self._page(items, request)
+        if not request["ScanIndexForward"]:
+            response["Items"].reverse()
+        return response
+
+    def scan(self, **request):
+        self.calls.append(("scan", request.get("Segment")))
+        segments = request.get("TotalSegments", 1)
+        items = [
+            item
+            for key, item in self.items.items()
+            if sum(map(ord, key[1])) % segments == request.get("Segment", 0)
+        ]
+        return self._page(items, request)
+
+
+def make_table(client, **kwargs):
+    return acrul_dynamodb.Table(
+        "table", client=client, sleep=lambda _: None, **kwargs
+    )
+
+
+def items(count, partition="p"):
+    return [
+        {"partition_key": partition, "sort_key": f"{i:03}", "value": i}
+        for i in range(count)
+    ]
+
+
+def test_batch_write_chunks_and_retries():
+    client = LocalDynamoDB(unprocessed=5)
+    table = make_table(client)
+    assert table.batch_write(puts=items(60)) == 60
+    assert len(client.items) == 60
+    assert client.calls == [
+        ("batch_write_item", 25),
+        ("batch_write_item", 5),
+        ("batch_write_item", 25),
+        ("batch_write_item", 10),
+    ]
+
+    assert table.batch_write(deletes=[("p", "000"), ("p", "001")]) == 2
+    assert len(client.items) == 58
+
+
+def test_batch_write_gives_up():
+    client = LocalDynamoDB()
+    client.batch_write_item = lambda RequestItems: {
+        "UnprocessedItems": RequestItems
+    }
+    table = make_table(client, max_attempts=3)
+    with pytest.raises(acrul_dynamodb.UnprocessedItemsError):
+        table.batch_write(puts=items(1))
+
+
+def test_batch_get_chunks_and_retries():
+    client = LocalDynamoDB()
+    table = make_table(client)
+    table.batch_write(puts=items(150))
+    client.calls.clear()
+    client.unprocessed = 10
+
+    keys = [("p", f"{i:03}") for i in range(150)] + [("p", "missing")]
+    found = table.batch_get(keys + keys[:3])
+    assert len(found) == 150
+    assert found[("p", "007")]["value"] == 7
+    assert client.calls == [
+        ("batch_get_item", 100),
+        ("batch_get_item", 10),
+        ("batch_get_item", 51),
+    ]
+
+
+def test_read_through_cache():
+    client = LocalDynamoDB()
+    table = make_table(client, cache_ttl=60)
+    table.batch_write(puts=items(2))
+    client.calls.clear()
+
+    assert table.get("p", "000")["value"] == 0
+    assert table.get("p", "000")["value"] == 0
+    assert table.get("p", "missing") is None
+    assert table.get("p", "missing") is None
+    assert client.calls == [("batch_get_item", 1), ("batch_get_item", 1)]
+
+    table.batch_write(puts=[{**items(1)[0], "value": 10}])
+    assert table.get("p", "000")["value"] == 10
+
+
+def test_query_pages():
+    client = LocalDynamoDB()
+    table = make_table(client)
+    table.batch_write(puts=items(7) + items(3, partition="other"))
+    client.calls.clear()
+
+    values = [item["value"] for item in table.query("p", page_size=3)]
+    assert values == list(range(7))
+    assert len(client.calls) == 3
+
+    client.calls.clear()
+    results = list(table.query("p", page_size=3, limit=4))
+    assert len(results) == 4
+    assert len(client.calls) == 2
+
+    results = list(table.query("p", sort_key_prefix="00"))
+    assert len(results) == 7
+    assert list(table.query("other", sort_key_prefix="1")) == []
+
+
+def test_parallel_scan():
+    client = LocalDynamoDB()
+    table = make_table(client)
+    table.batch_write(puts=items(40))
+    client.calls.clear()
+
+    values = sorted(
+        item["value"] for item in table.scan(segments=4, page_size=5)
+    )
+    assert values == list(range(40))
+    assert {segment for _, segment in client.calls} == {0, 1, 2, 3}
+
+
+def test_read_cache_bounds_and_copies():
+    now = [0.0]
+    cache = acrul_dynamodb.ReadCache(10, max_entries=2, clock=lambda: now[0])
+    cache.set(("p", "a"), {"tags": ["x"]})
+    cache.set(("p", "b"), None)
+    # reading "a" makes "b" the least recently used entry
+    hit, item = cache.get(("p", "a"))
+    assert hit
+    item["tags"].append("y")
+    cache.set(("p", "c"), {"tags": []})
+
+    assert cache.get(("p", "b")) == (False, None)
+    assert cache.get(("p", "a")) == (True, {"tags": ["x"]})
+    assert len(cache.items) == 2
+
+    now[0] = 11
+    assert cache.get(("p", "c")) == (False, None)
+    assert ("p", "c") not in cache.items
@@ -0,0 +1,60 @@
+import decimal
+
+import acru_l.resources.dynamodb
+from tests.layers import load_layer_module
+
+acrul_streams = load_layer_module(acru_l.resources.dynamodb, "acrul_streams")
+
+
+def stream_record(sequence_number, event_name="MODIFY"):
+    keys = {
+        "partition_key": {"S": "item"},
+        "sort_key": {"S": str(sequence_number)},
+    }
+    return {
+        "eventID": f"event{sequence_number}",
+        "eventName": event_name,
+        "dynamodb": {
+            "ApproximateCreationDateTime": 1610000000,
+            "Keys": keys,
+            "NewImage": {
+                **keys,
+                "count": {"N": "2"},
+                "tags": {"SS": ["a", "b"]},
+                "meta": {
+                    "M": {"active": {"BOOL": True}, "note": {"NULL": True}}
+                },
+            },
+            "SequenceNumber": str(sequence_number),
+            "StreamViewType": "NEW_AND_OLD_IMAGES",
+        },
+    }
+
+
+def test_records_are_decoded():
+    event = {"Records": [stream_record(1, "INSERT")]}
+    (record,) = acrul_streams.records(event)
+    assert record.event_name == "INSERT"
+    assert record.keys == {"partition_key": "item", "sort_key": "1"}
+    assert record.new_image["count"] == decimal.Decimal(2)
+    assert record.new_image["tags"] == {"a", "b"}
+    assert record.new_image["meta"] == {"active": True, "note": None}
+    assert record.old_image == {}
+    assert record.created_at.year == 2021
+
+
+def test_process_reports_failed_batch():
+    event = {"Records": [stream_record(i) for i in range(1, 6)]}
+    handled = []
+
+    def handler(batch):
+        if batch[0].sequence_number == "3":
+            raise RuntimeError
+        handled.append([record.sequence_number for record in batch])
+
+    response = acrul_streams.process(event, handler, batch_size=2)
+    assert handled == [["1", "2"]]
+    assert response == {"batchItemFailures": [{"itemIdentifier": "3"}]}
+
+    response = acrul_streams.process(event, lambda batch: None)
+    assert response == {"batchItemFailures": []}
@@ -0,0 +1,132 @@
+import pytest
+from aws_cdk import aws_rds as rds
+from pydantic import ValidationError
+
+from acru_l.resources.rds.instances import RDSInstanceOptions
+from acru_l.resources.rds.parameters import (
+    ParameterGroupOptions,
+    instance_memory,
+)
+
+
+def test_instance_memory():
+    assert instance_memory("BURSTABLE3", "MICRO") == 1024
+    assert instance_memory("MEMORY5", "XLARGE2") == 65536
+    assert instance_memory("COMPUTE5", "LARGE") is None
+
+
+def test_presets():
+    parameters = ParameterGroupOptions(
+        preset="oltp",
+        pg_stat_statements=True,
+        parameters={"max_connections": 300},
+    ).build(16384)
+    assert parameters["shared_buffers"] == str(16384 * 128 // 4)
+    assert parameters["max_connections"] == "300"
+    assert parameters["random_page_cost"] == "1.1"
+    assert parameters["shared_preload_libraries"] == "pg_stat_statements"
+
+    parameters = ParameterGroupOptions(preset="read_heavy").build(65536)
+    assert int(parameters["work_mem"]) > 8192
+
+
+def test_validation():
+    with pytest.raises(ValueError):
+        ParameterGroupOptions(preset="oltp").build(None)
+    with pytest.raises(ValueError):
+        # 2GiB of shared buffers on a 1GiB instance
+        ParameterGroupOptions(parameters={"shared_buffers": 262144}).build(
+            1024
+        )
+    with pytest.raises(ValidationError):
+        RDSInstanceOptions(
+            db_name="test",
+            db_username="test",
+            parameter_group={"parameters": {"max_connections": 0}},
+        )
+    with pytest.raises(ValidationError):
+        RDSInstanceOptions(
+            db_name="test", db_username="test", engine_version="12"
+        )
+
+    options = RDSInstanceOptions(
+        db_name="test",
+        db_username="test",
+        engine_version="9.6.20",
+        parameter_group={
+            "parameters": {"shared_buffers": "{DBInstanceClassMemory/32768}"}
+        },
+    )
+    assert options.postgres_engine_version.postgres_major_version == "9.6"
+
+
+def test_storage_options():
+    options = RDSInstanceOptions(
+        db_name="test",
+        db_username="test",
+        storage_type="IO1",
+        allocated_storage=100,
+        iops=3000,
+    )
+    assert options.iops == 3000
+    assert (
+        RDSInstanceOptions(db_name="test", db_username="test").storage_type
+        == rds.StorageType.STANDARD
+    )
+
+    for invalid in (
+        {"storage_type": "IO1"},
+        {"storage_type": "IO1", "allocated_storage": 100, "iops": 10000},
+        {"iops": 1000},
+        {"max_allocated_storage": 10},
+    ):
+        with pytest.raises(ValidationError):
+            RDSInstanceOptions(db_name="test", db_username="test", **invalid)
+
+
+def test_proxy_options():
+    options = RDSInstanceOptions(db_name="test", db_username="test")
+    assert options.proxy_options is None
+    options = RDSInstanceOptions(
+        db_name="test", db_username="test", add_proxy=True
+    )
+    assert options.proxy_options.max_connections_percent == 100
+    with pytest.raises(ValidationError):
+        RDSInstanceOptions(
+            db_name="test",
+            db_username="test",
+            proxy={
+                "max_connections_percent": 50,
+                "max_idle_connections_percent": 60,
+            },
+        )
+    options = RDSInstanceOptions(
+        db_name="test",
+        db_username="test",
+        proxy={"max_connections_percent": 40},
+    )
+    assert options.proxy_options.max_idle_connections_percent is None
+    assert (
+        options.proxy_options.proxy_kwargs["max_idle_connections_percent"]
+        is None
+    )
+
+
+def test_aurora_presets():
+    options = ParameterGroupOptions(preset="read_heavy")
+    parameters = options.build(16384, aurora=True)
+    assert parameters["max_connections"] == str(16384 // 20)
+    assert parameters["default_statistics_target"] == "200"
+    for name in (
+        "shared_buffers",
+        "effective_cache_size",
+        "random_page_cost",
+        "effective_io_concurrency",
+    ):
+        assert name not in parameters
+
+    # explicit parameters still apply
+    options = ParameterGroupOptions(
+        preset="oltp", parameters={"random_page_cost": 1.5}
+    )
+    assert options.build(16384, aurora=True)["random_page_cost"] == "1.5"
@@ -0,0 +1,55 @@
+import pytest
+from aws_cdk import core, aws_ec2 as ec2
+
+from acru_l.resources.rds.serverless import (
+    PostgresCluster,
+    scaling_configuration,
+)
+
+
+def test_scaling_configuration():
+    config = scaling_configuration(
+        auto_pause=True,
+        min_capacity=2,
+        max_capacity=8,
+        seconds_until_auto_pause=600,
+    )
+    assert config.seconds_until_auto_pause == 600
+    assert config.min_capacity == 2
+
+    for invalid in (
+        {"min_capacity": 3},
+        {"min_capacity": 16},
+        {"seconds_until_auto_pause": 60},
+    ):
+        kwargs = {
+            "auto_pause": True,
+            "min_capacity": 2,
+            "max_capacity": 8,
+            "seconds_until_auto_pause": 600,
+            **invalid,
+        }
+        with pytest.raises(ValueError):
+            scaling_configuration(**kwargs)
+
+
+def test_deprecated_auto_pause_name():
+    app = core.App()
+    stack = core.Stack(app, "Stack")
+    vpc = ec2.Vpc(stack, "VPC")
+    with pytest.warns(DeprecationWarning):
+        PostgresCluster(
+            stack,
+            "Cluster",
+            db_username="test",
+            db_name="test",
+            vpc=vpc,
+            seconds_util_auto_pause=600,
+        )
+    template = app.synth().get_stack("Stack").template
+    (cluster,) = [
+        resource["Properties"]
+        for resource in template["Resources"].values()
+        if resource["Type"] == "AWS::RDS::DBCluster"
+    ]
+    assert cluster["ScalingConfiguration"]["SecondsUntilAutoPause"] == 600
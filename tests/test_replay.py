@@ -0,0 +1,147 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from acru_l.services.api.wsgi.replay import (
+    ReplayRequest,
+    Sample,
+    WorkerResult,
+    default_handler_path,
+    main,
+    percentile,
+    run,
+    summarize,
+)
+
+APPLICATION = "tests.test_replay.application"
+
+
+def application(environ, start_response):
+    if environ["PATH_INFO"] == "/boom":
+        start_response("500 Internal Server Error", [])
+        return [b""]
+    body = json.dumps({"path": environ["PATH_INFO"]}).encode()
+    start_response("200 OK", [("Content-Type", "application/json")])
+    return [body]
+
+
+@pytest.fixture
+def handler_environment(monkeypatch):
+    # load_handler updates os.environ, setting the keys first restores them
+    environment = {
+        "WSGI_APPLICATION": APPLICATION,
+        "API_BINARY_SUPPORT": "false",
+    }
+    for key, value in environment.items():
+        monkeypatch.setenv(key, value)
+    return environment
+
+
+def test_parse_request():
+    request = ReplayRequest.parse("post /items?page=2&q=a")
+    assert request.method == "POST"
+    assert request.path == "/items"
+    assert request.query == "page=2&q=a"
+    assert ReplayRequest.parse("/health").endpoint == "GET /health"
+
+
+def test_request_events():
+    request = ReplayRequest(
+        path="/items",
+        query="page=2",
+        headers={"Accept": "application/json", "Cookie": "a=1; b=2"},
+    )
+    v1 = request.to_event("1.0")
+    assert v1["httpMethod"] == "GET"
+    assert v1["queryStringParameters"] == {"page": "2"}
+    assert v1["multiValueHeaders"]["Accept"] == ["application/json"]
+
+    v2 = request.to_event("2.0")
+    assert v2["version"] == "2.0"
+    assert v2["rawQueryString"] == "page=2"
+    assert v2["cookies"] == ["a=1", "b=2"]
+    assert v2["headers"]["accept"] == "application/json"
+    assert v2["requestContext"]["http"]["method"] == "GET"
+
+    recorded = ReplayRequest.from_dict(v2)
+    assert recorded.endpoint == "GET /items"
+    assert recorded.to_event("1.0") == v2
+
+
+def test_summarize():
+    assert percentile([], 99) == 0.0
+    assert percentile(list(range(1, 101)), 50) == 50
+    assert percentile(list(range(1, 101)), 99) == 99
+
+    results = [
+        WorkerResult(
+            init_seconds=0.2,
+            init_rss_delta=1024,
+            wall_seconds=1.0,
+            samples=[
+                Sample("GET /a", 0.001 * i, 200, 0, 10) for i in range(1, 11)
+            ]
+            + [Sample("GET /b", 0.05, 502, 4096, 0)],
+        ),
+        WorkerResult(
+            init_seconds=0.4,
+            init_rss_delta=2048,
+            wall_seconds=2.0,
+            samples=[Sample("GET /b", 0.01, 200, 0, 0)],
+        ),
+    ]
+    report = summarize(results)
+    assert report["workers"] == 2
+    assert report["requests"] == 12
+    assert report["throughput_rps"] == 6.0
+    assert round(report["cold_init_ms"]["mean"]) == 300
+    assert report["init_memory_bytes"] == 2048
+    assert round(report["endpoints"]["GET /a"]["p50_ms"]) == 5
+    assert report["endpoints"]["GET /b"]["errors"] == 1
+    assert report["endpoints"]["GET /b"]["memory_growth_bytes"] == 4096
+
+
+def test_run(handler_environment):
+    results = run(
+        handler_path=default_handler_path,
+        environment=handler_environment,
+        requests=[
+            ReplayRequest.parse("GET /items"),
+            ReplayRequest.parse("GET /boom"),
+        ],
+        iterations=6,
+        payload_format="2.0",
+    )
+    (result,) = results
+    assert [sample.status for sample in result.samples] == [200, 500] * 3
+
+    report = summarize(results)
+    assert report["requests"] == 6
+    items = report["endpoints"]["GET /items"]
+    assert items["requests"] == 3
+    assert items["errors"] == 0
+    assert items["mean_response_bytes"] == len('{"path": "/items"}')
+    assert report["endpoints"]["GET /boom"]["errors"] == 3
+
+
+def test_cli(handler_environment):
+    runner = CliRunner()
+    result = runner.invoke(
+        main,
+        [
+            "--wsgi-application",
+            APPLICATION,
+            "--request",
+            "GET /health",
+            "--iterations",
+            "4",
+            "--env",
+            "API_BINARY_SUPPORT=false",
+            "--json",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    report = json.loads(result.output)
+    assert report["requests"] == 4
+    assert report["endpoints"]["GET /health"]["errors"] == 0
@@ -0,0 +1,54 @@
+import json
+import threading
+
+import acru_l.resources.secrets
+from tests.layers import load_layer_module
+
+acrul_secrets = load_layer_module(acru_l.resources.secrets, "acrul_secrets")
+
+
+class StubSecretsManager:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get_secret_value(self, SecretId):
+        with self.lock:
+            self.calls.append(SecretId)
+        name = SecretId.rsplit(":", 1)[-1]
+        return {
+            "ARN": SecretId,
+            "Name": name,
+            "SecretString": json.dumps({"password": name}),
+        }
+
+
+def test_secret_cache_prefetch():
+    client = StubSecretsManager()
+    arns = [f"arn:aws:secretsmanager:secret:s{i}" for i in range(5)]
+    cache = acrul_secrets.SecretCache(arns, client=client)
+    cache.prefetch()
+    assert sorted(client.calls) == sorted(arns)
+    assert cache.get_json(arns[0]) == {"password": "s0"}
+    assert cache.get_json("s1") == {"password": "s1"}
+    assert len(client.calls) == 5
+
+
+def test_secret_cache_ttl():
+    now = [0.0]
+    client = StubSecretsManager()
+    cache = acrul_secrets.SecretCache(
+        client=client, ttl=10, clock=lambda: now[0]
+    )
+    cache.get_string("arn:s")
+    cache.get_string("arn:s")
+    assert client.calls == ["arn:s"]
+    now[0] = 11
+    cache.get_string("arn:s")
+    assert client.calls == ["arn:s", "arn:s"]
+
+
+def test_get_secret_key(monkeypatch):
+    cache = acrul_secrets.SecretCache(client=StubSecretsManager())
+    monkeypatch.setattr(acrul_secrets, "_cache", cache)
+    assert acrul_secrets.get_secret("arn:db", key="password") == "db"
@@ -0,0 +1,54 @@
+import json
+
+from click.testing import CliRunner
+
+from acru_l.resources.rds.slow_queries import aggregate, main, normalize, parse
+
+LOG_FILE = "./tests/fixtures/logs/postgresql.log"
+
+
+def test_normalize():
+    assert (
+        normalize(
+            "SELECT * FROM t1 WHERE a = 10 AND b = 'it''s' /* x */ LIMIT 5;"
+        )
+        == "select * from t1 where a = ? and b = ? limit ?"
+    )
+    assert normalize("select 1 from t where id in ($1, $2,$3)") == (
+        "select ? from t where id in (?+)"
+    )
+    assert normalize("INSERT INTO t VALUES (1, 2), (3, 4)") == (
+        "insert into t values (?+)"
+    )
+
+
+def test_parse_and_aggregate():
+    with open(LOG_FILE) as f:
+        statements = list(parse(f))
+    assert len(statements) == 6
+    assert statements[2].statement.startswith("SELECT id, total\nFROM")
+    assert statements[0].database == "test"
+    assert statements[-1].user is None
+
+    stats = {s.query: s for s in aggregate(statements)}
+    orders = stats["select * from orders where customer_id = ? and status = ?"]
+    assert orders.calls == 2
+    assert orders.total_ms == 2000.5
+    assert orders.max_ms == 1200.5
+    invoices = stats["select id, total from invoices where id in (?+)"]
+    assert invoices.calls == 2
+    assert invoices.mean_ms == 1000.125
+
+
+def test_cli():
+    runner = CliRunner()
+    result = runner.invoke(main, [LOG_FILE, "--top", "2", "--json"])
+    assert result.exit_code == 0
+    report = json.loads(result.output)
+    assert report["statements"] == 6
+    assert [s["query"] for s in report["by_total"]][0].startswith("insert")
+    assert len(report["by_mean"]) == 2
+
+    result = runner.invoke(main, [LOG_FILE, "--database", "test"])
+    assert result.exit_code == 0
+    assert "4 slow statements, 2 queries" in result.output
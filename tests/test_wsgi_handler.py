@@ -0,0 +1,202 @@
+import base64
+import gzip
+import json
+
+import pytest
+from apig_wsgi import make_lambda_handler
+
+from acru_l.services.api.wsgi.src.acrul_wsgi.cache import (
+    ResponseCacheMiddleware,
+)
+from acru_l.services.api.wsgi.src.acrul_wsgi.compression import (
+    CompressionMiddleware,
+    binary_safe_encodings,
+)
+from acru_l.services.api.wsgi.src.acrul_wsgi.offload import (
+    S3OffloadMiddleware,
+)
+
+
+def json_app(size: int, content_type: str = "application/json"):
+    body = json.dumps({"items": ["x" * 10] * size}).encode()
+
+    def application(environ, start_response):
+        start_response("200 OK", [("Content-Type", content_type)])
+        return [body]
+
+    return application, body
+
+
+def call(application, **environ):
+    environ.setdefault("REQUEST_METHOD", "GET")
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response["status"] = status
+        response["headers"] = dict(headers)
+
+    body = b"".join(application(environ, start_response))
+    return response["status"], response["headers"], body
+
+
+def test_compression_gzip():
+    app, body = json_app(500)
+    middleware = CompressionMiddleware(app, encodings=["gzip"])
+    _, headers, data = call(middleware, HTTP_ACCEPT_ENCODING="gzip, deflate")
+    assert headers["Content-Encoding"] == "gzip"
+    assert headers["Vary"] == "Accept-Encoding"
+    assert headers["Content-Length"] == str(len(data))
+    assert gzip.decompress(data) == body
+
+
+def test_compression_negotiation():
+    app, body = json_app(500)
+    middleware = CompressionMiddleware(app, encodings=["gzip"])
+    _, headers, data = call(middleware, HTTP_ACCEPT_ENCODING="gzip;q=0, br")
+    assert "Content-Encoding" not in headers
+    assert data == body
+    _, headers, data = call(middleware)
+    assert "Content-Encoding" not in headers
+
+
+def test_compression_skips_small_and_unlisted():
+    app, body = json_app(1)
+    middleware = CompressionMiddleware(app, encodings=["gzip"])
+    _, headers, data = call(middleware, HTTP_ACCEPT_ENCODING="gzip")
+    assert "Content-Encoding" not in headers
+    assert data == body
+
+    app, body = json_app(500, content_type="image/png")
+    middleware = CompressionMiddleware(app, encodings=["gzip"])
+    _, headers, data = call(middleware, HTTP_ACCEPT_ENCODING="*")
+    assert "Content-Encoding" not in headers
+    assert data == body
+
+
+class StubS3Client:
+    def __init__(self):
+        self.objects = {}
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None):
+        self.objects[key] = (fileobj.read(), ExtraArgs)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://{Params['Bucket']}/{Params['Key']}?e={ExpiresIn}"
+
+
+def test_binary_safe_encodings():
+    assert binary_safe_encodings(["br", "gzip"], (2, 18)) == ["gzip"]
+    assert binary_safe_encodings(["br"], (2, 10)) == []
+    assert binary_safe_encodings(["br", "gzip"], (2, 19)) == ["br", "gzip"]
+    assert binary_safe_encodings(["br", "gzip"], (3, 0)) == ["br", "gzip"]
+
+
+def test_compression_through_apig_wsgi():
+    # pins that the installed apig_wsgi returns what the handler
+    # compresses base64 encoded rather than as text
+    app, body = json_app(500)
+    handler = make_lambda_handler(
+        CompressionMiddleware(
+            app, encodings=binary_safe_encodings(["br", "gzip"])
+        ),
+        binary_support=True,
+    )
+    event = {
+        "httpMethod": "GET",
+        "path": "/",
+        "headers": {"Accept-Encoding": "br, gzip"},
+        "multiValueHeaders": {"Accept-Encoding": ["br, gzip"]},
+        "queryStringParameters": None,
+        "multiValueQueryStringParameters": None,
+        "requestContext": {},
+        "body": None,
+        "isBase64Encoded": False,
+    }
+    response = handler(event, None)
+    assert response["isBase64Encoded"] is True
+    data = base64.b64decode(response["body"])
+    encoding = response["multiValueHeaders"]["Content-Encoding"][0]
+    if encoding == "gzip":
+        assert gzip.decompress(data) == body
+    else:
+        brotli = pytest.importorskip("brotli")
+        assert brotli.decompress(data) == body
+
+
+def test_offload_large_response():
+    app, body = json_app(500)
+    client = StubS3Client()
+    middleware = S3OffloadMiddleware(
+        app, client=client, bucket_name="private", threshold=1024
+    )
+    status, headers, data = call(middleware)
+    assert status == "303 See Other"
+    assert data == b""
+    ((key, (content, extra_args)),) = client.objects.items()
+    assert key.startswith("offload/")
+    assert content == body
+    assert extra_args == {"ContentType": "application/json"}
+    assert headers["Location"] == f"https://private/{key}?e=300"
+
+
+def test_offload_small_response():
+    app, body = json_app(1)
+    client = StubS3Client()
+    middleware = S3OffloadMiddleware(
+        app, client=client, bucket_name="private", threshold=1024
+    )
+    status, headers, data = call(middleware)
+    assert status == "200 OK"
+    assert data == body
+    assert not client.objects
+
+
+def counting_app(cache_control="max-age=60", **extra_headers):
+    calls = []
+
+    def application(environ, start_response):
+        calls.append(environ["PATH_INFO"])
+        headers = [("Content-Type", "text/plain")]
+        if cache_control:
+            headers.append(("Cache-Control", cache_control))
+        headers += list(extra_headers.items())
+        start_response("200 OK", headers)
+        return [b"x" * 100]
+
+    return application, calls
+
+
+def test_response_cache_hit_and_expiry():
+    now = [0.0]
+    app, calls = counting_app()
+    middleware = ResponseCacheMiddleware(app, clock=lambda: now[0])
+    assert call(middleware, PATH_INFO="/a")[1]["X-Cache"] == "Miss"
+    _, headers, body = call(middleware, PATH_INFO="/a")
+    assert headers["X-Cache"] == "Hit"
+    assert body == b"x" * 100
+    assert calls == ["/a"]
+    now[0] = 61
+    assert call(middleware, PATH_INFO="/a")[1]["X-Cache"] == "Miss"
+    assert middleware.stats["Hits"] == 1
+    assert middleware.stats["Misses"] == 2
+
+
+def test_response_cache_bypass():
+    app, calls = counting_app(cache_control="private, max-age=60")
+    middleware = ResponseCacheMiddleware(app)
+    call(middleware, PATH_INFO="/a")
+    call(middleware, PATH_INFO="/a")
+    call(middleware, PATH_INFO="/a", HTTP_AUTHORIZATION="Bearer token")
+    call(middleware, PATH_INFO="/a", REQUEST_METHOD="POST")
+    assert len(calls) == 4
+    assert middleware.stats["Bypasses"] == 2
+
+
+def test_response_cache_bounded():
+    app, calls = counting_app()
+    middleware = ResponseCacheMiddleware(app, max_entries=2)
+    for path in ("/a", "/b", "/c", "/a"):
+        call(middleware, PATH_INFO=path)
+    assert len(calls) == 4
+    assert len(middleware.cache.entries) == 2
+    assert middleware.stats["Evictions"] == 2